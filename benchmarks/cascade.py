@@ -0,0 +1,126 @@
+"""Cascade mode 벤치마크: 상위 모델 단독 채점과 단계별 채점(cascade)의 비용, 소요 시간, 점수 일치도를 비교
+
+실제 OpenAI API를 호출하므로 비용이 발생함
+
+Usage:
+    python -m benchmarks.cascade --category <category_id> --input-dir <보고서 폴더> [--limit 20] [--output result.json]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.common.consts import ALLOWED_EXTENSIONS, CASCADE_TIER_STRONG, MAX_CHAR_LEN_PER_FILE
+from src.processor.generator import Generator
+from src.processor.reader import FileReader
+from src.processor.result import get_result_layout
+from src.utils.llm import compute_result_cost
+
+
+def load_reports(input_dir: Path, limit: int) -> dict[str, str]:
+    reports = {}
+    for path in sorted(input_dir.iterdir()):
+        if path.suffix == ".txt":
+            content = path.read_text(encoding="utf-8")
+        elif path.suffix in ALLOWED_EXTENSIONS:
+            content = FileReader(filepath=path, clean=True).text
+        else:
+            continue
+        reports[path.name] = content[:MAX_CHAR_LEN_PER_FILE]
+        if len(reports) >= limit:
+            break
+    return reports
+
+
+async def run_mode(reports: dict[str, str], category_id: str, cascade: bool, concurrency: int) -> dict:
+    generator = Generator()
+    agenerate = generator.agenerate_cascade if cascade else generator.agenerate
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(content: str):
+        async with semaphore:
+            return await agenerate(category=category_id, input_text=content)
+
+    t = time.perf_counter()
+    results = await asyncio.gather(*[run(content) for content in reports.values()], return_exceptions=True)
+    return {"results": dict(zip(reports.keys(), results)), "elapsed_time": time.perf_counter() - t}
+
+
+def summarize_mode(run_result: dict) -> dict:
+    results = [result for result in run_result["results"].values() if not isinstance(result, Exception)]
+    response_times = np.array([result["response_time"] for result in results])
+    return {
+        "num_reports": len(run_result["results"]),
+        "num_errors": len(run_result["results"]) - len(results),
+        "cost": sum(compute_result_cost(result) for result in results),
+        "elapsed_time": run_result["elapsed_time"],
+        "latency_p50": float(np.percentile(response_times, 50)) if len(results) else None,
+        "latency_p95": float(np.percentile(response_times, 95)) if len(results) else None,
+        "escalation_rate": (
+            float(np.mean([result.get("tier") == CASCADE_TIER_STRONG for result in results])) if results else None
+        ),
+    }
+
+
+def compare_scores(category_id: str, baseline: dict, cascade: dict) -> dict:
+    """상위 모델 단독 결과 대비 cascade 결과의 세부 점수 일치도"""
+    layout = get_result_layout(category_id)
+    names = [
+        name
+        for name, result in baseline["results"].items()
+        if not isinstance(result, Exception) and not isinstance(cascade["results"][name], Exception)
+    ]
+    if not names:
+        return {}
+
+    def to_matrix(run_result: dict) -> np.ndarray:
+        return np.array(
+            [
+                [run_result["results"][name]["score_info"].get(colname, np.nan) for colname in layout.score_columns]
+                + [run_result["results"][name]["score_info"]["Total"]]
+                for name in names
+            ],
+            dtype=np.float64,
+        )
+
+    baseline_scores, cascade_scores = to_matrix(baseline), to_matrix(cascade)
+    diff = np.abs(baseline_scores[:, :-1] - cascade_scores[:, :-1])
+    is_cheap = np.array([cascade["results"][name].get("tier") != CASCADE_TIER_STRONG for name in names])
+    return {
+        "num_compared": len(names),
+        "exact_agreement": float(np.nanmean(diff == 0)),
+        "within_1_agreement": float(np.nanmean(diff <= 1)),
+        "total_mean_abs_diff": float(np.mean(np.abs(baseline_scores[:, -1] - cascade_scores[:, -1]))),
+        # 싼 모델 결과를 그대로 쓴 보고서만의 일치도
+        "cheap_tier_exact_agreement": float(np.nanmean(diff[is_cheap] == 0)) if is_cheap.any() else None,
+    }
+
+
+async def main(args):
+    reports = load_reports(Path(args.input_dir), args.limit)
+    print(f"Loaded {len(reports)} reports")
+    baseline = await run_mode(reports, args.category, cascade=False, concurrency=args.concurrency)
+    cascade = await run_mode(reports, args.category, cascade=True, concurrency=args.concurrency)
+
+    summary = {
+        "baseline": summarize_mode(baseline),
+        "cascade": summarize_mode(cascade),
+        "agreement": compare_scores(args.category, baseline, cascade),
+    }
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--category", required=True, help="category id(src/prompt/category의 파일명)")
+    parser.add_argument("--input-dir", required=True, help=".txt 또는 허용된 확장자의 보고서 파일들이 있는 폴더")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--output", help="결과를 저장할 json 경로")
+    asyncio.run(main(parser.parse_args()))
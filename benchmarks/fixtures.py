@@ -0,0 +1,298 @@
+"""벤치마크용 보고서 파일 생성
+
+외부 라이브러리 없이 .hwp(OLE compound file), .docx, .pdf(text layer), .zip 파일을 seed에 따라 항상 같은 내용으로 만듦.
+실제 학생 보고서를 저장소에 둘 수 없으므로 크기와 구조(여러 section, 압축, 여러 쪽, cp949 파일명 등)만 비슷하게 맞춤
+
+Usage:
+    python -m benchmarks.fixtures --output-dir /tmp/fixtures
+"""
+
+import argparse
+import io
+import random
+import struct
+import zipfile
+import zlib
+from pathlib import Path
+
+WORDS_KO = (
+    "보고서 연구 결과 분석 자료 학생 사회 문제 해결 방안 필요 중요 경우 과정 관점 제시 근거 주장 논리 구성 "
+    "서론 본론 결론 인용 출처 문단 문장 표현 맞춤법 데이터 실험 가설 검증 비교 차이 영향 변화 의미 정리"
+).split()
+WORDS_EN = (
+    "report research result analysis data student society problem solution method evidence claim argument "
+    "structure introduction conclusion citation paragraph sentence experiment hypothesis comparison effect"
+).split()
+
+
+def make_paragraphs(num_paragraphs: int, words: list[str] = WORDS_KO, seed: int = 0) -> list[str]:
+    """문단 목록. 문단마다 3~8문장이며 가끔 중복 공백이나 제어 문자를 넣어 clean_text가 할 일이 있게 함"""
+    rng = random.Random(seed)
+    paragraphs = []
+    for _ in range(num_paragraphs):
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            sentence = " ".join(rng.choices(words, k=rng.randint(6, 14))) + "."
+            if rng.random() < 0.1:
+                sentence = sentence.replace(" ", "   ", 1) + "\xa0"
+            sentences.append(sentence)
+        paragraphs.append(" ".join(sentences))
+    return paragraphs
+
+
+class _OleWriter:
+    """olefile이 읽을 수 있는 최소한의 OLE compound file(CFB v3) 작성기
+
+    mini stream을 만들지 않으므로 모든 stream은 MINI_STREAM_CUTOFF 이상이어야 함
+    """
+
+    SECTOR_SIZE = 512
+    MINI_STREAM_CUTOFF = 4096
+    FREESECT, ENDOFCHAIN, FATSECT, NOSTREAM = 0xFFFFFFFF, 0xFFFFFFFE, 0xFFFFFFFD, 0xFFFFFFFF
+
+    def __init__(self) -> None:
+        self.storages: dict[str, dict[str, bytes]] = {"": {}}  # storage 이름("": root) -> {stream 이름: 데이터}
+
+    def add_stream(self, path: str, data: bytes) -> None:
+        if len(data) < self.MINI_STREAM_CUTOFF:
+            raise ValueError(f"Stream {path} is smaller than {self.MINI_STREAM_CUTOFF} bytes")
+        storage, _, name = path.rpartition("/")
+        self.storages.setdefault(storage, {})[name] = data
+
+    @staticmethod
+    def _sort_key(name: str) -> tuple:
+        return len(name), name.upper()
+
+    def to_bytes(self) -> bytes:
+        # directory entry: root, root의 자식(stream + storage), 각 storage의 stream 순
+        entries = [{"name": "Root Entry", "type": 5, "data": b""}]
+        root_children = [{"name": name, "type": 2, "data": data} for name, data in self.storages[""].items()]
+        root_children += [{"name": name, "type": 1, "data": b""} for name in self.storages if name]
+        root_children.sort(key=lambda entry: self._sort_key(entry["name"]))
+        entries[0]["children"] = root_children
+        entries.extend(root_children)
+        for entry in root_children:
+            if entry["type"] == 1:
+                entry["children"] = sorted(
+                    [{"name": name, "type": 2, "data": data} for name, data in self.storages[entry["name"]].items()],
+                    key=lambda child: self._sort_key(child["name"]),
+                )
+                entries.extend(entry["children"])
+        for idx, entry in enumerate(entries):
+            entry["id"] = idx
+        # 형제들은 이름 순으로 right sibling에 이어 붙이고, 부모의 child는 첫 번째 자식을 가리킴
+        for entry in entries:
+            siblings = entry.get("children", [])
+            for sibling, next_sibling in zip(siblings, siblings[1:] + [None]):
+                sibling["right"] = next_sibling["id"] if next_sibling else self.NOSTREAM
+
+        # sector 배치: stream 데이터 -> directory -> FAT
+        sectors = []
+        fat = []
+        for entry in entries:
+            entry["start"], entry["size"] = self.ENDOFCHAIN, len(entry["data"])
+            if entry["type"] != 2:
+                entry["size"] = 0
+                continue
+            num_sectors = -(-len(entry["data"]) // self.SECTOR_SIZE)
+            entry["start"] = len(sectors)
+            for i in range(num_sectors):
+                sectors.append(entry["data"][i * self.SECTOR_SIZE : (i + 1) * self.SECTOR_SIZE])
+                fat.append(len(sectors) if i < num_sectors - 1 else self.ENDOFCHAIN)
+
+        dir_data = b"".join(self._dir_entry(entry) for entry in entries)
+        num_dir_sectors = -(-len(dir_data) // self.SECTOR_SIZE)
+        first_dir_sector = len(sectors)
+        for i in range(num_dir_sectors):
+            sectors.append(dir_data[i * self.SECTOR_SIZE : (i + 1) * self.SECTOR_SIZE])
+            fat.append(len(sectors) if i < num_dir_sectors - 1 else self.ENDOFCHAIN)
+
+        num_fat_sectors = 1
+        while num_fat_sectors * (self.SECTOR_SIZE // 4) < len(sectors) + num_fat_sectors:
+            num_fat_sectors += 1
+        if num_fat_sectors > 109:
+            raise ValueError("Too large to write without DIFAT sectors")
+        fat_sector_ids = list(range(len(sectors), len(sectors) + num_fat_sectors))
+        fat.extend([self.FATSECT] * num_fat_sectors)
+        fat.extend([self.FREESECT] * (num_fat_sectors * (self.SECTOR_SIZE // 4) - len(fat)))
+        fat_data = struct.pack(f"<{len(fat)}I", *fat)
+
+        header = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 16
+        header += struct.pack("<HHHHH6xIIII", 0x3E, 3, 0xFFFE, 9, 6, 0, num_fat_sectors, first_dir_sector, 0)
+        header += struct.pack("<IIIII", self.MINI_STREAM_CUTOFF, self.ENDOFCHAIN, 0, self.ENDOFCHAIN, 0)
+        header += struct.pack("<109I", *(fat_sector_ids + [self.FREESECT] * (109 - num_fat_sectors)))
+
+        body = b"".join(sector.ljust(self.SECTOR_SIZE, b"\x00") for sector in sectors)
+        return header + body + fat_data
+
+    def _dir_entry(self, entry: dict) -> bytes:
+        name = entry["name"].encode("utf-16-le") + b"\x00\x00"
+        right = entry.get("right", self.NOSTREAM)
+        child = entry["children"][0]["id"] if entry.get("children") else self.NOSTREAM
+        return (
+            name.ljust(64, b"\x00")
+            + struct.pack("<HBBIII", len(name), entry["type"], 1, self.NOSTREAM, right, child)
+            + b"\x00" * 36
+            + struct.pack("<IQ", entry["start"], entry["size"])
+        )
+
+
+def _hwp_record(tag: int, data: bytes, level: int = 0) -> bytes:
+    return struct.pack("<I", tag | (level << 10) | (len(data) << 20)) + data
+
+
+def make_hwp(num_sections: int = 5, paragraphs_per_section: int = 80, seed: int = 0) -> bytes:
+    """section마다 BodyText/Section{i} stream이 있는 압축된 .hwp
+
+    문단마다 PARA_HEADER, PARA_TEXT, PARA_CHAR_SHAPE, PARA_LINE_SEG record를 넣어 실제 파일처럼 텍스트가 아닌
+    record도 건너뛰게 함. FileHeader 등은 실제(256 bytes)보다 크게 채움(mini stream을 쓰지 않기 위해)
+    """
+    rng = random.Random(seed)
+    ole = _OleWriter()
+    file_header = b"HWP Document File".ljust(32, b"\x00") + bytes([0, 3, 0, 5]) + struct.pack("<I", 1)  # 압축
+    ole.add_stream("FileHeader", file_header.ljust(ole.MINI_STREAM_CUTOFF, b"\x00"))
+    ole.add_stream("\x05HwpSummaryInformation", b"\x00" * ole.MINI_STREAM_CUTOFF)
+    for section_idx in range(num_sections):
+        records = []
+        for paragraph in make_paragraphs(paragraphs_per_section, seed=seed * 1000 + section_idx):
+            text = paragraph[:2000]  # record 크기는 0xFFF 미만이어야 함
+            records.append(_hwp_record(66, rng.randbytes(22)))
+            records.append(_hwp_record(67, text.encode("utf-16-le"), level=1))
+            records.append(_hwp_record(68, rng.randbytes(8), level=1))
+            records.append(_hwp_record(69, rng.randbytes(36), level=1))
+        compressor = zlib.compressobj(wbits=-15)
+        data = compressor.compress(b"".join(records)) + compressor.flush()
+        if len(data) < ole.MINI_STREAM_CUTOFF:
+            raise ValueError("Too small section. Increase paragraphs_per_section")
+        ole.add_stream(f"BodyText/Section{section_idx}", data)
+    return ole.to_bytes()
+
+
+def _xml_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def make_docx(num_paragraphs: int = 300, seed: int = 0) -> bytes:
+    """word/document.xml에 문단만 있는 최소한의 .docx"""
+    body = "".join(
+        f'<w:p><w:r><w:t xml:space="preserve">{_xml_escape(paragraph)}</w:t></w:r></w:p>'
+        for paragraph in make_paragraphs(num_paragraphs, seed=seed)
+    )
+    ns = "http://schemas.openxmlformats.org"
+    files = {
+        "[Content_Types].xml": (
+            f'<?xml version="1.0" encoding="UTF-8"?><Types xmlns="{ns}/package/2006/content-types">'
+            + '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            + '<Default Extension="xml" ContentType="application/xml"/><Override PartName="/word/document.xml" '
+            + 'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            + "</Types>"
+        ),
+        "_rels/.rels": (
+            f'<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="{ns}/package/2006/relationships">'
+            + f'<Relationship Id="rId1" Type="{ns}/officeDocument/2006/relationships/officeDocument" '
+            + 'Target="word/document.xml"/></Relationships>'
+        ),
+        "word/document.xml": (
+            f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{ns}/wordprocessingml/2006/main">'
+            + f"<w:body>{body}</w:body></w:document>"
+        ),
+    }
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in files.items():
+            zip_file.writestr(name, content)
+    return buffer.getvalue()
+
+
+def make_pdf(num_pages: int = 20, lines_per_page: int = 50, seed: int = 0) -> bytes:
+    """쪽마다 text layer(Helvetica)가 있는 .pdf. 기본 글꼴은 한글을 표현할 수 없어 영문으로 채움"""
+    text = " ".join(make_paragraphs(num_pages * lines_per_page // 6, words=WORDS_EN, seed=seed)).replace("\xa0", "")
+    words = text.split()
+    lines, line = [], ""
+    for word in words:
+        if len(line) + len(word) > 90:
+            lines.append(line)
+            line = ""
+        line = f"{line} {word}" if line else word
+    lines.append(line)
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_idx in range(num_pages):
+        page_lines = lines[page_idx * lines_per_page : (page_idx + 1) * lines_per_page]
+        escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in page_lines]
+        stream = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode("latin-1"))
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {content_id} 0 R >>".encode("latin-1")
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {num_pages} >>".encode("latin-1")
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for obj_id, obj in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{obj_id} 0 obj\n".encode("latin-1") + obj + b"\nendobj\n"
+    xref_offset = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+    return pdf
+
+
+class _Cp949ZipInfo(zipfile.ZipInfo):
+    """Windows 기본 압축 프로그램처럼 파일명을 UTF-8 flag 없이 cp949로 기록"""
+
+    def _encodeFilenameFlags(self):
+        return self.filename.encode("cp949"), self.flag_bits
+
+
+def make_zip(num_files: int = 30, seed: int = 0, extensions: tuple[str, ...] = (".hwp", ".docx", ".pdf")) -> bytes:
+    """여러 형식의 보고서가 cp949 한글 파일명으로 들어 있는 .zip. 폴더와 __MACOSX 항목도 포함
+
+    seed가 다르면 모든 보고서의 내용이 다름(중복 검사에 걸리지 않음)
+    """
+    rng = random.Random(seed)
+    makers = {
+        ".hwp": lambda file_seed: make_hwp(num_sections=2, seed=file_seed),
+        ".docx": lambda file_seed: make_docx(num_paragraphs=100, seed=file_seed),
+        ".pdf": lambda file_seed: make_pdf(num_pages=5, seed=file_seed),
+    }
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr(_Cp949ZipInfo("과제/"), b"")
+        for i in range(num_files):
+            extension = rng.choice(extensions)
+            info = _Cp949ZipInfo(f"과제/2024{rng.randint(10000, 99999)}_학생{i}_보고서{extension}")
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zip_file.writestr(info, makers[extension](seed * num_files + i))
+            if i % 10 == 0:
+                zip_file.writestr(f"__MACOSX/._{i}{extension}", rng.randbytes(64))
+    return buffer.getvalue()
+
+
+def build_fixtures(seed: int = 0) -> dict[str, bytes]:
+    """파일명 -> 파일 내용"""
+    return {
+        "multi_section.hwp": make_hwp(seed=seed),
+        "long.docx": make_docx(seed=seed),
+        "text_layer.pdf": make_pdf(seed=seed),
+        "reports_cp949.zip": make_zip(seed=seed),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, data in build_fixtures(args.seed).items():
+        (output_dir / name).write_bytes(data)
+        print(f"{name}: {len(data) / 1024:.0f}KB")
@@ -0,0 +1,298 @@
+"""Streamlit 앱(main.py) 다중 세션 부하 테스트
+
+Streamlit의 app testing API(AppTest)로 main.py를 실행하는 세션을 동시에 여러 개 띄워, 세션마다 보고서 zip을 올리고
+평가하기를 눌러 결과가 나올 때까지의 시간을 잼. 모든 세션은 이 프로세스 안에서 실행되므로 실제 서버처럼
+st.cache_resource, llm_router 등을 공유하며, 실행 중 프로세스의 RSS와 CPU 사용률도 함께 기록함.
+
+- LLM: benchmarks/mock_openai.py 서버를 띄우고 openai.api_base를 그쪽으로 바꿈(--rpm, --tpm, --latency-per-token)
+- 저장소: STORAGE_BACKEND=local, DB_DIR=임시 폴더(--db-dir)로 실행하여 실제 db/와 Google Drive를 건드리지 않음
+- 파일 업로드: AppTest는 st.file_uploader를 조작할 수 없으므로, 세션의 session_state에 넣어둔 파일을 업로드된 것으로 반환하도록 바꿈
+- AppTest는 한 번에 하나의 실행만 가정하므로 전역 상태를 고정함(allow_concurrent_app_tests)
+
+--concurrency의 단계마다 처리량(초당 보고서 수)을 재고, 처리량이 --saturation-gain 비율 이상 늘지 않는 첫 단계의
+직전 단계를 포화 지점(saturation_concurrency)으로 보고함
+
+Usage:
+    python -m benchmarks.load_test [--concurrency 1,2,4,8,16] [--files-per-session 10] [--extensions .hwp]
+        [--rpm 500] [--tpm 300000] [--latency-per-token 0.02] [--output load_test.json]
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from benchmarks.fixtures import make_zip
+
+PROJECT_DIR = Path(__file__).parent.parent
+UPLOAD_STATE_KEY = "load_test_upload_files"  # 세션별로 업로드할 {파일명: bytes}
+MAX_SUBMIT_RETRIES = 3
+
+
+def get_rss() -> int:
+    """현재 프로세스의 RSS(bytes). /proc이 없으면 최대 RSS로 대신함"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Linux 외(macOS)에서는 bytes 단위라 근사치
+
+
+class ResourceSampler:
+    """interval마다 프로세스의 RSS와 CPU 사용률(모든 thread 합, 코어 하나가 100%)을 기록"""
+
+    def __init__(self, interval: float = 0.5) -> None:
+        self.interval = interval
+        self.rss_samples = []
+        self.cpu_samples = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        wall, cpu = time.perf_counter(), time.process_time()
+        while not self._stop.wait(self.interval):
+            now_wall, now_cpu = time.perf_counter(), time.process_time()
+            self.cpu_samples.append((now_cpu - cpu) / (now_wall - wall) * 100)
+            self.rss_samples.append(get_rss())
+            wall, cpu = now_wall, now_cpu
+
+    def start(self) -> None:
+        self.rss_samples.append(get_rss())
+        self._thread = threading.Thread(target=self._run, name="load-test-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> dict:
+        self._stop.set()
+        self._thread.join()
+        self.rss_samples.append(get_rss())
+        return {
+            "rss_max_mb": max(self.rss_samples) / 2**20,
+            "rss_end_mb": self.rss_samples[-1] / 2**20,
+            "cpu_mean": float(np.mean(self.cpu_samples)) if self.cpu_samples else None,
+            "cpu_max": float(np.max(self.cpu_samples)) if self.cpu_samples else None,
+        }
+
+
+class NamedBytesIO(io.BytesIO):
+    """Streamlit의 UploadedFile처럼 name이 있는 BytesIO"""
+
+    def __init__(self, data: bytes, name: str) -> None:
+        super().__init__(data)
+        self.name = name
+
+
+def patch_file_uploader() -> None:
+    """session_state[UPLOAD_STATE_KEY]가 있는 세션에서는 st.file_uploader가 그 파일들을 반환하도록 바꿈"""
+    import streamlit as st
+
+    original = st.file_uploader
+    if getattr(original, "load_test_patched", False):
+        return
+
+    def file_uploader(label, *args, **kwargs):
+        uploads = st.session_state.get(UPLOAD_STATE_KEY)
+        if uploads is None:
+            return original(label, *args, **kwargs)
+        return [NamedBytesIO(data, name) for name, data in uploads.items()]
+
+    file_uploader.load_test_patched = True
+    st.file_uploader = file_uploader
+
+
+def allow_concurrent_app_tests() -> None:
+    """AppTest를 여러 thread에서 동시에 실행할 수 있도록 전역 상태를 고정
+
+    AppTest는 실행할 때마다 전역 Runtime._instance와 global.appTest 설정을 바꾸고 끝나면 되돌리므로, 동시에 실행하면
+    다른 세션의 스크립트가 "Runtime hasn't been created!"로 실패하거나 위젯 값이 기록되지 않아 클릭이 무시됨.
+    모든 세션이 마지막으로 만들어진 mock Runtime을 함께 쓰고, global.appTest는 계속 켜둠
+    """
+    from streamlit import config
+    from streamlit.runtime.runtime import Runtime
+
+    config.set_option("global.appTest", True)  # AppTest가 실행 후 이 값으로 되돌림
+    if getattr(Runtime.instance, "load_test_patched", False):
+        return
+    last_runtime = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            last_runtime["runtime"] = cls._instance
+        elif "runtime" not in last_runtime:
+            raise RuntimeError("Runtime hasn't been created!")
+        return last_runtime["runtime"]
+
+    instance.load_test_patched = True
+    Runtime.instance = classmethod(instance)
+
+
+def find_submit_button(at):
+    return next((button for button in at.button if button.label == "평가하기"), None)
+
+
+def run_session(name: str, zip_bytes: bytes, timeout: float) -> dict:
+    """새 세션으로 첫 화면을 그린 뒤 zip을 올리고 평가하기를 누름"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(PROJECT_DIR / "main.py"), default_timeout=timeout)
+    at.session_state[UPLOAD_STATE_KEY] = {f"{name}.zip": zip_bytes}
+    t = time.perf_counter()
+    # 동시에 실행하는 AppTest가 드물게 빈 화면을 그리거나 click을 놓치므로(결과도 오류도 없이 form만 그림) 다시 시도
+    submit_retries = 0
+    try:
+        at.run()
+        while find_submit_button(at) is None and submit_retries < MAX_SUBMIT_RETRIES:
+            submit_retries += 1
+            at.run()
+        first_render_time = time.perf_counter() - t
+
+        t = time.perf_counter()
+        submit_button = find_submit_button(at)
+        while submit_button is not None:
+            submit_button.click().run()
+            if at.success or at.error or at.exception or submit_retries >= MAX_SUBMIT_RETRIES:
+                break
+            submit_retries += 1
+            submit_button = find_submit_button(at)
+        latency = time.perf_counter() - t
+    except Exception as e:  # timeout 등
+        return {
+            "name": name,
+            "ok": False,
+            "latency": time.perf_counter() - t,
+            "errors": [f"{e.__class__.__name__}: {e}"],
+        }
+
+    errors = [element.value for element in at.error] + [str(element.value) for element in at.exception]
+    if not (at.success or errors):
+        errors.append("Submit not processed")
+    return {
+        "name": name,
+        "ok": any("평가가 완료" in element.value for element in at.success) and not errors,
+        "first_render_time": first_render_time,
+        "latency": latency,
+        "submit_retries": submit_retries,
+        "errors": errors,
+    }
+
+
+def run_level(concurrency: int, args, mock_server) -> dict:
+    """concurrency개의 세션을 동시에 실행"""
+    from src.utils.llm_router import llm_router
+    from src.utils.llm_scheduler import llm_scheduler
+
+    # 세션마다 내용이 다른 보고서를 올려 중복 검사로 LLM 호출이 생략되지 않게 함
+    zips = {
+        f"c{concurrency}_s{idx}": make_zip(
+            args.files_per_session, seed=concurrency * 1000 + idx, extensions=args.extensions
+        )
+        for idx in range(concurrency)
+    }
+    llm_router.reset()
+    llm_scheduler.reset()
+    mock_stats = dict(mock_server.stats)
+    sampler = ResourceSampler(args.sample_interval)
+    sampler.start()
+    t = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        sessions = list(executor.map(lambda item: run_session(*item, args.timeout), zips.items()))
+    elapsed_time = time.perf_counter() - t
+    resources = sampler.stop()
+
+    latencies = [session["latency"] for session in sessions if session["ok"]]
+    num_ok = sum(session["ok"] for session in sessions)
+    return {
+        "concurrency": concurrency,
+        "num_ok": num_ok,
+        "submit_retries": sum(session.get("submit_retries", 0) for session in sessions),
+        "elapsed_time": elapsed_time,
+        "throughput": num_ok * args.files_per_session / elapsed_time,  # 초당 보고서 수
+        "latency_p50": float(np.percentile(latencies, 50)) if latencies else None,
+        "latency_p95": float(np.percentile(latencies, 95)) if latencies else None,
+        "latency_max": max(latencies) if latencies else None,
+        **resources,
+        "llm": {key: value - mock_stats[key] for key, value in mock_server.stats.items()},
+        "errors": [error for session in sessions for error in session["errors"]][:10],
+    }
+
+
+def find_saturation(levels: list[dict], min_gain: float) -> Optional[int]:
+    """처리량이 min_gain 비율 이상 늘지 않는 첫 단계의 직전 concurrency. 끝까지 늘면 None"""
+    best = None
+    for level in levels:
+        if best is not None and level["throughput"] < best["throughput"] * (1 + min_gain):
+            return best["concurrency"]
+        if best is None or level["throughput"] > best["throughput"]:
+            best = level
+    return None
+
+
+def main(args):
+    # src를 import하기 전에 설정해야 consts와 저장소에 반영됨
+    db_dir = Path(args.db_dir or tempfile.mkdtemp(prefix="load_test_"))
+    os.environ["DB_DIR"] = str(db_dir)
+    os.environ["STORAGE_BACKEND"] = "local"
+    os.environ.setdefault("PHASE", "dev")
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+
+    import openai
+
+    from benchmarks.mock_openai import MockOpenAIServer
+    from src.utils.metrics import metrics
+
+    metrics.path = db_dir / "metrics.jsonl"
+    mock_server = MockOpenAIServer(rpm=args.rpm, tpm=args.tpm, latency_per_token=args.latency_per_token)
+    openai.api_base = mock_server.start_background()
+    patch_file_uploader()
+    allow_concurrent_app_tests()
+    print(f"DB_DIR: {db_dir}, LLM: {openai.api_base}")
+
+    run_session("warmup", make_zip(1, seed=999_999, extensions=args.extensions), args.timeout)  # 첫 import 등 제외
+    levels = []
+    for concurrency in args.concurrency:
+        level = run_level(concurrency, args, mock_server)
+        levels.append(level)
+        print(
+            f"concurrency={concurrency:3d} ok={level['num_ok']}/{concurrency} "
+            + f"throughput={level['throughput']:.2f} reports/s "
+            + f"p50={level['latency_p50'] or 0:.1f}s p95={level['latency_p95'] or 0:.1f}s "
+            + f"rss_max={level['rss_max_mb']:.0f}MB cpu_mean={level['cpu_mean'] or 0:.0f}%"
+        )
+
+    summary = {
+        "files_per_session": args.files_per_session,
+        "extensions": list(args.extensions),
+        "llm": {"rpm": args.rpm, "tpm": args.tpm, "latency_per_token": args.latency_per_token},
+        "levels": levels,
+        "saturation_concurrency": find_saturation(levels, args.saturation_gain),
+    }
+    print(f"Saturation concurrency: {summary['saturation_concurrency']}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="동시 세션 수 단계(쉼표로 구분)")
+    parser.add_argument("--files-per-session", type=int, default=10, help="세션마다 zip에 넣는 보고서 수")
+    parser.add_argument("--extensions", default=".hwp", help="보고서 형식(쉼표로 구분). .docx/.pdf는 unstructured 필요")
+    parser.add_argument("--timeout", type=float, default=600, help="세션의 한 번의 실행(rerun) 제한 시간(초)")
+    parser.add_argument("--rpm", type=int, help="mock LLM의 분당 요청 수 한도")
+    parser.add_argument("--tpm", type=int, help="mock LLM의 분당 토큰 수 한도")
+    parser.add_argument("--latency-per-token", type=float, default=0.02, help="mock LLM의 출력 토큰당 응답 시간(초)")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="RSS와 CPU를 기록하는 간격(초)")
+    parser.add_argument("--saturation-gain", type=float, default=0.1, help="이보다 처리량이 적게 늘면 포화로 판단")
+    parser.add_argument("--db-dir", help="인덱스, 결과 등을 저장할 폴더. 없으면 임시 폴더")
+    parser.add_argument("--output", help="결과를 저장할 json 경로")
+    args = parser.parse_args()
+    args.concurrency = [int(value) for value in args.concurrency.split(",")]
+    args.extensions = tuple(args.extensions.split(","))
+    main(args)
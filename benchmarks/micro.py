@@ -0,0 +1,181 @@
+"""텍스트 추출과 prompt 생성 경로의 micro 벤치마크
+
+benchmarks/fixtures.py로 만든 .hwp/.docx/.pdf/.zip 파일로 함수별 1회 호출 시간을 측정함.
+case마다 측정 시간이 --min-time 이상이 되도록 반복 횟수를 정한 뒤 --repeat번 측정하여 중앙값을 기록함.
+결과는 commit별 json(기본: benchmarks/results/micro-{commit}.json)으로 저장되며, --baseline을 주면
+중앙값이 --threshold 비율 이상 느려진 case가 있을 때 실패(exit code 1)함.
+의존 패키지가 없어 실행할 수 없는 case(ex. unstructured가 필요한 .docx/.pdf)는 건너뛰고 이유를 기록함
+
+Usage:
+    python -m benchmarks.micro [--filter hwp] [--repeat 7] [--output micro.json]
+    python -m benchmarks.micro --baseline benchmarks/results/micro-1a2b3c4.json [--threshold 0.2]
+"""
+
+import argparse
+import io
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from benchmarks.fixtures import build_fixtures, make_paragraphs
+from src.common.consts import MAX_CHAR_LEN_PER_FILE
+from src.common.models import get_category_registry
+from src.processor.generator import Generator
+from src.processor.reader import FileReader, HWPReader, clean_text
+from src.processor.result import get_result_layout
+from src.utils.io import unzip_as_dict
+from src.utils.llm import num_tokens_from_messages
+
+RESULT_DIR = Path(__file__).parent / "results"
+
+
+def get_commit() -> str:
+    """현재 commit(short hash). 커밋하지 않은 변경이 있으면 -dirty를 붙임"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit.stdout.strip() + ("-dirty" if status.stdout.strip() else "")
+
+
+def build_cases(fixtures: dict[str, bytes]) -> dict[str, Callable[[], Callable]]:
+    """case 이름 -> 측정할 함수를 만드는 함수. 준비 과정(prompt 생성 등)은 측정에서 제외하기 위해 나눔"""
+    long_text = "\n".join(make_paragraphs(400))
+    category_id = next(iter(get_category_registry().get_snapshot()[1]))
+
+    def extract_text(name: str, filetype: str):
+        # FileReader는 생성할 때 추출하며 파일을 닫으므로 매번 새 file object를 만듦
+        return lambda: lambda: FileReader(file=io.BytesIO(fixtures[name]), filetype=filetype, clean=False)
+
+    def prompt():
+        generator = Generator()
+        return lambda: generator.construct_prompt(category_id, long_text[:MAX_CHAR_LEN_PER_FILE])
+
+    def token_count():
+        messages = Generator().construct_prompt(category_id, long_text[:MAX_CHAR_LEN_PER_FILE])
+        num_tokens_from_messages(messages)  # encoding 로드는 측정에서 제외
+        return lambda: num_tokens_from_messages(messages)
+
+    def serialize():
+        layout = get_result_layout(category_id)
+        criteria_dict = get_category_registry().get(category_id).prompt_dict
+        score_info = {
+            crit_dict["title_en"]: {
+                "score": [sub_crit_dict["scale_max"] for sub_crit_dict in crit_dict["sub_criteria"]],
+                "description": "평가 설명 " * 20,
+            }
+            for crit_dict in criteria_dict["criteria"]
+        }
+        return lambda: layout.serialize_score_info(score_info)
+
+    return {
+        "extract_text[.hwp]": extract_text("multi_section.hwp", ".hwp"),
+        "extract_text[.docx]": extract_text("long.docx", ".docx"),
+        "extract_text[.pdf]": extract_text("text_layer.pdf", ".pdf"),
+        "hwp_reader": lambda: lambda: HWPReader(io.BytesIO(fixtures["multi_section.hwp"])),
+        "clean_text": lambda: lambda: clean_text(long_text, ".hwp"),
+        "unzip_as_dict": lambda: lambda: unzip_as_dict(io.BytesIO(fixtures["reports_cp949.zip"])),
+        "construct_prompt": prompt,
+        "num_tokens_from_messages": token_count,
+        "serialize_score_info": serialize,
+    }
+
+
+def measure(func: Callable, min_time: float, repeat: int) -> dict:
+    """1회 호출 시간(ms)의 중앙값 등. 한 번의 측정이 min_time 이상 걸리도록 반복 횟수(loops)를 늘림"""
+    loops = 1
+    while True:
+        t = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - t
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(loops):
+            func()
+        times.append((time.perf_counter() - t) / loops * 1000)
+    return {
+        "median_ms": float(np.median(times)),
+        "min_ms": float(np.min(times)),
+        "max_ms": float(np.max(times)),
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def compare_baseline(result: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, case in result["cases"].items():
+        base_case = baseline["cases"].get(name)
+        if "median_ms" not in case or not base_case or "median_ms" not in base_case:
+            continue
+        ratio = case["median_ms"] / base_case["median_ms"]
+        print(f"{name:28s} {base_case['median_ms']:10.3f}ms -> {case['median_ms']:10.3f}ms ({ratio - 1:+.1%})")
+        if ratio > 1 + threshold:
+            regressions.append(f"{name} {case['median_ms']:.3f}ms > {base_case['median_ms']:.3f}ms x{1 + threshold}")
+    return regressions
+
+
+def main(args):
+    fixtures = build_fixtures(args.seed)
+    result = {
+        "commit": get_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "fixture_sizes": {name: len(data) for name, data in fixtures.items()},
+        "cases": {},
+    }
+    for name, make_func in build_cases(fixtures).items():
+        if args.filter and args.filter not in name:
+            continue
+        try:
+            func = make_func()
+            func()  # import, cache 등 첫 호출의 영향을 제외
+        except Exception as e:
+            result["cases"][name] = {"skipped": f"{e.__class__.__name__}: {e}"}
+            print(f"{name:28s} skipped: {result['cases'][name]['skipped']}")
+            continue
+        result["cases"][name] = measure(func, args.min_time, args.repeat)
+        print(f"{name:28s} {result['cases'][name]['median_ms']:10.3f}ms (loops={result['cases'][name]['loops']})")
+
+    output_path = Path(args.output) if args.output else RESULT_DIR / f"micro-{result['commit']}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Save to {output_path}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        print(f"\nCompare with {baseline['commit']}")
+        regressions = compare_baseline(result, baseline, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", help="이름에 이 문자열이 들어간 case만 측정")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2, help="한 번의 측정에 걸리는 최소 시간(초)")
+    parser.add_argument("--seed", type=int, default=0, help="fixture 생성 seed")
+    parser.add_argument("--output", help="결과를 저장할 json 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 json 경로")
+    parser.add_argument("--threshold", type=float, default=0.2, help="허용하는 중앙값 증가 비율")
+    main(parser.parse_args())
@@ -0,0 +1,303 @@
+"""부하 테스트용 로컬 OpenAI 호환 서버(ChatCompletion)
+
+- 프롬프트에서 카테고리(src/prompt/category의 .toml)를 찾아 평가기준 형식과 점수 범위에 맞는 JSON을 응답
+- 응답 시간 = --base-latency + 출력 토큰 수 x --latency-per-token (+ --jitter 비율의 변동)
+- 최근 60초의 요청 수(--rpm)와 토큰 수(--tpm, 입력 + max_tokens)를 넘으면 OpenAI와 같은 형식의 429와
+  retry-after, x-ratelimit-* 헤더를 반환
+- stream=true이면 SSE로 토큰 단위 chunk를 보냄
+
+앱이나 벤치마크를 이 서버로 보내려면 OPENAI_API_BASE 환경 변수를 설정하거나(openai 0.28은 import 시 읽음),
+MODEL_TYPE_INFOS의 endpoints에 {"id": "mock", "api_base": "http://127.0.0.1:8000/v1"}를 추가
+
+Usage:
+    python -m benchmarks.mock_openai [--port 8000] [--rpm 500] [--tpm 300000] [--latency-per-token 0.02]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+from aiohttp import web
+
+from src.common.consts import PROMPT_PER_CATEGORY_DIR
+from src.common.models import CategoryRegistry
+
+CHARS_PER_TOKEN = 2  # 한국어가 섞인 텍스트의 대략적인 토큰당 글자 수
+WINDOW = 60.0  # RPM/TPM을 세는 구간(초)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+class RateLimiter:
+    """최근 WINDOW초 동안의 요청 수와 토큰 수를 세는 sliding window"""
+
+    def __init__(self, rpm: Optional[int], tpm: Optional[int]) -> None:
+        self.rpm = rpm
+        self.tpm = tpm
+        self._events: deque[tuple[float, int]] = deque()  # (시각, 토큰 수)
+        self._num_tokens = 0
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        while self._events and self._events[0][0] <= now - WINDOW:
+            self._num_tokens -= self._events.popleft()[1]
+
+    def _wait_until(self, now: float, excess_tokens: int) -> float:
+        """토큰이 excess_tokens만큼 빠질 때까지의 시간"""
+        freed = 0
+        for t, tokens in self._events:
+            freed += tokens
+            if freed >= excess_tokens:
+                return t + WINDOW - now
+        return WINDOW
+
+    def acquire(self, tokens: int) -> Optional[tuple[str, float, dict]]:
+        """한도 안이면 기록하고 None. 넘으면 (오류 메시지, retry-after, x-ratelimit 헤더)"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            num_requests = len(self._events)
+            headers = {}
+            if self.rpm:
+                headers["x-ratelimit-limit-requests"] = str(self.rpm)
+                headers["x-ratelimit-remaining-requests"] = str(max(self.rpm - num_requests - 1, 0))
+            if self.tpm:
+                headers["x-ratelimit-limit-tokens"] = str(self.tpm)
+                headers["x-ratelimit-remaining-tokens"] = str(max(self.tpm - self._num_tokens - tokens, 0))
+
+            if self.rpm and num_requests + 1 > self.rpm:
+                retry_after = self._events[0][0] + WINDOW - now
+                msg = (
+                    f"Rate limit reached on requests per min (RPM): Limit {self.rpm}, Used {num_requests}, Requested 1."
+                )
+                return f"{msg} Please try again in {retry_after:.3f}s.", retry_after, headers
+            if self.tpm and self._num_tokens + tokens > self.tpm:
+                if tokens > self.tpm:
+                    retry_after = WINDOW
+                else:
+                    retry_after = self._wait_until(now, self._num_tokens + tokens - self.tpm)
+                msg = (
+                    f"Rate limit reached on tokens per min (TPM): Limit {self.tpm}, Used {self._num_tokens}, "
+                    + f"Requested {tokens}."
+                )
+                return f"{msg} Please try again in {retry_after:.3f}s.", retry_after, headers
+
+            self._events.append((now, tokens))
+            self._num_tokens += tokens
+            return None
+
+
+class MockOpenAIServer:
+    def __init__(
+        self,
+        category_dir: Path = PROMPT_PER_CATEGORY_DIR,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        base_latency: float = 0.3,
+        latency_per_token: float = 0.02,
+        jitter: float = 0.2,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.registry = CategoryRegistry(category_dir)
+        self.rate_limiter = RateLimiter(rpm, tpm)
+        self.base_latency = base_latency
+        self.latency_per_token = latency_per_token
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "completion_tokens": 0}
+        self._rng = random.Random(seed)
+
+    def find_category(self, prompt_text: str) -> Optional[dict]:
+        """프롬프트에 평가기준의 title_en이 가장 많이 들어 있는 카테고리"""
+        best, best_count = None, 0
+        for entry in self.registry.entries.values():
+            count = sum(crit_dict["title_en"] in prompt_text for crit_dict in entry.prompt_dict["criteria"])
+            if count > best_count:
+                best, best_count = entry.prompt_dict, count
+        return best
+
+    def make_content(self, prompt_text: str, choice_idx: int, temperature: float, json_mode: bool) -> str:
+        if not json_mode:
+            return "모의 응답입니다."
+        category = self.find_category(prompt_text)
+        if category is None:
+            return "{}"
+        # 같은 프롬프트는 같은 기준 점수를 받고, temperature가 0보다 크면 샘플마다 ±1 정도 흔들림
+        prompt_hash = hashlib.sha256(prompt_text.encode("utf-8")).hexdigest()
+        base_rng = random.Random(f"{self.seed}:{prompt_hash}")
+        sample_rng = random.Random(f"{self.seed}:{prompt_hash}:{choice_idx}:{self._rng.random() if temperature else 0}")
+        content = {}
+        for crit_dict in category["criteria"]:
+            scores = []
+            for sub_crit_dict in crit_dict["sub_criteria"]:
+                low, high = int(sub_crit_dict["scale_min"]), int(sub_crit_dict["scale_max"])
+                score = base_rng.randint(low, high)
+                if temperature and sample_rng.random() < min(temperature, 1.0) / 2:
+                    score += sample_rng.choice([-1, 1])
+                scores.append(min(max(score, low), high))
+            content[crit_dict["title_en"]] = {
+                "score": scores,
+                "description": f"{crit_dict['title_ko']} 모의 평가입니다.",
+            }
+        if "confidence" in prompt_text:
+            content["confidence"] = round(sample_rng.uniform(0.5, 1.0), 2)
+        return json.dumps(content, ensure_ascii=False)
+
+    def get_latency(self, completion_tokens: int) -> float:
+        latency = self.base_latency + self.latency_per_token * completion_tokens
+        return max(latency * (1 + self._rng.uniform(-self.jitter, self.jitter)), 0.0)
+
+    @staticmethod
+    def error_response(status: int, message: str, error_type: str, headers: Optional[dict] = None) -> web.Response:
+        body = {"error": {"message": message, "type": error_type, "param": None, "code": error_type}}
+        return web.json_response(body, status=status, headers=headers)
+
+    async def handle_chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.stats["requests"] += 1
+        messages = body.get("messages") or []
+        prompt_text = "\n".join(str(message.get("content", "")) for message in messages)
+        prompt_tokens = estimate_tokens(prompt_text)
+        n = body.get("n") or 1
+        max_tokens = body.get("max_tokens") or 1024
+
+        if limited := self.rate_limiter.acquire(prompt_tokens + max_tokens * n):
+            message, retry_after, headers = limited
+            self.stats["rate_limited"] += 1
+            headers["retry-after"] = f"{retry_after:.3f}"
+            return self.error_response(429, message, "rate_limit_exceeded", headers)
+        if self._rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return self.error_response(500, "The server had an error while processing your request.", "server_error")
+
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+        temperature = body.get("temperature") or 0.0
+        contents = [self.make_content(prompt_text, idx, temperature, json_mode) for idx in range(n)]
+        completion_tokens = sum(min(estimate_tokens(content), max_tokens) for content in contents)
+        self.stats["completion_tokens"] += completion_tokens
+        model = body.get("model", "mock")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if body.get("stream"):
+            return await self.stream(request, contents, model, completion_id, created)
+
+        await asyncio.sleep(self.get_latency(max(estimate_tokens(content) for content in contents)))
+        return web.json_response(
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": idx, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                    for idx, content in enumerate(contents)
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+        )
+
+    async def stream(
+        self, request: web.Request, contents: list[str], model: str, completion_id: str, created: int
+    ) -> web.StreamResponse:
+        """토큰(CHARS_PER_TOKEN 글자) 단위 chunk를 latency_per_token 간격으로 보냄. 마지막은 data: [DONE]"""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        async def send(choices: list[dict]):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model}
+            await response.write(f"data: {json.dumps({**chunk, 'choices': choices}, ensure_ascii=False)}\n\n".encode())
+
+        await asyncio.sleep(self.base_latency)
+        await send(
+            [{"index": idx, "delta": {"role": "assistant"}, "finish_reason": None} for idx in range(len(contents))]
+        )
+        max_len = max(len(content) for content in contents)
+        for start in range(0, max_len, CHARS_PER_TOKEN):
+            await asyncio.sleep(self.latency_per_token)
+            await send(
+                [
+                    {
+                        "index": idx,
+                        "delta": {"content": content[start : start + CHARS_PER_TOKEN]},
+                        "finish_reason": None,
+                    }
+                    for idx, content in enumerate(contents)
+                    if start < len(content)
+                ]
+            )
+        await send([{"index": idx, "delta": {}, "finish_reason": "stop"} for idx in range(len(contents))])
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        for prefix in ["", "/v1"]:
+            app.router.add_post(f"{prefix}/chat/completions", self.handle_chat)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    def start_background(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """별도 thread의 event loop에서 서버를 시작하고 api_base(ex. http://127.0.0.1:8000/v1)를 반환"""
+        started = threading.Event()
+        result = {}
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            runner = web.AppRunner(self.build_app())
+            loop.run_until_complete(runner.setup())
+            site = web.TCPSite(runner, host, port)
+            loop.run_until_complete(site.start())
+            result["port"] = site._server.sockets[0].getsockname()[1]
+            started.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="mock-openai", daemon=True).start()
+        started.wait()
+        return f"http://{host}:{result['port']}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--rpm", type=int, help="분당 요청 수 한도. 없으면 제한하지 않음")
+    parser.add_argument("--tpm", type=int, help="분당 토큰 수 한도(입력 + max_tokens x n). 없으면 제한하지 않음")
+    parser.add_argument("--base-latency", type=float, default=0.3, help="응답마다 기본으로 걸리는 시간(초)")
+    parser.add_argument("--latency-per-token", type=float, default=0.02, help="출력 토큰당 걸리는 시간(초)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="응답 시간의 변동 비율")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 오류를 낼 확률")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    server = MockOpenAIServer(
+        rpm=args.rpm,
+        tpm=args.tpm,
+        base_latency=args.base_latency,
+        latency_per_token=args.latency_per_token,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    web.run_app(server.build_app(), host=args.host, port=args.port)
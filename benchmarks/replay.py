@@ -0,0 +1,119 @@
+"""기록된 LLM 트래픽으로 채점 경로(run_llm_concurrently)를 오프라인에서 재현하는 벤치마크
+
+먼저 LLM_TRAFFIC_MODE=record로 앱이나 다른 벤치마크를 실행해 db/llm_traffic.jsonl에 요청/응답을 기록한 뒤,
+같은 보고서와 카테고리로 실행하면 OpenAI를 호출하지 않고 기록된 응답과 응답 시간으로 배치를 재생함.
+--rate-limit-rate, --timeout-rate로 429와 timeout을 섞어 router의 재시도/우회를 포함한 지연을 볼 수 있으며,
+같은 --seed면 반복 실행의 결과가 같아야 함(reproducible 항목)
+
+Usage:
+    python -m benchmarks.replay --category <category_id> --input-dir <보고서 폴더> [--repeat 3]
+        [--latency recorded|sampled|none] [--speed 1] [--rate-limit-rate 0.1] [--timeout-rate 0.05]
+        [--output result.json]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.cascade import load_reports
+from src.common.consts import LLM_TRAFFIC_MODE, LLM_TRAFFIC_PATH
+from src.common.models import ReportFile
+from src.processor.generator import run_llm_concurrently
+from src.utils.llm_router import llm_router
+from src.utils.llm_scheduler import llm_scheduler
+from src.utils.llm_traffic import ReplayBackend
+from src.utils.metrics import metrics
+from src.utils.usage_ledger import usage_ledger
+
+
+def digest_results(results: list) -> str:
+    """결과(점수 또는 오류 종류)의 hash. 반복 실행 간 재현 여부 확인용"""
+    payload = [
+        result.__class__.__name__ if isinstance(result, Exception) else result["score_info"] for result in results
+    ]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def run_once(report_files: list[ReportFile], args, batch_id: str) -> dict:
+    backend = ReplayBackend(
+        Path(args.traffic),
+        latency=args.latency,
+        speed=args.speed,
+        rate_limit_rate=args.rate_limit_rate,
+        timeout_rate=args.timeout_rate,
+        retry_after=args.retry_after,
+        strict=args.strict,
+        seed=args.seed,
+    )
+    llm_router.backend = backend.acreate
+    llm_router.reset()
+    llm_scheduler.reset()
+
+    token = metrics.start_batch(batch_id)
+    try:
+        t = time.perf_counter()
+        results = asyncio.run(run_llm_concurrently(report_files, args.category, n=args.n, cascade=args.cascade))
+        elapsed_time = time.perf_counter() - t
+    finally:
+        span_summary = metrics.end_batch(token)
+
+    response_times = [result["response_time"] for result in results if not isinstance(result, Exception)]
+    return {
+        "elapsed_time": elapsed_time,
+        "num_errors": sum(isinstance(result, Exception) for result in results),
+        "latency_p50": float(np.percentile(response_times, 50)) if response_times else None,
+        "latency_p95": float(np.percentile(response_times, 95)) if response_times else None,
+        "replay_stats": backend.get_stats(),
+        "spans": span_summary,
+        "digest": digest_results(results),
+    }
+
+
+def main(args):
+    reports = load_reports(Path(args.input_dir), args.limit)
+    report_files = [ReportFile(name=name, content=content) for name, content in reports.items()]
+    print(f"Loaded {len(report_files)} reports")
+
+    # 재생한 호출이 실제 사용량 장부와 지표에 섞이지 않도록 임시 경로에 기록
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        usage_ledger.path = Path(tmp_dir) / "usage_ledger.sqlite3"
+        metrics.path = Path(tmp_dir) / "metrics.jsonl"
+        runs = [run_once(report_files, args, batch_id=f"replay_{idx}") for idx in range(args.repeat)]
+
+    summary = {
+        "num_reports": len(report_files),
+        "runs": runs,
+        "elapsed_time_mean": float(np.mean([run["elapsed_time"] for run in runs])),
+        "reproducible": len({run["digest"] for run in runs}) == 1,
+    }
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--category", required=True, help="category id(src/prompt/category의 파일명)")
+    parser.add_argument("--input-dir", required=True, help=".txt 또는 허용된 확장자의 보고서 파일들이 있는 폴더")
+    parser.add_argument("--traffic", default=str(LLM_TRAFFIC_PATH), help="기록된 LLM 트래픽 jsonl 경로")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--n", type=int, default=1, help="반복 채점 횟수")
+    parser.add_argument("--cascade", action="store_true", help="단계별 채점으로 실행")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", default="recorded", choices=["recorded", "sampled", "none"])
+    parser.add_argument("--speed", type=float, default=1.0, help="응답 시간을 나눌 배수")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="요청마다 429를 낼 확률")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="요청마다 timeout을 낼 확률")
+    parser.add_argument("--retry-after", type=float, help="주입한 429의 retry-after(초)")
+    parser.add_argument("--strict", action="store_true", help="기록이 없는 요청은 다른 기록으로 대신하지 않고 오류")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과를 저장할 json 경로")
+    if LLM_TRAFFIC_MODE == "record":  # 재생한 응답이 다시 기록되지 않도록
+        parser.error("Unset LLM_TRAFFIC_MODE=record to replay")
+    main(parser.parse_args())
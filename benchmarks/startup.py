@@ -0,0 +1,112 @@
+"""Cold start 벤치마크: 페이지 스크립트가 최상단에서 import하는 모듈들의 import 시간을 `python -X importtime`으로 측정
+
+새 프로세스에서 측정하므로 Streamlit 서버가 처음 세션을 받을 때의 import 비용에 해당함.
+무거운 모듈(HEAVY_MODULES)이 시작 시점에 로드되는지도 함께 기록하며, --baseline을 주면 이전 결과보다
+전체 import 시간이 --threshold 비율 이상 늘었을 때 실패(exit code 1)함
+
+Usage:
+    python -m benchmarks.startup [--script main.py] [--repeat 5] [--output startup.json]
+    python -m benchmarks.startup --baseline startup.json [--threshold 0.2]
+"""
+
+import argparse
+import ast
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 첫 화면에 필요하지 않아 lazy import하는 모듈
+HEAVY_MODULES = ["unstructured", "tiktoken", "pandas", "pyarrow", "googleapiclient"]
+TOP_N = 15
+
+
+def collect_imports(script_path: Path) -> str:
+    """스크립트의 최상단 import 문만 모은 코드"""
+    tree = ast.parse(script_path.read_text(encoding="utf-8"))
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """최상위(다른 모듈 안에서 import되지 않은) 모듈별 cumulative import 시간(us)"""
+    cumulative_dict = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        if name.startswith("  "):  # 들여쓰기는 import 깊이
+            continue
+        cumulative_dict[name.strip()] = int(cumulative_us)
+    return cumulative_dict
+
+
+def measure_once(code: str) -> dict:
+    check_code = f"import json, sys\nprint(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))"
+    t = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"{code}\n{check_code}"], capture_output=True, text=True
+    )
+    wall_time = time.perf_counter() - t
+    if proc.returncode != 0:
+        raise RuntimeError(f"Fail to import modules:\n{proc.stderr[-2000:]}")
+    return {
+        "wall_time": wall_time,
+        "cumulative_dict": parse_importtime(proc.stderr),
+        "heavy_modules_loaded": json.loads(proc.stdout.strip().splitlines()[-1]),
+    }
+
+
+def summarize(runs: list[dict]) -> dict:
+    module_names = set().union(*(run["cumulative_dict"] for run in runs))
+    module_times = {
+        name: float(np.median([run["cumulative_dict"].get(name, 0) for run in runs])) / 1e6 for name in module_names
+    }
+    top_modules = dict(sorted(module_times.items(), key=lambda item: item[1], reverse=True)[:TOP_N])
+    return {
+        "num_runs": len(runs),
+        "import_time": float(np.median([sum(run["cumulative_dict"].values()) for run in runs])) / 1e6,
+        "wall_time": float(np.median([run["wall_time"] for run in runs])),
+        "top_modules": top_modules,
+        "heavy_modules_loaded": runs[-1]["heavy_modules_loaded"],
+    }
+
+
+def compare_baseline(summary: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    limit = baseline["import_time"] * (1 + threshold)
+    if summary["import_time"] > limit:
+        regressions.append(f"import_time {summary['import_time']:.3f}s > {limit:.3f}s (baseline x{1 + threshold})")
+    for name in set(summary["heavy_modules_loaded"]) - set(baseline["heavy_modules_loaded"]):
+        regressions.append(f"{name} is now imported at startup")
+    return regressions
+
+
+def main(args):
+    code = collect_imports(Path(args.script))
+    measure_once(code)  # .pyc 생성 등 첫 실행의 영향을 제외
+    summary = summarize([measure_once(code) for _ in range(args.repeat)])
+    summary["script"] = args.script
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare_baseline(summary, baseline, args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--script", default="main.py", help="측정할 페이지 스크립트")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="결과를 저장할 json 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 json 경로")
+    parser.add_argument("--threshold", type=float, default=0.2, help="허용하는 import 시간 증가 비율")
+    main(parser.parse_args())
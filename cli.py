@@ -0,0 +1,252 @@
+"""브라우저 없이 보고서 폴더나 zip 파일을 채점하는 CLI(밤사이 재채점 등)
+
+main.py와 같은 경로(FileReader로 텍스트 추출 -> Generator로 채점 -> 결과표)를 Streamlit 세션 없이 실행함.
+- 카테고리 정보는 --category-dir의 파일로 만든 CategoryRegistry를 Generator에 직접 넘겨 사용
+- 텍스트 추출은 thread pool에서 병렬로 하고, 채점은 llm_scheduler의 budget 안에서 최대 --concurrency개씩 동시에 실행
+- 재채점 용도이므로 이전 배치의 결과는 재사용하지 않으며, 입력 안에서 내용이 같은 파일만 한 번 채점함
+- 진행 상황은 stderr에 표시하고, 결과는 --output-dir에 XLSX와 Parquet(scores/, contents/)으로 저장
+- 읽지 못했거나 채점하지 못한 파일이 있으면 exit code 1
+
+Usage:
+    python cli.py <보고서 폴더 또는 .zip> --category <category_id> [--n 1] [--cascade]
+        [--concurrency 16] [--tpm 300000] [--workers 8] [--output-dir db/result/cli]
+"""
+
+import argparse
+import asyncio
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import IO
+
+from src.common.consts import (
+    ALLOWED_EXTENSIONS,
+    CONSISTENCY_MAX_SAMPLES,
+    LLM_SCHEDULER_MAX_IN_FLIGHT,
+    MAX_CHAR_LEN_PER_FILE,
+    PROMPT_PER_CATEGORY_DIR,
+    RESULT_DIR,
+)
+from src.common.models import CategoryRegistry, ReportFile, ReportFileList
+from src.processor.dedup import group_by_content_hash
+from src.processor.generator import Generator
+from src.processor.reader import read_report_files_concurrently
+from src.processor.result import ResultTableBuilder, get_result_layout
+from src.utils.event_loop import background_loop
+from src.utils.export import write_result_xlsx
+from src.utils.io import get_current_datetime, get_suffix, make_unique_id, unzip_as_dict
+from src.utils.llm import compute_result_cost
+from src.utils.llm_scheduler import llm_scheduler
+from src.utils.metrics import metrics
+
+
+class Progress:
+    """stderr 한 줄에 진행 상황을 덮어써서 표시. 여러 thread에서 update할 수 있음"""
+
+    def __init__(self, label: str, total: int) -> None:
+        self.label = label
+        self.total = total
+        self.num_done = 0
+        self.num_errors = 0
+        self._t = time.perf_counter()
+        self._lock = threading.Lock()
+        self._print()
+
+    def _print(self) -> None:
+        msg = f"\r{self.label} {self.num_done}/{self.total}"
+        if self.num_errors:
+            msg += f" (오류 {self.num_errors})"
+        sys.stderr.write(f"{msg} {time.perf_counter() - self._t:.0f}s")
+        if self.num_done == self.total:
+            sys.stderr.write("\n")
+        sys.stderr.flush()
+
+    def update(self, ok: bool = True) -> None:
+        with self._lock:
+            self.num_done += 1
+            self.num_errors += not ok
+            self._print()
+
+
+def collect_files(input_path: Path) -> tuple[dict[str, IO[bytes]], list[str]]:
+    """(채점할 파일 이름 -> 파일 객체, 지원하지 않아 건너뛴 파일 이름). 폴더는 하위 폴더까지 찾음"""
+    if input_path.is_dir():
+        files_dict = {
+            path.relative_to(input_path).as_posix(): io.BytesIO(path.read_bytes())
+            for path in sorted(input_path.rglob("*"))
+            if path.is_file()
+        }
+    elif get_suffix(input_path) == ".zip":
+        files_dict = unzip_as_dict(str(input_path), return_as_file=True)
+        if files_dict is None:
+            raise ValueError(f"{input_path} is not a valid zip file")
+    else:
+        files_dict = {input_path.name: io.BytesIO(input_path.read_bytes())}
+    skipped = [name for name in files_dict if get_suffix(name) not in ALLOWED_EXTENSIONS]
+    return {name: file for name, file in files_dict.items() if name not in skipped}, skipped
+
+
+async def grade(report_files: list[ReportFile], generator: Generator, category_id: str, args) -> list:
+    agenerate = generator.agenerate_cascade if args.cascade else generator.agenerate
+    semaphore = asyncio.Semaphore(args.concurrency)
+    progress = Progress("채점", len(report_files))
+
+    async def run(report_file: ReportFile):
+        async with semaphore:
+            try:
+                result = await agenerate(category=category_id, input_text=report_file.content, n=args.n)
+            except Exception as e:
+                progress.update(ok=False)
+                return e
+        progress.update()
+        return result
+
+    return await asyncio.gather(*[run(report_file) for report_file in report_files])
+
+
+def build_result_table(
+    input_file_list: ReportFileList, report_file_groups: dict, result_dict: dict, stu_id_dict: dict, layout, n: int
+) -> tuple[ResultTableBuilder, list[str], list]:
+    """(결과표, 행별 content hash, 행별 토큰 사용량). 내용이 같은 파일은 대표 파일의 결과를 사용"""
+    result_table = ResultTableBuilder(layout, num_rows=len(input_file_list), with_dispersion=n > 1)
+    row_idx_dict = {report_file.name: idx for idx, report_file in enumerate(input_file_list)}
+    row_content_hashes = [None] * len(input_file_list)
+    row_token_usages = [None] * len(input_file_list)
+    for content_hash, report_files in report_file_groups.items():
+        result = result_dict[content_hash]
+        for dup_idx, report_file in enumerate(report_files):
+            row = {
+                "STU ID": stu_id_dict[report_file.name],
+                "원문파일명": report_file.name,
+                "원문 내용": report_file.content,
+            }
+            notes = []
+            if isinstance(result, Exception):
+                notes.append(f"{result.__class__.__name__}: {result}")
+            else:
+                row.update(result["score_info"])
+                row.update({"사용 모델명": result["model_name"], "채점 단계": result.get("tier", "")})
+                if result.get("escalation_reason"):
+                    notes.append(f"escalated: {result['escalation_reason']}")
+            if dup_idx > 0:
+                notes.append(f"duplicate of {stu_id_dict[report_files[0].name]} ({report_files[0].name})")
+            row["비고"] = "; ".join(notes)
+
+            row_idx = row_idx_dict[report_file.name]
+            result_table.set_row(row_idx, row)
+            row_content_hashes[row_idx] = content_hash
+            if dup_idx == 0 and not isinstance(result, Exception):
+                row_token_usages[row_idx] = result["token_usage"]
+    return result_table, row_content_hashes, row_token_usages
+
+
+def main(args) -> int:
+    registry = CategoryRegistry(args.category_dir)
+    if args.category not in registry.entries:
+        print(f"Unknown category: {args.category}. Available: {', '.join(registry.entries)}", file=sys.stderr)
+        return 2
+    batch_id = f"cli_{get_current_datetime(format='%y%m%d_%H%M%S')}_{make_unique_id()[:8]}"
+    metrics_token = metrics.start_batch(batch_id)
+    try:
+        # Read
+        files_dict, skipped = collect_files(Path(args.input))
+        for name in skipped:
+            print(f"Skip the unsupported file: {name}", file=sys.stderr)
+        if not files_dict:
+            print("No report file to grade", file=sys.stderr)
+            return 1
+        progress = Progress("읽기", len(files_dict))
+        input_file_dict = read_report_files_concurrently(
+            files_dict.values(),
+            files_dict.keys(),
+            max_workers=args.workers,
+            callback=lambda name, result: progress.update(ok=not isinstance(result, str)),
+        )
+        input_file_list = ReportFileList()
+        num_read_errors = 0
+        for name in files_dict:  # 입력 순서 유지
+            report_file = input_file_dict[name]
+            if isinstance(report_file, str):
+                print(f"Fail to read '{name}': {report_file}", file=sys.stderr)
+                num_read_errors += 1
+                continue
+            if len(report_file.content) > MAX_CHAR_LEN_PER_FILE:
+                print(f"Use only the first {MAX_CHAR_LEN_PER_FILE} chars of '{name}'", file=sys.stderr)
+                report_file.content = report_file.content[:MAX_CHAR_LEN_PER_FILE]
+            input_file_list.append(report_file)
+        if not input_file_list:
+            return 1
+
+        # Grade
+        report_file_groups = group_by_content_hash(input_file_list)
+        if args.tpm is not None:
+            llm_scheduler.tokens_per_minute = args.tpm
+            llm_scheduler.reset()
+        generator = Generator(registry)
+        t = time.perf_counter()
+        with llm_scheduler.flow(batch_id):
+            results = background_loop.run(
+                grade([report_files[0] for report_files in report_file_groups.values()], generator, args.category, args)
+            )
+        llm_elapsed_time = time.perf_counter() - t
+        result_dict = dict(zip(report_file_groups.keys(), results))
+
+        # Save
+        stu_id_dict = {
+            report_file.name: f"{batch_id}_{idx}" for idx, report_file in enumerate(input_file_list, start=1)
+        }
+        layout = get_result_layout(args.category, registry)
+        result_table, row_content_hashes, row_token_usages = build_result_table(
+            input_file_list, report_file_groups, result_dict, stu_id_dict, layout, args.n
+        )
+        output_dir = Path(args.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        xlsx_path = output_dir / f"report_{batch_id}.xlsx"
+        with metrics.span("xlsx_build"), xlsx_path.open("xb") as f:
+            write_result_xlsx(result_table.columns, result_table.iter_rows(), fh=f)
+
+        from src.utils.warehouse import ResultWarehouse  # pyarrow import가 무거우므로 저장할 때 import
+
+        score_path = ResultWarehouse(output_dir / "scores", output_dir / "contents").append(
+            batch_id=batch_id,
+            category_id=args.category,
+            category_version=registry.get(args.category).version,
+            result_table=result_table,
+            content_hashes=row_content_hashes,
+            token_usages=row_token_usages,
+        )
+
+        num_grade_errors = sum(
+            len(report_file_groups[content_hash])
+            for content_hash, result in result_dict.items()
+            if isinstance(result, Exception)
+        )
+        cost = sum(compute_result_cost(result) for result in results if not isinstance(result, Exception))
+        print(
+            f"Graded {len(input_file_list) - num_grade_errors}/{len(files_dict)} files "
+            + f"({len(report_file_groups)} LLM targets, {llm_elapsed_time:.1f}s, ${cost:.3f})",
+            file=sys.stderr,
+        )
+        print(xlsx_path)
+        print(score_path)
+        return 1 if num_read_errors or num_grade_errors else 0
+    finally:
+        metrics.end_batch(metrics_token)  # 중간에 끝나거나 예외가 나도 배치 요약을 남김
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="보고서 폴더, .zip 또는 보고서 파일")
+    parser.add_argument("--category", required=True, help="역량(category) id")
+    parser.add_argument("--category-dir", default=PROMPT_PER_CATEGORY_DIR, help="카테고리 .toml 파일 폴더")
+    parser.add_argument(
+        "--n", type=int, default=1, choices=range(1, CONSISTENCY_MAX_SAMPLES + 1), help="반복 채점 횟수"
+    )
+    parser.add_argument("--cascade", action="store_true", help="싼 모델로 먼저 채점하는 단계별 채점")
+    parser.add_argument("--concurrency", type=int, default=LLM_SCHEDULER_MAX_IN_FLIGHT, help="동시에 채점할 보고서 수")
+    parser.add_argument("--tpm", type=int, help="LLM 분당 토큰 budget. 주지 않으면 기본값 사용")
+    parser.add_argument("--workers", type=int, help="텍스트 추출 thread 수")
+    parser.add_argument("--output-dir", default=RESULT_DIR / "cli", help="XLSX와 Parquet을 저장할 폴더")
+    sys.exit(main(parser.parse_args()))
@@ -1,72 +1,93 @@
-import asyncio
-import subprocess
-import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from io import BytesIO
+import time
+from collections import Counter
+from concurrent.futures import Future
 from pathlib import Path
 
-import pandas as pd
 import streamlit as st
 
 from src import logger
-from src.common.consts import ALLOWED_EXTENSIONS, ALLOWED_EXTENSIONS_WITH_ZIP, MAX_CHAR_LEN_PER_FILE, OUTPUT_DTYPE_DICT
-from src.common.models import ReportFile, ReportFileList, reset_all_category_info
-from src.processor.generator import Generator
-from src.processor.reader import FileReader
-from src.utils.google_drive import GD_DOCS_FILE_URL, GD_RESULT_FOLDER_ID, GoogleDriveHelper
-from src.utils.io import excel_col_index_to_name, get_current_datetime, get_suffix, unzip_as_dict
-
-
-def install_requirements():
-    """google_drive에서 pycrypt라이브러리 내 sytax error로 인해 발생하는 문제 해결을 위해 pycrypt 삭제
-    직접적으로 설치되지 않으나 streamlit 자체에서 설치되는듯.
-    현재 관리되지 않는 pycrypt 대신 pycryptodome~=3.20.0를 설치하여 사용"""
-    try:
-        # Uninstall pycrypt if it exists
-        subprocess.run([sys.executable, "-m", "pip", "uninstall", "-y", "pycrypt"], check=True)
-        logger.info("pycrypt uninstalled.")
-    except subprocess.CalledProcessError:
-        logger.info("pycrypt not installed, skipping uninstall.")
-
+from src.common.consts import (
+    ALLOWED_EXTENSIONS,
+    ALLOWED_EXTENSIONS_WITH_ZIP,
+    CASCADE_TIER_CHEAP,
+    CASCADE_TIER_STRONG,
+    CONSISTENCY_MAX_SAMPLES,
+    GD_UPLOAD_POLL_INTERVAL,
+    LLM_SCHEDULER_INTERACTIVE_MAX_FILES,
+    LLM_SCHEDULER_INTERACTIVE_WEIGHT,
+    MAX_CHAR_LEN_PER_FILE,
+    METRICS_PORT,
+    RESULT_XLSX_DIR,
+    RESULT_XLSX_MAX_AGE,
+)
+from src.common.models import ReportFileList, get_category_registry, reset_all_category_info
+from src.processor.dedup import ContentHashIndex, group_by_content_hash
+from src.processor.generator import run_llm_concurrently
+from src.processor.near_dup import NearDuplicateIndex
+from src.processor.reader import read_report_files_concurrently
+from src.processor.result import ResultTableBuilder, get_result_layout
+from src.utils.event_loop import background_loop
+from src.utils.export import write_result_xlsx
+from src.utils.io import get_current_datetime, get_suffix, make_unique_id, remove_old_files_in_dir, unzip_as_dict
+from src.utils.llm import compute_cost, compute_result_cost, get_model_info
+from src.utils.llm_scheduler import llm_scheduler
+from src.utils.metrics import metrics, start_metrics_server
+from src.utils.prompt_sync import prompt_syncer
+from src.utils.startup import install_requirements, warmup
+from src.utils.storage import get_docs_file_url
+from src.utils.uploader import background_uploader
 
 install_requirements()
 
-gd_helper = GoogleDriveHelper(GD_RESULT_FOLDER_ID)
 
+# 공유 registry에서 카테고리 정보를 가져옴. 바뀐 파일(백그라운드 prompt 동기화, Admin 저장 등)만 다시 읽음
+reset_all_category_info()
 
-if "category_id_to_name_ko_dict" not in st.session_state:
-    reset_all_category_info()
 
+@st.cache_resource
+def get_content_hash_index() -> ContentHashIndex:
+    return ContentHashIndex()
 
-def read_report_file(file, name=None) -> ReportFile | str:
-    try:
-        name = file.name if name is None else name
-        extension = get_suffix(name)
-        file_reader = FileReader(file=file, filetype=extension, clean=True)
-        return ReportFile(name=name, content=file_reader.text)
-    except Exception as e:
-        return f"{e.__class__.__name__}: {str(e)}"
+
+@st.cache_resource
+def get_near_dup_index() -> NearDuplicateIndex:
+    return NearDuplicateIndex()
 
 
-def read_report_files_concurrently(files, names) -> dict[str, ReportFile | str]:
-    report_files_dict = {}
-    with ThreadPoolExecutor() as executor:
-        future_to_name = {executor.submit(read_report_file, file, name): name for file, name in zip(files, names)}
-        for future in as_completed(future_to_name):
-            name = future_to_name[future]
-            result = future.result()  # 여기서 발생하는 예외는 read_report_file 함수 내에서 이미 처리됨
-            report_files_dict[name] = result
-    return report_files_dict
+def report_consistency_cost(results: list, n: int, elapsed_time: float):
+    """반복 채점의 비용과 소요 시간을 n번 따로 채점했을 경우의 추정치와 비교하여 표시
 
+    따로 채점하면 입력 토큰을 n번 과금하고, 배치 전체를 n번 다시 실행하므로 시간도 n배가 걸린다고 봄
+    """
+    cost, independent_cost = 0.0, 0.0
+    for result in results:
+        if isinstance(result, Exception):
+            continue
+        usage = result["token_usage"]
+        cost += compute_cost(result["model_name"], usage["prompt_tokens"], usage["completion_tokens"])
+        # n을 지원하지 않는 모델은 이미 따로 호출했으므로 token_usage에 호출 횟수만큼의 입력 토큰이 합산되어 있음
+        independent_prompt_tokens = usage["prompt_tokens"]
+        if get_model_info(result["model_name"]).get("supports_n", False):
+            independent_prompt_tokens *= result["num_samples"]
+        independent_cost += compute_cost(result["model_name"], independent_prompt_tokens, usage["completion_tokens"])
+    msg = (
+        f"반복 채점(n={n}): 비용 ${cost:.3f}, 소요 시간 {elapsed_time:.1f}초 "
+        + f"(따로 {n}번 채점시 추정: 비용 ${independent_cost:.3f}, 소요 시간 {elapsed_time * n:.1f}초)"
+    )
+    st.write(msg)
+    logger.info(msg)
 
-async def run_llm_concurrently(report_file_list, category_id):
-    generator = Generator()
 
-    tasks = []
-    for report_file in report_file_list:
-        tasks.append(generator.agenerate(category=category_id, input_text=report_file.content))
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    return results
+def report_cascade_result(results: list):
+    """단계별 채점에서 단계별 보고서 수와 비용을 표시"""
+    tier_counter = Counter(result["tier"] for result in results if not isinstance(result, Exception))
+    cost = sum(compute_result_cost(result) for result in results if not isinstance(result, Exception))
+    msg = (
+        f"단계별 채점: 저렴한 모델 {tier_counter[CASCADE_TIER_CHEAP]}개, "
+        + f"상위 모델 재채점 {tier_counter[CASCADE_TIER_STRONG]}개, 비용 ${cost:.3f}"
+    )
+    st.write(msg)
+    logger.info(msg)
 
 
 def raise_error(msg="Error", e=Exception):
@@ -75,6 +96,39 @@ def raise_error(msg="Error", e=Exception):
     logger.error(msg)
 
 
+def show_result_files(filename: str, xlsx_path: Path, upload_future: Future):
+    """결과 파일 다운로드 버튼과 Google Drive 업로드 상태
+
+    업로드가 끝나 앱이 다시 실행되어도 표시되도록 session_state["result_files"]에 넣어둔 값으로 호출함
+    """
+    # st.download_button("결과 다운받기", result_csv_bytes, filename, "text/csv", key="download-csv")
+    if not xlsx_path.is_file():  # RESULT_XLSX_MAX_AGE가 지나 지워진 경우
+        st.info("결과 파일의 보관 기간이 지났습니다. Google Drive에서 확인해주세요.")
+    else:
+        with xlsx_path.open("rb") as f:
+            st.download_button(
+                "결과 파일로 다운받기",
+                f,
+                filename,
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key="download-xlsx",
+            )
+    if not upload_future.done():
+        poll_upload_status(upload_future)
+    elif (e := upload_future.exception()) is not None:  # 오류 로그는 업로드 thread에서 한 번만 남김
+        st.error(f"Cannot upload result to google drive: {e.__class__.__name__}: {e}")
+    else:
+        st.link_button("결과 Google drive에서 확인하기", url=upload_future.result()["webViewLink"])
+
+
+@st.fragment(run_every=GD_UPLOAD_POLL_INTERVAL)
+def poll_upload_status(upload_future: Future):
+    """업로드 중일 때만 사용. 끝나면 앱 전체를 다시 실행하여 주기적인 실행을 멈추고 최종 상태를 표시"""
+    if upload_future.done():
+        st.rerun()
+    st.caption("결과를 Google Drive에 업로드하고 있습니다...")
+
+
 # https://docs.streamlit.io/library/api-reference/utilities/st.set_page_config
 st.set_page_config(
     page_title="AI 기반 미래역량 평가 도구", page_icon="🧊", layout="centered", initial_sidebar_state="auto"  # "wide",
@@ -103,11 +157,14 @@ st.write(
 )
 
 with st.form("input"):
-    st.markdown(f"역량 [ℹ️]({GD_DOCS_FILE_URL})", unsafe_allow_html=True)
+    docs_file_url = get_docs_file_url(resolve=False)
+    st.markdown(f"역량 [ℹ️]({docs_file_url})" if docs_file_url else "역량", unsafe_allow_html=True)
+    # format_func는 스크립트 밖(AppTest 등)에서도 호출될 수 있으므로 session_state 대신 dict를 직접 참조
+    category_id_to_name_ko_dict = st.session_state["category_id_to_name_ko_dict"]
     category_id_selected = st.selectbox(
         "역량",
-        options=tuple(st.session_state["category_id_to_name_ko_dict"].keys()),
-        format_func=lambda x: st.session_state["category_id_to_name_ko_dict"][x],
+        options=tuple(category_id_to_name_ko_dict.keys()),
+        format_func=lambda x: category_id_to_name_ko_dict[x],
         label_visibility="collapsed",
         # index=None,
         # placeholder="Select contact method...",
@@ -125,152 +182,277 @@ with st.form("input"):
     #         await f.write(content)
     #         logger.info(f"File uploaded to {src_path}")
 
+    reuse_near_dup_score = st.checkbox(
+        "유사 문서는 새로 평가하지 않고 기존 점수 사용(검토용)",
+        value=False,
+        help="이전에 평가된 문서나 이번에 함께 올린 문서와 내용이 거의 같은 경우, 해당 문서의 점수를 그대로 사용합니다.",
+    )
+
+    num_samples = st.number_input(
+        "반복 채점 횟수(일관성 평가용)",
+        min_value=1,
+        max_value=CONSISTENCY_MAX_SAMPLES,
+        value=1,
+        help="2 이상이면 보고서마다 여러 번 채점하여 세부 점수별 중앙값과 표준편차(_std 칼럼)를 결과에 포함합니다.",
+    )
+
+    use_cascade = st.checkbox(
+        "단계별 채점(비용 절감)",
+        value=False,
+        help="저렴한 모델로 먼저 채점하고, 점수가 불안정하거나 형식이 맞지 않는 보고서만 상위 모델로 다시 채점합니다. "
+        + "결과의 '채점 단계' 칼럼에 최종 점수를 낸 단계가 표시됩니다.",
+    )
+
     submitted = st.form_submit_button("평가하기")
 
+# 첫 화면을 그린 뒤 저장소의 prompt 파일 동기화와 무거운 모듈 로드를 백그라운드로 시작(프로세스당 1회)
+prompt_syncer.start_background()
+warmup.start_background()
+if METRICS_PORT:
+    start_metrics_server(int(METRICS_PORT))
 
 if submitted:
     if not upload_files:
         st.error("1개 이상의 파일을 첨부해주세요.")
         st.stop()
     logger.info(f"File uploaded: {[file.name for file in upload_files]}")
+    # 같은 초에 제출한 다른 세션과 STU ID, 결과 파일 이름이 겹치지 않도록 id를 덧붙임
+    stu_id_base = f"{get_current_datetime(format='%y%m%d_%H%M%S')}_{make_unique_id()[:8]}"
+    metrics_token = metrics.start_batch(stu_id_base)  # 이후 단계별 소요 시간을 배치 단위로 모음
+    try:
+        with st.spinner("파일을 읽고 있습니다..."):
+            files_dict = dict()
+            for upload_file in upload_files:
+                suffix = get_suffix(upload_file.name)
+                if suffix == ".zip":
+                    with metrics.span("unzip"):
+                        _files_dict = unzip_as_dict(upload_file, return_as_file=True)
+                    for filename, file in _files_dict.items():
+                        if (ext := get_suffix(filename)) not in ALLOWED_EXTENSIONS:
+                            raise_error(f"The {upload_file.name} file include unsupported file type: {ext}")
+
+                    files_dict.update(_files_dict)
 
-    with st.spinner("파일을 읽고 있습니다..."):
-        files_dict = dict()
-        for upload_file in upload_files:
-            suffix = get_suffix(upload_file.name)
-            if suffix == ".zip":
-                _files_dict = unzip_as_dict(upload_file, return_as_file=True)
-                for filename, file in _files_dict.items():
-                    if (ext := get_suffix(filename)) not in ALLOWED_EXTENSIONS:
-                        raise_error(f"The {upload_file.name} file include unsupported file type: {ext}")
-
-                files_dict.update(_files_dict)
-
-            else:
-                files_dict[upload_file.name] = upload_file
-
-        input_file_dict = read_report_files_concurrently(files_dict.values(), files_dict.keys())
-        error_dict = {filename: v for filename, v in input_file_dict.items() if isinstance(v, str)}
-        if error_dict:
-            for filename, error_msg in error_dict.items():
-                error_msg = f"'{filename}'을 읽는 도중 오류({error_msg})가 발생했습니다."
-                if Path(filename).suffix == ".hwp":
-                    error_msg += " pdf나 word 파일로 변환하여 사용하십시오"
-                st.error(error_msg)
-            st.stop()
-
-        input_file_list = ReportFileList([v for v in input_file_dict.values()])
-        for file in input_file_list:
-            if len(file.content) > MAX_CHAR_LEN_PER_FILE:
-                st.warning(
-                    f"Since the '{file.name}' file is too long"
-                    + f"({len(file.content)} chars), "
-                    + f"only the content up to {MAX_CHAR_LEN_PER_FILE} will be used for processing."
+                else:
+                    files_dict[upload_file.name] = upload_file
+
+            input_file_dict = read_report_files_concurrently(files_dict.values(), files_dict.keys())
+            error_dict = {filename: v for filename, v in input_file_dict.items() if isinstance(v, str)}
+            if error_dict:
+                for filename, error_msg in error_dict.items():
+                    error_msg = f"'{filename}'을 읽는 도중 오류({error_msg})가 발생했습니다."
+                    if Path(filename).suffix == ".hwp":
+                        error_msg += " pdf나 word 파일로 변환하여 사용하십시오"
+                    st.error(error_msg)
+                st.stop()
+
+            input_file_list = ReportFileList([v for v in input_file_dict.values()])
+            for file in input_file_list:
+                if len(file.content) > MAX_CHAR_LEN_PER_FILE:
+                    st.warning(
+                        f"Since the '{file.name}' file is too long"
+                        + f"({len(file.content)} chars), "
+                        + f"only the content up to {MAX_CHAR_LEN_PER_FILE} will be used for processing."
+                    )
+                    file.content = file.content[:MAX_CHAR_LEN_PER_FILE]
+            st.write(f"총 {len(input_file_list)}개 파일을 읽었습니다.")
+            logger.info(f"File loaded: {[file.name for file in input_file_list]}")
+
+        with st.spinner("평가중입니다... 약 1~2분 소요됩니다."):
+            stu_id_dict = {
+                report_file.name: f"{stu_id_base}_{idx}" for idx, report_file in enumerate(input_file_list, start=1)
+            }
+
+            # 동일한 내용의 파일은 한 번만 채점: 이번 배치 내 중복은 대표 파일 결과를, 이전 배치와의 중복은 저장된 결과를 사용
+            content_hash_index = get_content_hash_index()
+            report_file_groups = group_by_content_hash(input_file_list)
+
+            # 내용이 거의 같은 파일(near-duplicate)은 이전 배치 및 이번 배치 내 앞선 파일과 비교하여 표시
+            # 인덱스에는 채점 결과를 저장할 때 함께 추가하므로, 채점되지 않은 파일은 다음 배치에서 비교 대상이 아님
+            near_dup_index = get_near_dup_index()
+            near_dup_dict = {}  # content_hash -> (content_hash of the most similar report, similarity)
+            signature_dict = {}  # content_hash -> signature. 이번 배치의 앞선 파일들
+            for content_hash, report_files in report_file_groups.items():
+                signature = near_dup_index.minhasher.signature(report_files[0].content)
+                matches = near_dup_index.query(signature, exclude=content_hash)
+                matches += near_dup_index.compare(signature, signature_dict)
+                if matches:
+                    near_dup_dict[content_hash] = max(matches, key=lambda match: match[1])
+                signature_dict[content_hash] = signature
+
+            # 평가기준 파일이 바뀌었으면(Admin 저장 등) 이전 version으로 채점한 결과는 사용하지 않음
+            category_version = get_category_registry().get(category_id_selected).version
+            result_dict = {}  # content_hash -> result
+            llm_target_dict = {}  # content_hash -> ReportFile
+            reuse_from_dict = {}  # content_hash -> content_hash of the near-duplicate in this batch to reuse the result
+            for content_hash, report_files in report_file_groups.items():
+                # 반복 채점시에는 점수의 분산도 필요하므로 기존 결과를 사용하지 않음
+                cached_result = (
+                    content_hash_index.get_result(content_hash, category_id_selected, category_version)
+                    if num_samples == 1
+                    else None
                 )
-                file.content = file.content[:MAX_CHAR_LEN_PER_FILE]
-        st.write(f"총 {len(input_file_list)}개 파일을 읽었습니다.")
-        logger.info(f"File loaded: {[file.name for file in input_file_list]}")
-
-    with st.spinner("평가중입니다... 약 1~2분 소요됩니다."):
-        # Run LLM
-        logger.info("Start to run LLM...")
-        results = asyncio.run(run_llm_concurrently(report_file_list=input_file_list, category_id=category_id_selected))
-        assert len(results) == len(input_file_list)
-
-        stu_id_base = get_current_datetime(format="%y%m%d_%H%M%S")
-        total_results = []
-        for idx, (report_file, result) in enumerate(zip(input_file_list, results), start=1):
-            _result = {"STU ID": f"{stu_id_base}_{idx}", "비고": ""}
-            if isinstance(result, Exception):
-                if len(input_file_list) == 1:
-                    raise_error("Error raise", result)
-                    st.stop()
+                if cached_result is not None:
+                    result_dict[content_hash] = cached_result
+                elif reuse_near_dup_score and content_hash in near_dup_dict:
+                    similar_hash, _ = near_dup_dict[content_hash]
+                    similar_result = content_hash_index.get_result(similar_hash, category_id_selected, category_version)
+                    if similar_result is not None and num_samples == 1:
+                        result_dict[content_hash] = similar_result
+                    elif similar_hash in report_file_groups:
+                        reuse_from_dict[content_hash] = similar_hash
+                    else:
+                        llm_target_dict[content_hash] = report_files[0]
                 else:
-                    _result["비고"] = result
-            else:
-                _result.update(result["score_info"])
-                _result.update({"사용 모델명": result["model_name"]})
-            _result.update({"원문파일명": report_file.name, "원문 내용": report_file.content})
-
-            total_results.append(_result)
-
-        # 모든 결과에 일부 키값이 없는 경우가 있을 수 있기에, 구조 맞춰주기 위해 빈 데이터프레임을 먼저 생성
-        # Should sync with serialize_score_info in agenerate
-        criteria_dict = st.session_state["prompt_per_category_dict"][category_id_selected]
-        output_dtype_dict = OUTPUT_DTYPE_DICT[0].copy()
-        for crit_dict in criteria_dict["criteria"]:
-            prefix = crit_dict["title_en"].lower()
-            output_dtype_dict.update(
-                {f"{prefix}_{sub_idx+1}": "Int64" for sub_idx in range(len(crit_dict["sub_criteria"]))}
+                    llm_target_dict[content_hash] = report_files[0]
+            num_skipped = len(input_file_list) - len(llm_target_dict)
+            if num_skipped:
+                st.write(f"내용이 중복되거나 유사한 {num_skipped}개 파일은 기존 채점 결과를 사용합니다.")
+                logger.info(f"Skip LLM for {num_skipped} duplicated files")
+
+            # Run LLM
+            logger.info("Start to run LLM...")
+            t = time.perf_counter()
+            # 다른 세션과 LLM budget을 나눠 쓰며, 파일이 적은 채점은 weight를 높여 대량 채점 뒤에 오래 밀리지 않게 함
+            if "llm_flow_id" not in st.session_state:
+                st.session_state["llm_flow_id"] = make_unique_id()[:8]
+            llm_flow_weight = (
+                LLM_SCHEDULER_INTERACTIVE_WEIGHT if len(llm_target_dict) <= LLM_SCHEDULER_INTERACTIVE_MAX_FILES else 1
             )
-            output_dtype_dict[f"{prefix}_total"] = "Int64"
-        output_dtype_dict.update({"Total": "Int64"})
-        output_dtype_dict.update(
-            {f"{crit_dict['title_en'].lower()}_descript": "str" for crit_dict in criteria_dict["criteria"]}
-        )
-        output_dtype_dict.update(OUTPUT_DTYPE_DICT[1].copy())
-
-        result_df = pd.DataFrame(columns=output_dtype_dict.keys())
-        new_df = pd.DataFrame(total_results)
-        result_df = pd.concat([result_df, new_df], ignore_index=True)
-        output_str_columns = [colname for colname, t in output_dtype_dict.items() if t == "str"]
-        result_df.loc[:, output_str_columns] = result_df[output_str_columns].fillna("")
-        result_df = result_df.astype(output_dtype_dict)
-
-    with st.spinner("결과를 구글드라이브에 업로드하고 있습니다..."):
-        # encoding = "utf-8-sig"
-        # filename = f"report_{stu_id_base}.csv"
-        # result_csv_bytes = result_df.to_csv(index=False).encode(encoding)
-        filename = f"report_{stu_id_base}.xlsx"
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            result_df.to_excel(writer, index=False)
-
-            workbook = writer.book
-            worksheet = writer.sheets["Sheet1"]
-
-            # 칼럼 너비 설정
-            cell_format = {}  # workbook.add_format({"text_wrap": True})
-            col_span_name = f"{excel_col_index_to_name(0)}:{excel_col_index_to_name(0)}"
-            worksheet.set_column(col_span_name, 15, cell_format)
-            long_width_col_idxs = [
-                idx
-                for idx, key_name in enumerate(output_dtype_dict.keys())
-                if "_descript" in key_name or key_name == "원문 내용"
-            ]
-            for idx in long_width_col_idxs:
-                col_span_name = f"{excel_col_index_to_name(idx)}:{excel_col_index_to_name(idx)}"
-                worksheet.set_column(col_span_name, 40, cell_format)
-
-            # 모든 행의 높이 설정
-            row_height = 100  # 원하는 행 높이
-            cell_format = workbook.add_format({"text_wrap": True, "valign": "top"})  # 상단 정렬
-            for row in range(len(result_df)):
-                worksheet.set_row(row + 1, row_height, cell_format)  # 헤더 행 제외 나머지
-
-        result_xlsx_bytes = output.getvalue()
-
-        # Save to google drive
-        try:
-            # folder = gd_helper.create_folder(stu_id_base)
-            file = gd_helper.upload_byte_obj(filename, result_xlsx_bytes)  # , folder_id=folder["id"])
-
-        except Exception as e:
-            raise_error("Cannot upload result to google drive", e)
-        else:
-            st.link_button("결과 Google drive에서 확인하기", url=file["webViewLink"])
-
-        # 다운로드 버튼 추가
-        # st.download_button("결과 다운받기", result_csv_bytes, filename, "text/csv", key="download-csv")
-        st.download_button(
-            "결과 파일로 다운받기",
-            result_xlsx_bytes,
-            filename,
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            key="download-xlsx",
-        )
-
-        st.success("평가가 완료되었습니다. 결과를 확인해주세요.")
+            with llm_scheduler.flow(st.session_state["llm_flow_id"], weight=llm_flow_weight):
+                results = background_loop.run(
+                    run_llm_concurrently(
+                        report_file_list=llm_target_dict.values(),
+                        category_id=category_id_selected,
+                        n=num_samples,
+                        cascade=use_cascade,
+                    )
+                )
+            llm_elapsed_time = time.perf_counter() - t
+            assert len(results) == len(llm_target_dict)
+            if num_samples > 1:
+                report_consistency_cost(results, num_samples, llm_elapsed_time)
+            if use_cascade:
+                report_cascade_result(results)
+            result_dict.update(zip(llm_target_dict.keys(), results))
+            # 입력 순서대로 처리되므로 앞선 결과가 먼저 채워짐
+            for content_hash, similar_hash in reuse_from_dict.items():
+                result_dict[content_hash] = result_dict[similar_hash]
+
+            def get_report_ref(content_hash: str) -> str:
+                if content_hash in report_file_groups:
+                    report_file = report_file_groups[content_hash][0]
+                    return f"{stu_id_dict[report_file.name]} ({report_file.name})"
+                history = content_hash_index.get(content_hash)
+                return f"{history['stu_id']} ({history['name']})" if history else content_hash[:12]
+
+            t = time.perf_counter()
+            result_layout = get_result_layout(category_id_selected)
+            result_table = ResultTableBuilder(
+                result_layout, num_rows=len(input_file_list), with_dispersion=num_samples > 1
+            )
+            row_idx_dict = {report_file.name: idx for idx, report_file in enumerate(input_file_list)}
+            row_content_hashes = [None] * len(input_file_list)
+            row_token_usages = [None] * len(input_file_list)  # LLM을 호출한 행만 토큰 사용량을 기록
+            for content_hash, report_files in report_file_groups.items():
+                result = result_dict[content_hash]
+                history = content_hash_index.get(content_hash)
+                for dup_idx, report_file in enumerate(report_files):
+                    _result = {"STU ID": stu_id_dict[report_file.name], "비고": ""}
+                    notes = []
+                    if isinstance(result, Exception):
+                        if len(input_file_list) == 1:
+                            raise_error("Error raise", result)
+                            st.stop()
+                        else:
+                            notes.append(str(result))
+                    else:
+                        _result.update(result["score_info"])
+                        _result.update({"사용 모델명": result["model_name"], "채점 단계": result.get("tier", "")})
+                        if result.get("escalation_reason") and history is None:
+                            notes.append(f"escalated: {result['escalation_reason']}")
+                        if history is not None:
+                            notes.append(f"duplicate of {history['stu_id']} ({history['name']})")
+                        elif dup_idx > 0:
+                            notes.append(f"duplicate of {get_report_ref(content_hash)}")
+                    if content_hash in near_dup_dict:
+                        similar_hash, similarity = near_dup_dict[content_hash]
+                        note = f"near-duplicate of {get_report_ref(similar_hash)}, similarity {similarity:.2f}"
+                        if reuse_near_dup_score and content_hash not in llm_target_dict and history is None:
+                            note += ", score reused"
+                        notes.append(note)
+                    _result["비고"] = "; ".join(notes)
+                    _result.update({"원문파일명": report_file.name, "원문 내용": report_file.content})
+
+                    row_idx = row_idx_dict[report_file.name]
+                    result_table.set_row(row_idx, _result)
+                    row_content_hashes[row_idx] = content_hash
+                    if dup_idx == 0 and content_hash in llm_target_dict and not isinstance(result, Exception):
+                        row_token_usages[row_idx] = result["token_usage"]
+
+                # 이번 배치에서 채점한 결과만 저장. 유사 문서에서 가져온 점수는 그 문서의 결과이므로 저장하지 않음
+                if content_hash in llm_target_dict and not isinstance(result, Exception):
+                    near_dup_index.add(content_hash, signature_dict[content_hash])
+                    content_hash_index.add(
+                        content_hash,
+                        name=report_files[0].name,
+                        stu_id=stu_id_dict[report_files[0].name],
+                        category_id=category_id_selected,
+                        category_version=category_version,
+                        result=result,
+                    )
+            metrics.record("result_table", time.perf_counter() - t)
+            content_hash_index.save()
+            near_dup_index.save()
+
+            # 배치 간 분석을 위해 결과를 Parquet 데이터셋에 추가
+            try:
+                from src.utils.warehouse import result_warehouse  # pyarrow import가 무거우므로 저장할 때 import
+
+                result_warehouse.append(
+                    batch_id=stu_id_base,
+                    category_id=category_id_selected,
+                    category_version=category_version,
+                    result_table=result_table,
+                    content_hashes=row_content_hashes,
+                    token_usages=row_token_usages,
+                )
+            except Exception as e:
+                logger.exception(f"Fail to append results to warehouse: {e.__class__.__name__}: {e}")
+
+        with st.spinner("결과 파일을 만들고 있습니다..."):
+            # encoding = "utf-8-sig"
+            # filename = f"report_{stu_id_base}.csv"
+            # result_csv_bytes = result_df.to_csv(index=False).encode(encoding)
+            filename = f"report_{stu_id_base}.xlsx"
+            # 결과 파일은 디스크에 쓰고, 업로드와 다운로드 버튼은 각자 파일을 열어서 읽음
+            result_xlsx_path = RESULT_XLSX_DIR / filename
+            # 디스크가 계속 늘지 않도록 이 세션의 이전 결과 파일(업로드가 끝난 경우)과 보관 기간이 지난 파일을 지움
+            prev_result_files = st.session_state.get("result_files")
+            if prev_result_files is not None and prev_result_files["upload_future"].done():
+                prev_result_files["xlsx_path"].unlink(missing_ok=True)
+            remove_old_files_in_dir(RESULT_XLSX_DIR, RESULT_XLSX_MAX_AGE, pattern="report_*.xlsx")
+            result_xlsx_path.parent.mkdir(parents=True, exist_ok=True)
+            with metrics.span("xlsx_build"), result_xlsx_path.open("xb") as f:
+                write_result_xlsx(result_table.columns, result_table.iter_rows(), fh=f)
+
+            # Save to google drive: 백그라운드로 업로드하고, 업로드가 끝나면 링크를 표시
+            upload_future = background_uploader.submit(filename, result_xlsx_path)
+            st.session_state["result_files"] = {
+                "filename": filename,
+                "xlsx_path": result_xlsx_path,
+                "upload_future": upload_future,
+            }
+
+            st.success("평가가 완료되었습니다. 결과를 확인해주세요.")
+    finally:
+        # st.stop()으로 중단된 배치도 요약을 남기고 context를 되돌림. 백그라운드 업로드는 끝나는 대로 JSONL에만 기록됨
+        metrics.end_batch(metrics_token)
+
+    show_result_files(**st.session_state["result_files"])
+
+elif "result_files" in st.session_state:  # 업로드가 끝나거나 다운로드 버튼을 눌러 다시 실행된 경우
+    show_result_files(**st.session_state["result_files"])
 
 # st.write(f"길이: {len(content)} 자")
 # st.write(f"비용: {cost:.3f} usd($)")
@@ -8,23 +8,17 @@ from streamlit_extras.stylable_container import stylable_container
 from yaml.loader import SafeLoader
 
 from src import logger
-from src.common.consts import PROMPT_ARCHIVE_DIR, PROMPT_PER_CATEGORY_DIR
-from src.common.models import (
-    load_prompt,
-    reset_all_category_info,
-    reset_category_id_to_name_ko_dict,
-    reset_category_strenum,
-    reset_prompt_per_category_dict,
-)
-from src.utils.google_drive import (
-    GD_PROMPT_ARCHIVE_FOLDER_ID,
-    GD_PROMPT_FOLDER_ID,
-    GoogleDriveHelper,
-    get_prompt_folder_id_in_gd,
-)
+from src.common.consts import PROMPT_ARCHIVE_DIR, PROMPT_PER_CATEGORY_DIR, STORAGE_PROMPT_ARCHIVE_PATH
+from src.common.models import get_category_registry, load_prompt, reset_all_category_info
+from src.processor.analytics import get_category_analytics
 from src.utils.io import get_current_datetime, make_unique_id
+from src.utils.llm_scheduler import llm_scheduler
+from src.utils.prompt_sync import prompt_syncer
+from src.utils.storage import get_prompt_folder_id, get_storage
+from src.utils.usage_ledger import usage_ledger
+from src.utils.warehouse import result_warehouse
 
-gd_helper = GoogleDriveHelper(GD_PROMPT_FOLDER_ID)
+storage = get_storage()
 # Authentication
 with open(".streamlit/config.yaml") as file:
     config = yaml.load(file, Loader=SafeLoader)
@@ -71,14 +65,8 @@ cate_dict_template = {
 }
 
 # Read .toml files and build the category_option_dict
-if "prompt_per_category_dict" not in st.session_state:
-    reset_prompt_per_category_dict()
-
-if "category_id_to_name_ko_dict" not in st.session_state:
-    reset_category_id_to_name_ko_dict()
-
-if "Category" not in st.session_state:
-    reset_category_strenum()
+prompt_syncer.start_background()
+reset_all_category_info()
 
 if "select_category_idx" not in st.session_state:
     st.session_state["select_category_idx"] = 0
@@ -113,10 +101,10 @@ with col2:
                 new_prompt_path = PROMPT_PER_CATEGORY_DIR / f"{new_category_id}.toml"
                 with open(new_prompt_path, "w") as file:
                     toml.dump(cate_dict_session, file)
-                gd_helper.upload(
+                storage.upload(
                     filename=new_prompt_path.name,
                     content=toml.dumps(cate_dict_session),
-                    folder_id=get_prompt_folder_id_in_gd(),
+                    folder_id=get_prompt_folder_id(),
                 )
 
                 reset_all_category_info()
@@ -362,17 +350,18 @@ if st.session_state["edit_mode"]:
         with open(prompt_path, "w") as file:
             toml.dump(cate_dict_session, file)
 
-        # 파일 구글드라이브에 업로드
+        # 파일 저장소(구글드라이브 등)에 업로드
+        # 구글드라이브의 경우 기존 파일의 id와 부모 폴더는 인덱스에서 찾으므로, 이동과 업로드 요청만 Drive로 보냄
         try:
-            archive_file_id = gd_helper.get_file_id(prompt_path.name, folder_id=get_prompt_folder_id_in_gd())
-            gd_helper.move(archive_file_id, GD_PROMPT_ARCHIVE_FOLDER_ID)
+            archive_file_id = storage.get_id(prompt_path.name, folder_id=get_prompt_folder_id())
+            storage.move([archive_file_id], storage.resolve(STORAGE_PROMPT_ARCHIVE_PATH))
         except ValueError as e:
             logger.error(e)
 
-        gd_helper.upload(
+        storage.upload(
             filename=prompt_path.name,
             content=toml.dumps(cate_dict_session),
-            folder_id=get_prompt_folder_id_in_gd(),
+            folder_id=get_prompt_folder_id(),
         )
         reset_all_category_info()
 
@@ -435,3 +424,93 @@ else:
         st.divider()
         st.markdown("### 채점 예시")
         st.markdown(st.session_state["prompt_per_category_dict"][category_id_selected]["example"])
+
+        # 채점 결과 분석: warehouse에 쌓인 결과로 계산하며, 배치가 추가되기 전까지는 캐시된 결과를 사용
+        st.divider()
+        st.markdown("### 채점 결과 분석")
+        data_version = result_warehouse.get_data_version(category_id_selected)
+        if data_version[0] == 0:
+            st.info("아직 저장된 채점 결과가 없습니다.")
+        else:
+            analytics = get_category_analytics(
+                category_id_selected,
+                get_category_registry().get(category_id_selected).version,
+                data_version,
+                st.session_state["prompt_per_category_dict"][category_id_selected],
+            )
+            st.write(f"채점된 보고서 {analytics['num_rows']}개 (현재 평가기준 버전: {analytics['current_version']})")
+
+            st.markdown("#### 세부 평가기준별 통계")
+            st.dataframe(
+                analytics["stats_df"],
+                column_config={
+                    "ceiling_rate": st.column_config.NumberColumn("최고점 비율", format="%.2f"),
+                    "floor_rate": st.column_config.NumberColumn("최저점 비율", format="%.2f"),
+                },
+            )
+
+            st.markdown("#### 점수 분포")
+            histogram_df = analytics["histogram_df"]
+            criterion_selected = st.selectbox("세부 평가기준", options=list(histogram_df.columns))
+            st.bar_chart(histogram_df[criterion_selected])
+
+            st.markdown("#### 평가기준 간 상관관계")
+            st.dataframe(analytics["correlation_df"].style.format("{:.2f}"))
+
+            st.markdown("#### 평가기준 버전별 비교")
+            version_df = analytics["version_df"]
+            st.dataframe(version_df)
+            if len(version_df) > 1:
+                st.write("직전 버전 대비 평균 점수 변화")
+                st.dataframe(version_df.drop(columns=["first_graded_at", "count"]).diff().iloc[1:])
+
+    # LLM 사용량과 비용: usage_ledger에 쌓인 호출별 기록을 집계하여 표시
+    st.divider()
+    st.markdown("### LLM 사용량 및 비용")
+    category_name_dict = st.session_state["category_id_to_name_ko_dict"]
+    cost_column_config = {
+        "cost": st.column_config.NumberColumn("cost(USD)", format="$%.3f"),
+        "avg_cost": st.column_config.NumberColumn("avg_cost(USD)", format="$%.4f"),
+        "avg_latency": st.column_config.NumberColumn("avg_latency(s)", format="%.1f"),
+    }
+    period = st.radio(
+        "기간 단위", options=["month", "day"], format_func={"month": "월", "day": "일"}.get, horizontal=True
+    )
+    usage_rows = usage_ledger.summarize(period=period, group_by=("category_id", "model"))
+    if not usage_rows:
+        st.info("아직 기록된 LLM 사용량이 없습니다.")
+    else:
+        tab_category, tab_model, tab_batch = st.tabs(["역량별", "모델별", "최근 배치"])
+        with tab_category:
+            for row in usage_rows:
+                row["category_id"] = category_name_dict.get(row["category_id"], row["category_id"])
+            st.dataframe(usage_rows, column_config=cost_column_config, hide_index=True)
+        with tab_model:
+            st.dataframe(usage_ledger.summarize_models(), column_config=cost_column_config, hide_index=True)
+        with tab_batch:
+            batch_rows = usage_ledger.summarize_batches()
+            for row in batch_rows:
+                row["category_id"] = category_name_dict.get(row["category_id"], row["category_id"])
+            st.dataframe(batch_rows, column_config=cost_column_config, hide_index=True)
+
+    # LLM 대기열: 모든 세션이 나눠 쓰는 budget과 세션별 대기 시간
+    st.divider()
+    st.markdown("### LLM 대기열")
+    scheduler_stats = llm_scheduler.get_stats()
+    col_in_flight, col_waiting, col_tokens = st.columns(3)
+    col_in_flight.metric("처리 중인 요청", f"{scheduler_stats['in_flight']} / {scheduler_stats['max_in_flight']}")
+    col_waiting.metric("대기 중인 요청", scheduler_stats["waiting"])
+    if scheduler_stats["tokens_per_minute"] is not None:
+        col_tokens.metric(
+            "남은 토큰(분당)", f"{scheduler_stats['tokens_available']:,.0f} / {scheduler_stats['tokens_per_minute']:,}"
+        )
+    if scheduler_stats["flows"]:
+        st.dataframe(
+            scheduler_stats["flows"],
+            column_config={
+                "flow_id": "세션",
+                "avg_wait": st.column_config.NumberColumn("avg_wait(s)", format="%.1f"),
+                "max_wait": st.column_config.NumberColumn("max_wait(s)", format="%.1f"),
+            },
+            hide_index=True,
+        )
@@ -31,7 +31,11 @@ if PHASE == "dev":
 assert os.getenv("OPENAI_API_KEY") is not None, "Set OPENAI_API_KEY enviroment value"
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
-GOOGLE_DRIVE_SERVICE_SECRETS = st.secrets["google_drive_service_secrets"]
+
+def get_google_drive_service_secrets():
+    # Google Drive를 쓰는 경우에만 secrets가 필요하므로, import 시점이 아니라 사용 시점에 읽음
+    return st.secrets["google_drive_service_secrets"]
+
 
 # date_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 # if not os.path.exists(SERVER_START_DATETIME_FILE):
@@ -9,25 +9,85 @@ ENV_PATH = PROJECT_DIR / ".env"
 ENV_DEV_PATH = PROJECT_DIR / ".env.dev"
 LOG_DIR = "./logs"
 LOG_CONFIG_PATH = PROJECT_DIR / "log_config.yml"
-DB_DIR = PROJECT_DIR / "db"
+DB_DIR = Path(os.getenv("DB_DIR", PROJECT_DIR / "db"))  # 부하 테스트 등에서 임시 폴더로 바꿀 수 있음
 RESULT_DIR = DB_DIR / "result"
 PROMPT_DIR = PROJECT_DIR / "src/prompt"
 PROMPT_PER_CATEGORY_DIR = PROMPT_DIR / "category"
 PROMPT_ARCHIVE_DIR = PROMPT_PER_CATEGORY_DIR / "archive"
+CONTENT_HASH_INDEX_PATH = DB_DIR / "content_hash_index.json"
+NEAR_DUP_INDEX_PATH = DB_DIR / "near_dup_index.pkl"
+WAREHOUSE_SCORE_DIR = RESULT_DIR / "scores"  # category_id=.../date=.../{batch_id}.parquet
+WAREHOUSE_CONTENT_DIR = RESULT_DIR / "contents"  # date=.../{batch_id}.parquet
+RESULT_XLSX_DIR = RESULT_DIR / "xlsx"  # 웹에서 채점한 배치의 결과 XLSX(report_{batch_id}.xlsx)
+RESULT_XLSX_MAX_AGE = 24 * 60 * 60  # 초. 이보다 오래된 결과 XLSX는 다음 배치를 시작할 때 지움
+USAGE_LEDGER_PATH = DB_DIR / "usage_ledger.sqlite3"  # LLM 호출별 토큰 사용량과 비용(append-only)
+LLM_TRAFFIC_PATH = DB_DIR / "llm_traffic.jsonl"  # 기록한 LLM 요청/응답(record/replay 모드)
+METRICS_PATH = Path(LOG_DIR) / "metrics.jsonl"  # span과 배치별 요약을 한 줄씩 기록
 
 # Model
 TO_JSON = True
 LLM_TEMPERATURE: int = 0
 # {"name": "gpt-4-32k", "max_tokens": 32768}, {"name": "gpt-3.5-turbo-16k", "max_tokens": 16385}]
-MODEL_TYPE_INFOS = [{"name": "gpt-4-0125-preview", "max_tokens": 128000}]
+# input_price, output_price: USD per 1M tokens. supports_n: 한 번의 호출로 여러 개의 응답(n)을 받을 수 있는지
+# endpoints: 같은 모델을 제공하는 endpoint 목록. 장애나 rate limit 시 다른 endpoint로 요청을 옮김(src/utils/llm_router.py)
+#   ex. {"id": "azure-kr", "api_type": "azure", "api_base": "https://...", "api_version": "2024-02-01",
+#        "api_key_env": "AZURE_OPENAI_API_KEY", "deployment_id": "gpt-4"}
+MODEL_TYPE_INFOS = [
+    {
+        "name": "gpt-4-0125-preview",
+        "max_tokens": 128000,
+        "input_price": 10.0,
+        "output_price": 30.0,
+        "supports_n": True,
+        "endpoints": [{"id": "openai"}],
+    }
+]
 MAX_OUTPUT_TOKENS = 1000
-OPENAI_RETRIES = 3
+# LLM_TRAFFIC_MODE 환경 변수: record이면 LLM 요청/응답을 LLM_TRAFFIC_PATH에 기록하고,
+# replay이면 OpenAI 대신 기록된 응답을 기록된 응답 시간만큼 기다린 뒤 반환(src/utils/llm_traffic.py)
+LLM_TRAFFIC_MODE = os.getenv("LLM_TRAFFIC_MODE")
+OPENAI_RETRIES = 3  # endpoint당 시도 횟수
+LLM_REQUEST_TIMEOUT = 120  # seconds
+LLM_CIRCUIT_FAILURE_THRESHOLD = 3  # 연속으로 이만큼 실패하면 endpoint를 차단
+LLM_CIRCUIT_COOLDOWN = 30  # seconds. 차단이 반복되면 두 배씩 늘림
+LLM_CIRCUIT_MAX_COOLDOWN = 300
+# 모든 세션의 LLM 요청이 나눠 쓰는 budget. 세션별로 weighted fair queuing(src/utils/llm_scheduler.py)
+LLM_SCHEDULER_MAX_IN_FLIGHT = 16
+LLM_SCHEDULER_TOKENS_PER_MINUTE = 300000  # 예상 토큰 수(입력 + 최대 출력) 기준. None이면 제한하지 않음
+LLM_SCHEDULER_POLL_INTERVAL = 1  # seconds. 대기 중인 요청이 token이 다시 찼는지 확인하는 주기
+LLM_SCHEDULER_MAX_FLOWS = 100  # 대기 현황을 보여줄 최근 세션 수
+LLM_SCHEDULER_INTERACTIVE_MAX_FILES = 5  # 채점할 파일이 이 수 이하인 세션은 interactive로 보고 weight를 높임
+LLM_SCHEDULER_INTERACTIVE_WEIGHT = 4
+# LLM 호출과 fetch가 함께 쓰는 HTTP connection pool(src/utils/event_loop.py)
+HTTP_POOL_LIMIT = 100
+HTTP_POOL_LIMIT_PER_HOST = 32  # LLM_SCHEDULER_MAX_IN_FLIGHT보다 커야 LLM 요청이 pool에서 기다리지 않음
+HTTP_KEEPALIVE_TIMEOUT = 60  # seconds. 요청이 없는 connection을 유지하는 시간
+
+# Cascade mode: 싼 모델로 먼저 채점하고, 결과를 믿기 어려운 경우에만 MODEL_TYPE_INFOS의 모델로 다시 채점
+CASCADE_MODEL_INFOS = [
+    {"name": "gpt-4o-mini", "max_tokens": 128000, "input_price": 0.15, "output_price": 0.6, "supports_n": True}
+]
+CASCADE_NUM_SAMPLES = 3  # 싼 모델은 여러 번 샘플링하여 점수의 표준편차를 봄
+CASCADE_MAX_STD = 0.5  # 세부 점수의 표준편차가 이보다 크면 escalation
+CASCADE_MIN_CONFIDENCE = 0.7  # 모델이 스스로 답한 확신도(0~1)가 이보다 작으면 escalation
+CASCADE_TIER_CHEAP = "cheap"
+CASCADE_TIER_STRONG = "strong"
+
+# Consistency mode: 같은 보고서를 여러 번 채점해 세부 점수의 안정성을 측정
+CONSISTENCY_MAX_SAMPLES = 10
+CONSISTENCY_TEMPERATURE = 0.7  # 응답이 모두 같아지지 않도록 샘플링
 
 # Input
 ALLOWED_EXTENSIONS = [".hwp", ".docx", ".pdf"]
 ALLOWED_EXTENSIONS_WITH_ZIP = ALLOWED_EXTENSIONS + [".zip"]
 MAX_CHAR_LEN_PER_FILE = 40000
 
+# Near-duplicate detection(MinHash LSH)
+NEAR_DUP_SHINGLE_SIZE = 5  # 문자 단위 shingle 길이
+NEAR_DUP_NUM_PERM = 128
+NEAR_DUP_NUM_BANDS = 16  # band당 8행. 유사도 약 0.7 이상부터 후보로 잡힘
+NEAR_DUP_THRESHOLD = 0.8  # 추정 Jaccard 유사도가 이 값 이상이면 유사 문서로 판단
+
 # Output
 OUTPUT_DTYPE_DICT = [
     {
@@ -37,11 +97,63 @@ OUTPUT_DTYPE_DICT = [
         "원문파일명": "str",
         "원문 내용": "str",
         "사용 모델명": "str",
+        "채점 단계": "str",
         "비고": "str",
     },
 ]
+XLSX_ROW_HEIGHT = 100  # 헤더를 제외한 행 높이
+XLSX_HEADER_ROW_HEIGHT = 15
+XLSX_FIRST_COL_WIDTH = 15
+XLSX_LONG_COL_WIDTH = 40  # _descript, 원문 내용 칼럼
+XLSX_DEFAULT_COL_WIDTH = 8.43  # xlsx 기본 너비
+XLSX_SPOOL_MAX_SIZE = 16 * 1024 * 1024  # 결과 파일이 이보다 크면 디스크의 임시 파일에 씀
+
+# Result warehouse(Parquet)
+WAREHOUSE_SCORE_COMPRESSION = "snappy"
+WAREHOUSE_CONTENT_COMPRESSION = "zstd"  # 원문은 한 번 쓰고 가끔 읽으므로 압축률 우선
+WAREHOUSE_CONTENT_COMPRESSION_LEVEL = 9
+
+# Storage
+"""
+storage root(GD_BASE_FOLDER): admin에게 edit 권한
+├── prompt
+│   └── archive
+└── ssk_gpt_manager: manager에게 view 권한
+    ├── result
+    └── docs: manager에게 edit 권한
+        └── manual (file)
+"""
+STORAGE_BACKEND_DEFAULT = "gdrive"  # STORAGE_BACKEND 환경 변수로 변경 가능: gdrive | local
+STORAGE_PROMPT_PATH = "prompt"
+STORAGE_PROMPT_ARCHIVE_PATH = "prompt/archive"
+STORAGE_RESULT_PATH = "ssk_gpt_manager/result"
+STORAGE_DOCS_FILE_PATH = "ssk_gpt_manager/docs/manual"
+STORAGE_FOLDER_PATHS = [STORAGE_PROMPT_ARCHIVE_PATH, STORAGE_RESULT_PATH, "ssk_gpt_manager/docs"]
+LOCAL_STORAGE_DIR = DB_DIR / "storage"
 
 # google drive
 PHASE = os.getenv("PHASE")
 GD_BASE_FOLDER_ID = "1HlLUoIzlqYAfSHD2RyqSagKGjZtA_4AJ" if PHASE == "prod" else "1uJuF1M7si5oP9mNd3pfvG-LnWA672NSq"
+GD_SCOPES = ["https://www.googleapis.com/auth/drive"]
+GD_HTTP_TIMEOUT = 60
+GD_DISCOVERY_DOC_PATH = DB_DIR / "gd_discovery_drive_v3.json"
+GD_ID_CACHE_PATH = DB_DIR / "gd_id_cache.json"
+GD_FILE_FIELDS = "id, name, parents, mimeType, modifiedTime, md5Checksum, webViewLink"
+GD_LIST_PAGE_SIZE = 1000
+GD_BATCH_MAX_SIZE = 100  # Drive API batch 요청 당 최대 요청 수
+GD_METADATA_INDEX_PATH = DB_DIR / "gd_metadata_index.json"
+GD_METADATA_INDEX_REFRESH_INTERVAL = 10  # 이 시간(초) 안에는 변경 사항을 다시 조회하지 않음
+GD_METADATA_INDEX_MAX_AGE = 60 * 60  # 이 시간(초)이 지난 folder는 전체 목록을 다시 받아옴
+PROMPT_SYNC_MANIFEST_PATH = DB_DIR / "prompt_sync_manifest.json"
+PROMPT_SYNC_MAX_WORKERS = 4
+GD_UPLOAD_CHUNK_SIZE = 4 * 256 * 1024  # resumable upload 청크 크기. 256KB의 배수여야 함
+GD_UPLOAD_MAX_WORKERS = 2
+GD_UPLOAD_RETRIES = 5
+GD_UPLOAD_POLL_INTERVAL = 2  # 업로드 완료 여부를 확인하는 화면 갱신 주기(초)
 # SERVER_START_DATETIME_FILE = DB_DIR / "server_start_date.txt"
+
+# Metrics
+METRICS_WINDOW_SIZE = 1000  # span 종류별로 분위수 계산에 사용하는 최근 기록 수
+METRICS_MAX_BATCHES = 16  # 요약 전인 배치를 최대 몇 개까지 메모리에 둘지
+METRICS_QUANTILES = [0.5, 0.95, 0.99]
+METRICS_PORT = os.getenv("METRICS_PORT")  # 설정하면 해당 포트의 /metrics에서 Prometheus text format으로 제공
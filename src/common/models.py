@@ -1,51 +1,128 @@
-from dataclasses import dataclass, field
+import hashlib
+import threading
+from dataclasses import dataclass, field, replace
 from enum import StrEnum
+from pathlib import Path
 from typing import Optional
 
 import streamlit as st
 import toml
 
+from src import logger
 from src.common.consts import PROMPT_PER_CATEGORY_DIR
 from src.utils.io import get_suffix
 
 
-def load_prompt(file_path):
-    prompt_dict = toml.load(file_path)
+def parse_prompt(prompt_str: str) -> dict:
+    prompt_dict = toml.loads(prompt_str)
     # Temporary add the new element(example) for exist file
     if prompt_dict.get("example") is None:
         prompt_dict["example"] = ""
     return prompt_dict
 
 
-def reset_prompt_per_category_dict():
-    prompt_per_category_dict = {}
-    prompt_per_category_file_paths = sorted(PROMPT_PER_CATEGORY_DIR.glob("*.toml"), key=lambda file: file.name)
-    for file_path in prompt_per_category_file_paths:
-        prompt_dict = load_prompt(file_path)
-        category_id = file_path.stem  # Gets the file name without extension
-        prompt_per_category_dict[category_id] = prompt_dict
-    st.session_state["prompt_per_category_dict"] = prompt_per_category_dict
-
-
-reset_prompt_per_category_dict()
-
-
-def reset_category_id_to_name_ko_dict():
-    st.session_state["category_id_to_name_ko_dict"] = {
-        k: v["category_name_ko"] for k, v in st.session_state["prompt_per_category_dict"].items()
-    }
-
-
-def reset_category_strenum():
-    st.session_state["Category"] = StrEnum("Category", {k: k for k in st.session_state["prompt_per_category_dict"]})
-    # class Category(StrEnum):
-    #     communication: str = auto()
+def load_prompt(file_path):
+    return parse_prompt(Path(file_path).read_text(encoding="utf-8"))
+
+
+@dataclass(frozen=True)
+class CategoryEntry:
+    category_id: str
+    prompt_dict: dict
+    mtime_ns: int
+    size: int
+    version: str  # 파일 내용의 hash. 내용이 바뀔 때만 바뀜
+
+
+class CategoryRegistry:
+    """PROMPT_PER_CATEGORY_DIR의 카테고리 .toml 파일들을 읽어 프로세스 전체(모든 세션)에서 공유
+
+    refresh()는 (mtime, size)가 바뀐 파일만 읽고, 내용의 hash까지 바뀐 경우에만 다시 파싱함.
+    카테고리 목록이나 내용이 바뀌면 version이 증가하고, 카테고리별로는 entry.version으로 하위 캐시를 무효화하면 됨.
+    여러 세션이 같은 dict를 참조하므로 반환된 값은 수정하지 말 것(편집할 때는 load_prompt로 새로 읽음)
+    """
+
+    def __init__(self, category_dir: Path = PROMPT_PER_CATEGORY_DIR) -> None:
+        self.category_dir = Path(category_dir)
+        self.version = 0
+        self.entries: dict[str, CategoryEntry] = {}
+        self.prompt_per_category_dict: dict[str, dict] = {}
+        self.category_id_to_name_ko_dict: dict[str, str] = {}
+        self.Category = StrEnum("Category", {})
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def _load_entry(self, file_path: Path, prev_entry: Optional[CategoryEntry]) -> Optional[CategoryEntry]:
+        try:
+            stat = file_path.stat()
+            if prev_entry is not None and (prev_entry.mtime_ns, prev_entry.size) == (stat.st_mtime_ns, stat.st_size):
+                return prev_entry
+            content = file_path.read_bytes()
+        except FileNotFoundError:  # 목록을 읽은 뒤 삭제된 경우
+            return None
+
+        version = hashlib.sha256(content).hexdigest()[:12]
+        if prev_entry is not None and prev_entry.version == version:
+            return replace(prev_entry, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        try:
+            prompt_dict = parse_prompt(content.decode("utf-8"))
+            prompt_dict["category_name_ko"]  # 필수 값
+        except (toml.TomlDecodeError, UnicodeDecodeError, KeyError) as e:
+            logger.error(f"Fail to parse category file {file_path.name}: {e}")
+            if prev_entry is None:
+                return None
+            return replace(prev_entry, mtime_ns=stat.st_mtime_ns, size=stat.st_size)  # 고쳐질 때까지 이전 내용 유지
+        return CategoryEntry(file_path.stem, prompt_dict, stat.st_mtime_ns, stat.st_size, version)
+
+    def refresh(self) -> bool:
+        """바뀐 파일만 다시 읽음. 카테고리 정보가 바뀌었으면 True"""
+        with self._lock:
+            entries = {}
+            for file_path in sorted(self.category_dir.glob("*.toml"), key=lambda file: file.name):
+                category_id = file_path.stem  # Gets the file name without extension
+                entry = self._load_entry(file_path, self.entries.get(category_id))
+                if entry is not None:
+                    entries[category_id] = entry
+
+            changed = list(entries.keys()) != list(self.entries.keys()) or any(
+                entry.version != self.entries[category_id].version for category_id, entry in entries.items()
+            )
+            self.entries = entries
+            if changed:
+                # 세션들이 이전 dict를 참조하고 있을 수 있으므로 수정하지 않고 새로 만듦
+                self.prompt_per_category_dict = {k: entry.prompt_dict for k, entry in entries.items()}
+                self.category_id_to_name_ko_dict = {
+                    k: entry.prompt_dict["category_name_ko"] for k, entry in entries.items()
+                }
+                self.Category = StrEnum("Category", {k: k for k in entries})
+                self.version += 1
+                logger.info(f"Category registry is updated: version {self.version}, {len(entries)} categories")
+            return changed
+
+    def get(self, category_id: str) -> CategoryEntry:
+        return self.entries[category_id]
+
+    def get_snapshot(self) -> tuple[int, dict[str, dict], dict[str, str], type[StrEnum]]:
+        """(version, prompt_per_category_dict, category_id_to_name_ko_dict, Category)를 같은 시점의 것으로 반환"""
+        with self._lock:
+            return self.version, self.prompt_per_category_dict, self.category_id_to_name_ko_dict, self.Category
+
+
+@st.cache_resource(show_spinner=False)  # import 시점(set_page_config 전)에도 호출되므로 spinner를 그리지 않음
+def get_category_registry() -> CategoryRegistry:
+    return CategoryRegistry()
 
 
 def reset_all_category_info():
-    reset_prompt_per_category_dict()
-    reset_category_id_to_name_ko_dict()
-    reset_category_strenum()
+    """공유 registry를 갱신하고, 바뀐 경우에만 세션의 카테고리 정보를 registry의 것으로 교체"""
+    registry = get_category_registry()
+    registry.refresh()
+    version, prompt_per_category_dict, category_id_to_name_ko_dict, Category = registry.get_snapshot()
+    if st.session_state.get("category_registry_version") != version:
+        st.session_state["category_registry_version"] = version
+        st.session_state["prompt_per_category_dict"] = prompt_per_category_dict
+        st.session_state["category_id_to_name_ko_dict"] = category_id_to_name_ko_dict
+        st.session_state["Category"] = Category
 
 
 @dataclass
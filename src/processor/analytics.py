@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.processor.result import ResultLayout
+from src.utils.warehouse import result_warehouse
+
+ANALYTICS_CACHE_MAX_ENTRIES = 32
+
+
+def load_score_matrix(category_id: str, columns: list[str]) -> tuple[np.ndarray, pd.DataFrame]:
+    """warehouse에서 columns의 점수만 읽어 (행 수, 칼럼 수) float 배열로 반환. 값이 없으면 nan
+
+    Returns:
+        점수 배열, 행별 category_version과 created_at
+    """
+    available_columns = set(result_warehouse.get_schema().names)
+    read_columns = [colname for colname in columns if colname in available_columns]
+    table = result_warehouse.query(columns=["category_version", "created_at"] + read_columns, category_id=category_id)
+
+    scores = np.full((table.num_rows, len(columns)), np.nan)
+    for idx, colname in enumerate(columns):
+        if colname in available_columns:
+            scores[:, idx] = table.column(colname).to_numpy(zero_copy_only=False).astype(np.float64)
+    meta_df = table.select(["category_version", "created_at"]).to_pandas()
+    return scores, meta_df
+
+
+def summarize_scores(scores: np.ndarray, scale_mins: np.ndarray, scale_maxs: np.ndarray) -> dict[str, np.ndarray]:
+    """칼럼별 응답 수, 평균, 분산, 표준편차, 최고점(ceiling)/최저점(floor) 비율"""
+    valid = ~np.isnan(scores)
+    count = valid.sum(axis=0)
+    filled = np.where(valid, scores, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = filled.sum(axis=0) / count
+        squared_diff = np.where(valid, (scores - mean) ** 2, 0.0)
+        var = squared_diff.sum(axis=0) / (count - 1)
+        ceiling_rate = (valid & (scores >= scale_maxs)).sum(axis=0) / count
+        floor_rate = (valid & (scores <= scale_mins)).sum(axis=0) / count
+    var = np.where(count > 1, var, np.nan)
+    return {
+        "count": count,
+        "mean": mean,
+        "var": var,
+        "std": np.sqrt(var),
+        "ceiling_rate": ceiling_rate,
+        "floor_rate": floor_rate,
+    }
+
+
+def compute_histograms(scores: np.ndarray, scale_mins: np.ndarray, scale_maxs: np.ndarray) -> pd.DataFrame:
+    """칼럼별 점수 분포. index는 점수, 값은 응답 수
+
+    모든 칼럼을 전체 점수 범위의 구간으로 펼쳐서 bincount 한 번으로 셈. 범위 밖의 점수는 양 끝 구간에 넣음
+    """
+    num_rows, num_cols = scores.shape
+    if num_cols == 0:
+        return pd.DataFrame(index=pd.RangeIndex(0, name="score"))
+    low, high = int(scale_mins.min()), int(scale_maxs.max())
+    width = high - low + 1
+
+    valid = ~np.isnan(scores)
+    offsets = np.clip(np.rint(np.where(valid, scores, low)).astype(np.int64), low, high) - low
+    bin_idxs = (offsets + np.arange(num_cols) * width)[valid]
+    counts = np.bincount(bin_idxs, minlength=num_cols * width).reshape(num_cols, width)
+    return pd.DataFrame(counts.T, index=pd.RangeIndex(low, high + 1, name="score"))
+
+
+def compare_versions(scores: np.ndarray, meta_df: pd.DataFrame) -> pd.DataFrame:
+    """category_version별 평균 점수와 응답 수. 처음 채점한 시각 순으로 정렬"""
+    df = pd.DataFrame(scores)
+    df["category_version"] = meta_df["category_version"].to_numpy()
+    grouped = df.groupby("category_version", sort=False)
+    version_df = grouped.mean()
+    version_df.insert(0, "count", grouped.size())
+    version_df.insert(0, "first_graded_at", meta_df.groupby("category_version")["created_at"].min())
+    return version_df.sort_values("first_graded_at")
+
+
+@st.cache_data(max_entries=ANALYTICS_CACHE_MAX_ENTRIES, show_spinner=False)
+def get_category_analytics(category_id: str, category_version: str, data_version: tuple, _criteria_dict: dict) -> dict:
+    """카테고리의 채점 결과 통계. category_version과 data_version이 같으면 캐시된 결과를 사용
+
+    Args:
+        category_version: CategoryEntry.version. 평가기준 파일이 바뀌면 바뀌며, warehouse의 category_version과 같은 값
+        data_version: result_warehouse.get_data_version(category_id). 배치가 추가되면 바뀜
+        _criteria_dict: category_version에 해당하는 평가기준. 캐시 키에는 포함하지 않음
+    """
+    layout = ResultLayout(_criteria_dict)
+    total_columns = layout.total_columns + ["Total"]
+    scores, meta_df = load_score_matrix(category_id, layout.score_columns + total_columns)
+    sub_scores = scores[:, : len(layout.score_columns)]
+    total_scores = scores[:, len(layout.score_columns) :]
+
+    stats = summarize_scores(sub_scores, layout.scale_mins, layout.scale_maxs)
+    stats_df = pd.DataFrame(stats, index=pd.Index(layout.score_columns, name="criterion"))
+
+    histogram_df = compute_histograms(sub_scores, layout.scale_mins, layout.scale_maxs)
+    histogram_df.columns = layout.score_columns
+
+    total_df = pd.DataFrame(total_scores, columns=total_columns)
+    version_df = compare_versions(scores, meta_df)
+    version_df.columns = ["first_graded_at", "count"] + layout.score_columns + total_columns
+    return {
+        "num_rows": len(meta_df),
+        "current_version": category_version,
+        "stats_df": stats_df,
+        "histogram_df": histogram_df,
+        "correlation_df": total_df[layout.total_columns].corr(),
+        "version_df": version_df,
+    }
@@ -0,0 +1,111 @@
+import hashlib
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Optional
+
+from src import logger
+from src.common.consts import CONTENT_HASH_INDEX_PATH
+from src.common.models import ReportFile
+from src.utils.io import get_current_datetime, load_obj, save_obj
+
+
+class RegPat:
+    WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """내용 비교를 위한 정규화. 유니코드 정규형(NFC), 공백, 대소문자 차이는 같은 내용으로 본다"""
+    text = unicodedata.normalize("NFC", text)
+    text = RegPat.WHITESPACE.sub(" ", text).strip()
+    return text.lower()
+
+
+def get_content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def group_by_content_hash(report_files: list[ReportFile]) -> dict[str, list[ReportFile]]:
+    """content hash별로 파일을 묶어 반환. 각 그룹의 첫 번째 파일이 대표 파일이며 입력 순서가 유지됨"""
+    groups = {}
+    for report_file in report_files:
+        groups.setdefault(get_content_hash(report_file.content), []).append(report_file)
+    return groups
+
+
+class ContentHashIndex:
+    """이전 배치들에서 채점한 내용의 content hash 인덱스
+
+    {
+        "<content_hash>": {
+            "name": "report.hwp",  # 최초 제출 파일명
+            "stu_id": "240101_120000_1",  # 최초 제출 시 부여된 STU ID
+            "created_at": "2024-01-01_12-00-00",
+            "results": {
+                "<category_id>": {
+                    "score_info": {...},
+                    "model_name": "gpt-4-0125-preview",
+                    "category_version": "<CategoryEntry.version>",  # 채점 당시의 평가기준 파일 version
+                }
+            },
+        }
+    }
+    """
+
+    def __init__(self, path: Path = CONTENT_HASH_INDEX_PATH) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._index = self._load()
+
+    def _load(self) -> dict:
+        if not self.path.is_file() or self.path.stat().st_size == 0:
+            return {}
+        try:
+            return load_obj(self.path)
+        except Exception as e:
+            logger.error(f"Cannot load content hash index({self.path}): {e.__class__.__name__}: {e}")
+            return {}
+
+    def __contains__(self, content_hash: str) -> bool:
+        return content_hash in self._index
+
+    def get(self, content_hash: str) -> Optional[dict]:
+        return self._index.get(content_hash)
+
+    def get_result(self, content_hash: str, category_id: str, category_version: str) -> Optional[dict]:
+        """저장된 결과. 평가기준 파일이 바뀌어 version이 다르면 None"""
+        entry = self._index.get(content_hash)
+        if entry is None:
+            return None
+        result = entry["results"].get(category_id)
+        if result is None or result.get("category_version") != category_version:
+            return None
+        return result
+
+    def add(
+        self,
+        content_hash: str,
+        name: str,
+        stu_id: str,
+        category_id: str,
+        category_version: str,
+        result: Optional[dict] = None,
+    ):
+        """결과가 없거나 다른 version의 결과이면 새 결과로 교체"""
+        with self._lock:
+            entry = self._index.setdefault(
+                content_hash,
+                {"name": name, "stu_id": stu_id, "created_at": get_current_datetime(), "results": {}},
+            )
+            prev_result = entry["results"].get(category_id)
+            if result is not None and (prev_result is None or prev_result.get("category_version") != category_version):
+                entry["results"][category_id] = {
+                    "score_info": result["score_info"],
+                    "model_name": result["model_name"],
+                    "category_version": category_version,
+                }
+
+    def save(self):
+        with self._lock:
+            save_obj(self._index, self.path, verbose=False)
@@ -1,35 +1,49 @@
+import asyncio
 import json
+import time
 from datetime import datetime
 from typing import Optional
 
-import openai
-import streamlit as st
 import tomli
 from jinja2 import Environment
 from json_repair import repair_json
 from openai.error import APIError, RateLimitError, Timeout, TryAgain
-from retry import retry
 
 from src import logger
-from src.common.consts import LLM_TEMPERATURE, MAX_OUTPUT_TOKENS, MODEL_TYPE_INFOS, OPENAI_RETRIES, PROMPT_DIR, TO_JSON
-from src.common.models import reset_category_strenum, reset_prompt_per_category_dict
-from src.utils.llm import num_tokens_from_messages
-
-# Read .toml files and build the category_option_dict
-if "prompt_per_category_dict" not in st.session_state:
-    reset_prompt_per_category_dict()
-
-if "Category" not in st.session_state:
-    reset_category_strenum()
+from src.common.consts import (
+    CASCADE_MAX_STD,
+    CASCADE_MIN_CONFIDENCE,
+    CASCADE_MODEL_INFOS,
+    CASCADE_NUM_SAMPLES,
+    CASCADE_TIER_CHEAP,
+    CASCADE_TIER_STRONG,
+    CONSISTENCY_TEMPERATURE,
+    LLM_TEMPERATURE,
+    MAX_OUTPUT_TOKENS,
+    MODEL_TYPE_INFOS,
+    PROMPT_DIR,
+    TO_JSON,
+)
+from src.common.models import CategoryRegistry, get_category_registry
+from src.processor.result import ResultLayout, get_result_layout
+from src.utils.event_loop import background_loop
+from src.utils.llm import get_model_info, num_tokens_from_messages
+from src.utils.llm_router import llm_router
+from src.utils.llm_scheduler import llm_scheduler
+from src.utils.llm_traffic import traffic_recorder
+from src.utils.metrics import metrics
 
-Category = st.session_state["Category"]
+Category = str  # 카테고리 id. 목록은 CategoryRegistry가 관리
 
 
-def get_model_name_adapt_to_prompt_len(prompts: list[dict], reduce_prompt_idx: Optional[int] = None):
+def get_model_name_adapt_to_prompt_len(
+    prompts: list[dict], reduce_prompt_idx: Optional[int] = None, model_infos: list[dict] = MODEL_TYPE_INFOS
+):
     model_name = None
     while model_name is None:
-        for model_info in MODEL_TYPE_INFOS:
+        with metrics.span("token_count"):
             num_tokens = num_tokens_from_messages(prompts)
+        for model_info in model_infos:
             total_num_tokens = num_tokens + MAX_OUTPUT_TOKENS
 
             if total_num_tokens <= model_info["max_tokens"]:
@@ -68,8 +82,12 @@ class Generator:
     with prompt_templates_path.open("rb") as f:
         prompt_templates = tomli.load(f)["prompt"]
 
-    def __init__(self) -> None:
-        pass
+    def __init__(self, registry: Optional[CategoryRegistry] = None) -> None:
+        """
+        Args:
+            registry: 평가기준을 읽을 카테고리 registry. None이면 프로세스에서 공유하는 registry를 사용
+        """
+        self.registry = registry if registry is not None else get_category_registry()
 
     @staticmethod
     def postprocessor(text: str) -> str:
@@ -79,10 +97,11 @@ class Generator:
         self,
         category: Category,
         input_text: str,
+        with_confidence: bool = False,
         **kwargs,
     ) -> list[dict]:
         # By category, construct criteria str and output_format str
-        criteria_dict = st.session_state["prompt_per_category_dict"][category]
+        criteria_dict = self.registry.get(category).prompt_dict
 
         criteria_list_with_num = []
         output_format_dict = {}
@@ -104,6 +123,8 @@ class Generator:
                 # ],
                 "description": "",
             }
+        if with_confidence:  # cascade mode에서 escalation 여부 판단에 사용
+            output_format_dict["confidence"] = "how confident you are in these scores, from 0.0 to 1.0"
         criteria_str = "\n".join(criteria_list_with_num)
         output_format_str = json.dumps(output_format_dict)  # indent=4
 
@@ -126,31 +147,13 @@ class Generator:
 
         return prompts
 
-    async def agenerate(self, category: Category, input_text: str):
-        def serialize_score_info(score_info: dict[str, dict]) -> dict[str, int | str]:
-            """
-            Input:
-                data = {
-                    'content': {'score': [1, 2, 3, 4, 5, 6], 'description': ''},
-                    'structure': {'score': [7, 8, 9, 10], 'description': ''},
-                    'grammar': {'score': [11, 12, 13], 'description': ''}
-                }
-            """
-            result = {}
-            total = 0
-            for key, value in score_info.items():
-                prefix = key.lower()
-                scores = value["score"]
-                description = value["description"]
-                sub_total = sum(scores)
-                for i, score in enumerate(scores, start=1):
-                    result[f"{prefix}_{i}"] = score
-                result[f"{prefix}_total"] = sub_total
-                result[f"{prefix}_descript"] = description
-                total += sub_total
-
-            result["Total"] = total
-            return result
+    async def agenerate(self, category: Category, input_text: str, n: int = 1):
+        """보고서를 채점
+
+        Args:
+            n: 1보다 크면 consistency mode. 응답 n개를 받아 세부 점수별 중앙값과 표준편차를 계산.
+                모델이 n을 지원하면 한 번의 호출로 받으므로 입력 토큰은 한 번만 과금됨
+        """
 
         def response_metainfo_str(usage_response: dict, start_datetime: datetime):
             entry = {
@@ -159,64 +162,241 @@ class Generator:
                 "completion": usage_response["completion_tokens"],
                 "total": usage_response["total_tokens"],
                 "response_time(s)": (datetime.now() - start_datetime).total_seconds(),
+                "n": n,
             }
             return json.dumps(entry)
 
-        prompts = self.construct_prompt(category=category, input_text=input_text)
+        with metrics.span("prompt_build"):
+            prompts = self.construct_prompt(category=category, input_text=input_text)
         logger.debug(prompts)
         model_name, _ = get_model_name_adapt_to_prompt_len(prompts=prompts)
+        temperature = LLM_TEMPERATURE if n == 1 else CONSISTENCY_TEMPERATURE
         t = datetime.now()
-        resp = await achat_completion(
-            model=model_name,
-            messages=prompts,
-            to_json=TO_JSON,
-            temperature=LLM_TEMPERATURE,
-            max_tokens=MAX_OUTPUT_TOKENS,
+        choices, token_usage = await self.arequest(
+            prompts, model_name, n=n, temperature=temperature, usage_meta=self.get_usage_meta(category)
+        )
+        response_time = (datetime.now() - t).total_seconds()
+
+        layout = get_result_layout(category, self.registry)
+        if n == 1:
+            try:
+                score_info_raw = choices[0]["message"]["content"]
+                with metrics.span("json_repair"):
+                    score_info = repair_json(score_info_raw, return_objects=True)
+                score_info_serialized = layout.serialize_score_info(score_info)
+            except Exception as e:
+                logger.exception(f"LLM response is not as expected form: {e.__class__.__name__}: {e}\n{choices}")
+        else:
+            samples = [score_info for score_info, _ in self.parse_choices(layout, choices)]
+            if not samples:
+                raise ValueError(f"None of {n} LLM responses is in expected form")
+            score_info_serialized = layout.aggregate_samples(samples)
+
+        logger.info(f"LLM Response Metainfo: {response_metainfo_str(token_usage, t)}")
+        prompts_str = "\n\n".join([f"{p['role']}: {p['content']}" for p in prompts])
+        return {
+            "score_info": score_info_serialized,
+            "model_name": model_name,
+            "token_usage": token_usage,
+            "prompts_str": prompts_str,
+            "num_samples": n,
+            "response_time": response_time,
+            "llm_usages": [{"model_name": model_name, **token_usage}],
+        }
+
+    def get_usage_meta(self, category: str) -> dict:
+        """usage_ledger에 LLM 호출과 함께 기록할 카테고리 정보"""
+        return {"category_id": category, "category_version": self.registry.get(category).version}
+
+    @staticmethod
+    async def arequest(
+        prompts: list[dict],
+        model_name: str,
+        n: int = 1,
+        temperature: float = LLM_TEMPERATURE,
+        usage_meta: Optional[dict] = None,
+    ) -> tuple[list[dict], dict]:
+        """응답 choices와 토큰 사용량. 모델이 n을 지원하지 않으면 n번 동시에 호출"""
+        if n == 1 or get_model_info(model_name).get("supports_n", False):
+            resp = await achat_completion(
+                model=model_name,
+                messages=prompts,
+                to_json=TO_JSON,
+                temperature=temperature,
+                max_tokens=MAX_OUTPUT_TOKENS,
+                n=n,
+                usage_meta=usage_meta,
+            )
+            return resp["choices"], resp["usage"]
+
+        resps = await asyncio.gather(
+            *[
+                achat_completion(
+                    model=model_name,
+                    messages=prompts,
+                    to_json=TO_JSON,
+                    temperature=temperature,
+                    max_tokens=MAX_OUTPUT_TOKENS,
+                    usage_meta=usage_meta,
+                )
+                for _ in range(n)
+            ]
         )
+        token_usage = {key: sum(r["usage"][key] for r in resps) for key in resps[0]["usage"]}
+        return [r["choices"][0] for r in resps], token_usage
+
+    @staticmethod
+    def parse_choices(layout: ResultLayout, choices: list[dict]) -> list[tuple[dict, dict]]:
+        """형식에 맞는 응답들의 (serialize_score_info 결과, 원래 응답 dict). 형식이 맞지 않는 응답은 제외"""
+        samples = []
+        for choice in choices:
+            try:
+                with metrics.span("json_repair"):
+                    score_info = repair_json(choice["message"]["content"], return_objects=True)
+                samples.append((layout.serialize_score_info(score_info), score_info))
+            except Exception as e:
+                logger.warning(f"Skip the LLM response not in expected form: {e.__class__.__name__}: {e}")
+        return samples
+
+    async def agenerate_cascade(self, category: Category, input_text: str, n: int = 1):
+        """CASCADE_MODEL_INFOS의 싼 모델로 먼저 채점하고, 아래의 경우에만 agenerate로 다시 채점
+
+        - 형식에 맞지 않는 응답이 있거나, 세부 점수가 빠졌거나 범위를 벗어난 경우
+        - 샘플 간 세부 점수의 표준편차가 CASCADE_MAX_STD보다 큰 경우
+        - 모델이 답한 확신도가 CASCADE_MIN_CONFIDENCE보다 작은 경우
+        결과의 tier는 최종 결과를 낸 단계이며, escalation_reason에 다시 채점한 이유를 남김
+        """
+        layout = get_result_layout(category, self.registry)
+        with metrics.span("prompt_build"):
+            prompts = self.construct_prompt(category=category, input_text=input_text, with_confidence=True)
+        llm_usages = []
+        reasons = []
+        t = datetime.now()
         try:
-            score_info_raw = resp["choices"][0]["message"]["content"]
-            score_info = repair_json(score_info_raw, return_objects=True)
-            score_info_serialized = serialize_score_info(score_info)
+            model_name, _ = get_model_name_adapt_to_prompt_len(prompts=prompts, model_infos=CASCADE_MODEL_INFOS)
+            choices, token_usage = await self.arequest(
+                prompts,
+                model_name,
+                n=CASCADE_NUM_SAMPLES,
+                temperature=CONSISTENCY_TEMPERATURE,
+                usage_meta=self.get_usage_meta(category),
+            )
+            llm_usages.append({"model_name": model_name, **token_usage})
         except Exception as e:
-            logger.exception(f"LLM response is not as expected form: {e.__class__.__name__}: {e}\n{resp}")
+            reasons.append(f"cheap model error({e.__class__.__name__})")
+            choices = []
 
-        token_usage = resp["usage"]
+        samples = self.parse_choices(layout, choices)
+        if len(samples) < len(choices):
+            reasons.append(f"{len(choices) - len(samples)} invalid responses")
+        for score_info, _ in samples:
+            reasons.extend(issue for issue in layout.validate_score_info(score_info) if issue not in reasons)
+        if samples:
+            score_info_serialized = layout.aggregate_samples([score_info for score_info, _ in samples])
+            max_std = max((score_info_serialized.get(f"{colname}_std", 0.0) for colname in layout.score_columns))
+            if max_std > CASCADE_MAX_STD:
+                reasons.append(f"dispersion {max_std:.2f}")
+            try:
+                confidence = min(float(score_info_raw["confidence"]) for _, score_info_raw in samples)
+            except (KeyError, TypeError, ValueError):
+                reasons.append("no confidence")
+            else:
+                if confidence < CASCADE_MIN_CONFIDENCE:
+                    reasons.append(f"confidence {confidence:.2f}")
+
+        if reasons:
+            logger.info(f"Escalate to the strong model: {'; '.join(reasons)}")
+            result = await self.agenerate(category=category, input_text=input_text, n=n)
+            result.update(
+                tier=CASCADE_TIER_STRONG,
+                escalation_reason="; ".join(reasons),
+                llm_usages=llm_usages + result["llm_usages"],
+                response_time=(datetime.now() - t).total_seconds(),
+            )
+            return result
 
-        logger.info(f"LLM Response Metainfo: {response_metainfo_str(token_usage, t)}")
         prompts_str = "\n\n".join([f"{p['role']}: {p['content']}" for p in prompts])
         return {
             "score_info": score_info_serialized,
             "model_name": model_name,
             "token_usage": token_usage,
             "prompts_str": prompts_str,
+            "num_samples": CASCADE_NUM_SAMPLES,
+            "response_time": (datetime.now() - t).total_seconds(),
+            "llm_usages": llm_usages,
+            "tier": CASCADE_TIER_CHEAP,
         }
 
 
-@retry(
-    exceptions=(APIError, Timeout, TryAgain, RateLimitError),
-    tries=OPENAI_RETRIES,
-    delay=2,
-    backoff=2,
-    jitter=(1, 3),
-    logger=logger,
-)
-async def achat_completion(model, messages: list[str], to_json=False, temperature=0.0, max_tokens=None, stream=False):
+async def run_llm_concurrently(
+    report_file_list, category_id, n: int = 1, cascade: bool = False, registry: Optional[CategoryRegistry] = None
+):
+    generator = Generator(registry)
+    agenerate = generator.agenerate_cascade if cascade else generator.agenerate
+
+    tasks = []
+    for report_file in report_file_list:
+        tasks.append(agenerate(category=category_id, input_text=report_file.content, n=n))
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    return results
+
+
+async def achat_completion(
+    model,
+    messages: list[str],
+    to_json=False,
+    temperature=0.0,
+    max_tokens=None,
+    stream=False,
+    n: int = 1,
+    usage_meta: Optional[dict] = None,
+):
+    """llm_scheduler에서 차례를 기다린 뒤 llm_router를 통해 호출. 429/timeout 등은 router가 다른 endpoint로 옮겨서 다시 시도함
+
+    usage_meta는 호출마다 usage_ledger에 토큰 사용량과 함께 기록됨
+    """
     response_format = {"type": "json_object" if to_json else "text"}
     try:
-        return await openai.ChatCompletion.acreate(
-            model=model,
-            messages=messages,
-            response_format=response_format,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            stream=stream,
-        )
+        with metrics.span("token_count"):
+            estimated_tokens = num_tokens_from_messages(messages) + (max_tokens or MAX_OUTPUT_TOKENS) * n
+        ticket = await llm_scheduler.acquire(estimated_tokens)
+        t = time.perf_counter()
+        used_tokens = None
+        try:
+            acreate = llm_router.acreate(
+                model=model,
+                messages=messages,
+                response_format=response_format,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=stream,
+                n=n,
+                usage_meta=usage_meta,
+            )
+            # 다른 event loop에서 호출되어도 background_loop의 connection pool을 사용.
+            # stream은 응답을 읽는 loop가 요청한 loop와 같아야 하므로 현재 loop에서 요청
+            resp = await (acreate if stream else background_loop.arun(acreate))
+            if not stream:
+                used_tokens = resp["usage"]["total_tokens"]
+        finally:
+            llm_scheduler.release(ticket, used_tokens)
+        if traffic_recorder is not None and not stream:  # record 모드: 요청/응답을 replay용으로 기록
+            request = {
+                "model": model,
+                "messages": messages,
+                "response_format": response_format,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "n": n,
+            }
+            traffic_recorder.record(request, resp, latency=time.perf_counter() - t)
+        return resp
     except (APIError, Timeout, TryAgain) as e:
-        logger.error("Error during OpenAI inference: ", e)
+        logger.error(f"Error during OpenAI inference: {e}")
         raise e
     except RateLimitError as e:
-        logger.error("Rate limit error during OpenAI inference: ", e)  # TODO: how to handle ratelimiterror?
+        logger.error(f"Rate limit error during OpenAI inference: {e}")
         raise e
     except Exception as e:
-        logger.error("Unexpected error in OpenAI inference", e)
+        logger.error(f"Unexpected error in OpenAI inference: {e}")
         raise e
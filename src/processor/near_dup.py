@@ -0,0 +1,134 @@
+import threading
+import zlib
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from src import logger
+from src.common.consts import (
+    NEAR_DUP_INDEX_PATH,
+    NEAR_DUP_NUM_BANDS,
+    NEAR_DUP_NUM_PERM,
+    NEAR_DUP_SHINGLE_SIZE,
+    NEAR_DUP_THRESHOLD,
+)
+from src.processor.dedup import normalize_text
+from src.utils.io import load_obj, save_obj
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+SHINGLE_CHUNK_SIZE = 4096  # (shingle 수 x num_perm) 행렬이 너무 커지지 않도록 나누어 계산
+
+
+def get_shingle_hashes(text: str, shingle_size: int = NEAR_DUP_SHINGLE_SIZE) -> np.ndarray:
+    """정규화된 텍스트의 문자 n-gram(shingle)을 32bit 해시값 배열로 반환"""
+    text = normalize_text(text)
+    if len(text) < shingle_size:
+        shingles = {text}
+    else:
+        shingles = {text[i : i + shingle_size] for i in range(len(text) - shingle_size + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = NEAR_DUP_NUM_PERM, seed: int = 1) -> None:
+        self.num_perm = num_perm
+        gen = np.random.RandomState(seed)
+        self.a = gen.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = gen.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = get_shingle_hashes(text)
+        signature = np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(hashes), SHINGLE_CHUNK_SIZE):
+            chunk = hashes[start : start + SHINGLE_CHUNK_SIZE, np.newaxis]
+            permuted = np.bitwise_and((chunk * self.a + self.b) % MERSENNE_PRIME, MAX_HASH)
+            signature = np.minimum(signature, permuted.min(axis=0))
+        return signature
+
+
+class NearDuplicateIndex:
+    """MinHash LSH 기반 유사 문서 인덱스
+
+    signature를 num_bands개의 band로 나누어 band별 버킷에 key(content hash)를 저장함.
+    하나 이상의 band가 완전히 같은 key만 후보로 보고 signature를 비교하므로, 조회 비용은 전체 문서 수가 아니라
+    후보 수에 비례함
+    """
+
+    def __init__(
+        self,
+        path: Path = NEAR_DUP_INDEX_PATH,
+        num_perm: int = NEAR_DUP_NUM_PERM,
+        num_bands: int = NEAR_DUP_NUM_BANDS,
+        threshold: float = NEAR_DUP_THRESHOLD,
+    ) -> None:
+        assert num_perm % num_bands == 0, f"num_perm({num_perm}) should be divisible by num_bands({num_bands})"
+        self.path = Path(path)
+        self.threshold = threshold
+        self.num_bands = num_bands
+        self.rows_per_band = num_perm // num_bands
+        self.minhasher = MinHasher(num_perm)
+        self._lock = threading.Lock()
+
+        data = self._load()
+        self.signatures: dict[str, np.ndarray] = data.get("signatures", {})
+        self.buckets: list[dict[bytes, list[str]]] = data.get("buckets", [{} for _ in range(num_bands)])
+
+    def _load(self) -> dict:
+        if not self.path.is_file() or self.path.stat().st_size == 0:
+            return {}
+        try:
+            data = load_obj(self.path)
+        except Exception as e:
+            logger.error(f"Cannot load near-duplicate index({self.path}): {e.__class__.__name__}: {e}")
+            return {}
+        if len(data["buckets"]) != self.num_bands:
+            logger.warning(f"Near-duplicate index({self.path}) has different num_bands. Rebuild the index.")
+            return {}
+        return data
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.signatures
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [band.tobytes() for band in signature.reshape(self.num_bands, self.rows_per_band)]
+
+    def query(self, signature: np.ndarray, exclude: Optional[str] = None) -> list[tuple[str, float]]:
+        """threshold 이상으로 유사한 key와 추정 Jaccard 유사도를 유사도 내림차순으로 반환"""
+        with self._lock:
+            candidates = set()
+            for bucket, band_key in zip(self.buckets, self._band_keys(signature)):
+                candidates.update(bucket.get(band_key, ()))
+            candidates.discard(exclude)
+
+            matches = []
+            for key in candidates:
+                similarity = float(np.mean(self.signatures[key] == signature))
+                if similarity >= self.threshold:
+                    matches.append((key, similarity))
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+    def compare(self, signature: np.ndarray, signatures: dict[str, np.ndarray]) -> list[tuple[str, float]]:
+        """인덱스에 넣지 않은 signature들(ex. 아직 채점이 끝나지 않은 이번 배치의 파일)과 비교. 반환 형식은 query와 같음"""
+        matches = []
+        for key, other in signatures.items():
+            similarity = float(np.mean(other == signature))
+            if similarity >= self.threshold:
+                matches.append((key, similarity))
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+    def add(self, key: str, signature: np.ndarray):
+        with self._lock:
+            if key in self.signatures:
+                return
+            self.signatures[key] = signature
+            for bucket, band_key in zip(self.buckets, self._band_keys(signature)):
+                bucket.setdefault(band_key, []).append(key)
+
+    def save(self):
+        with self._lock:
+            save_obj({"signatures": self.signatures, "buckets": self.buckets}, self.path, verbose=False)
@@ -1,13 +1,23 @@
+import contextvars
 import re
 import struct
 import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import IO, Optional
+from typing import IO, Callable, Optional
 
 import olefile
-from unstructured.partition.auto import partition
 
+from src.common.models import ReportFile
 from src.utils.io import get_suffix
+from src.utils.metrics import metrics
+
+
+def load_partition():
+    """unstructured는 import가 수 초 걸리므로 .docx/.pdf 파일이 처음 들어왔을 때(또는 warmup에서) import"""
+    from unstructured.partition.auto import partition
+
+    return partition
 
 
 class RegPat:
@@ -68,55 +78,60 @@ class FileReader(object):
         self.char_count = self.calculate_char_count() if self.text else 0
 
     def extract_text(self):
-        try:
-            match self.filetype:
-                case ".txt":
-                    text_list = [line.decode("utf-8").strip() for line in self.file]
-
-                case ".hwp":
-                    text_list = HWPReader(self.file).text_list
-                case ".docx" | ".pdf":
-                    """
-                    Plaintext: .eml, .html, .json, .md, .msg, .rst, .rtf, .txt, .xml
-                    Images: .jpeg, .png
-                    Documents: .csv, .doc, .docx, .epub, .odt, .pdf, .ppt, .pptx, .tsv, .xlsx
-
-                    Text: FigureCaption, NarrativeText, ListItem, Title, Address, Table,
-                        PageBreak, Header, Footer, EmailAddress
-                    CheckBox
-                    Image
-
-                    """
-                    # try:
-                    # elements = partition(filename=str(self.filepath))
-                    elements = partition(file=self.file)
-
-                    text_list = []
-                    for elem in elements:
-                        if elem.category in ["Image", "PageBreak"]:
-                            continue
-                        if elem.category in ["Table", "Header", "Footer"]:
-                            if self.verbose:
-                                print("Deleted:", elem.category, elem.text)
-                            continue
-
-                        text_list.append(elem.text)
-
-                case _:  # ".doc"
-                    raise Exception(f"{self.filetype} is not supported")
-
-            self.file.close()
-
-        except Exception as e:
-            print(f"Cannot extract text from file: {self.filepath if self.filepath else self.file}. {e}")
-            raise e
+        with metrics.span("extract", filetype=self.filetype, path="unsupported") as span_labels:
+            try:
+                match self.filetype:
+                    case ".txt":
+                        span_labels["path"] = "text"
+                        text_list = [line.decode("utf-8").strip() for line in self.file]
+
+                    case ".hwp":
+                        span_labels["path"] = "hwp"
+                        text_list = HWPReader(self.file).text_list
+                    case ".docx" | ".pdf":
+                        """
+                        Plaintext: .eml, .html, .json, .md, .msg, .rst, .rtf, .txt, .xml
+                        Images: .jpeg, .png
+                        Documents: .csv, .doc, .docx, .epub, .odt, .pdf, .ppt, .pptx, .tsv, .xlsx
+
+                        Text: FigureCaption, NarrativeText, ListItem, Title, Address, Table,
+                            PageBreak, Header, Footer, EmailAddress
+                        CheckBox
+                        Image
+
+                        """
+                        # try:
+                        # elements = partition(filename=str(self.filepath))
+                        span_labels["path"] = "unstructured"
+                        elements = load_partition()(file=self.file)
+
+                        text_list = []
+                        for elem in elements:
+                            if elem.category in ["Image", "PageBreak"]:
+                                continue
+                            if elem.category in ["Table", "Header", "Footer"]:
+                                if self.verbose:
+                                    print("Deleted:", elem.category, elem.text)
+                                continue
+
+                            text_list.append(elem.text)
+
+                    case _:  # ".doc"
+                        raise Exception(f"{self.filetype} is not supported")
+
+                self.file.close()
+
+            except Exception as e:
+                print(f"Cannot extract text from file: {self.filepath if self.filepath else self.file}. {e}")
+                raise e
 
         if self.clean:
             text_list_cleaned = []
-            for text in text_list:
-                text = clean_text(text, self.filetype, self.verbose)
-                if text:
-                    text_list_cleaned.append(text)
+            with metrics.span("clean", filetype=self.filetype):
+                for text in text_list:
+                    text = clean_text(text, self.filetype, self.verbose)
+                    if text:
+                        text_list_cleaned.append(text)
         else:
             text_list_cleaned = text_list
 
@@ -236,3 +251,37 @@ class HWPReader(object):
             i += 4 + rec_len
 
         return text
+
+
+def read_report_file(file, name=None) -> ReportFile | str:
+    try:
+        name = file.name if name is None else name
+        extension = get_suffix(name)
+        file_reader = FileReader(file=file, filetype=extension, clean=True)
+        return ReportFile(name=name, content=file_reader.text)
+    except Exception as e:
+        return f"{e.__class__.__name__}: {str(e)}"
+
+
+def read_report_files_concurrently(
+    files, names, max_workers: Optional[int] = None, callback: Optional[Callable[[str, ReportFile | str], None]] = None
+) -> dict[str, ReportFile | str]:
+    """파일 이름 -> ReportFile. 읽지 못한 파일은 오류 메시지
+
+    Args:
+        callback: 파일 하나를 읽을 때마다 (이름, 결과)로 호출(진행 상황 표시 등)
+    """
+    report_files_dict = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # 같은 배치의 span으로 기록되도록 현재 context에서 실행
+        future_to_name = {
+            executor.submit(contextvars.copy_context().run, read_report_file, file, name): name
+            for file, name in zip(files, names)
+        }
+        for future in as_completed(future_to_name):
+            name = future_to_name[future]
+            result = future.result()  # 여기서 발생하는 예외는 read_report_file 함수 내에서 이미 처리됨
+            report_files_dict[name] = result
+            if callback is not None:
+                callback(name, result)
+    return report_files_dict
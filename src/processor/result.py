@@ -0,0 +1,262 @@
+import warnings
+from typing import Iterator, Optional
+
+import numpy as np
+
+from src.common.consts import OUTPUT_DTYPE_DICT
+from src.common.models import CategoryRegistry, get_category_registry
+
+
+class ResultLayout:
+    """카테고리별 결과 칼럼 구조
+
+    칼럼 순서: STU ID | 평가기준별 세부 점수들, {prefix}_total | Total | {prefix}_descript들 | 원문파일명 등
+    prefix는 평가기준의 title_en을 소문자로 바꾼 것이며, LLM 출력 형식(construct_prompt의 output_format)의 키와 같음
+    """
+
+    def __init__(self, criteria_dict: dict) -> None:
+        self.prefixes = [crit_dict["title_en"].lower() for crit_dict in criteria_dict["criteria"]]
+        self.num_sub_scores = [len(crit_dict["sub_criteria"]) for crit_dict in criteria_dict["criteria"]]
+
+        # 세부 점수 칼럼들을 이어 붙인 배열에서 평가기준별 구간: [start, end)
+        self.score_ends = np.cumsum(self.num_sub_scores, dtype=np.int64)
+        self.score_starts = self.score_ends - np.asarray(self.num_sub_scores, dtype=np.int64)
+
+        self.score_columns = [
+            f"{prefix}_{sub_idx}"
+            for prefix, num_sub_score in zip(self.prefixes, self.num_sub_scores)
+            for sub_idx in range(1, num_sub_score + 1)
+        ]
+        self.score_column_idx_dict = {colname: idx for idx, colname in enumerate(self.score_columns)}
+        sub_crit_dicts = [
+            sub_crit_dict for crit_dict in criteria_dict["criteria"] for sub_crit_dict in crit_dict["sub_criteria"]
+        ]
+        self.scale_mins = np.array([sub_crit_dict["scale_min"] for sub_crit_dict in sub_crit_dicts], dtype=np.int64)
+        self.scale_maxs = np.array([sub_crit_dict["scale_max"] for sub_crit_dict in sub_crit_dicts], dtype=np.int64)
+        self.total_columns = [f"{prefix}_total" for prefix in self.prefixes]
+        # consistency mode에서 여러 샘플의 점수 표준편차
+        self.dispersion_columns = [f"{colname}_std" for colname in self.score_columns] + ["Total_std"]
+        self.dispersion_column_idx_dict = {colname: idx for idx, colname in enumerate(self.dispersion_columns)}
+        self.descript_columns = [f"{prefix}_descript" for prefix in self.prefixes]
+        self.head_columns = list(OUTPUT_DTYPE_DICT[0])
+        self.tail_columns = list(OUTPUT_DTYPE_DICT[1])
+        self.text_columns = self.head_columns + self.descript_columns + self.tail_columns
+
+        self.columns = list(self.head_columns)
+        for prefix, num_sub_score in zip(self.prefixes, self.num_sub_scores):
+            self.columns.extend(f"{prefix}_{sub_idx}" for sub_idx in range(1, num_sub_score + 1))
+            self.columns.append(f"{prefix}_total")
+        self.columns.append("Total")
+        self.columns.extend(self.descript_columns)
+        self.columns.extend(self.tail_columns)
+
+    @property
+    def dtype_dict(self) -> dict[str, str]:
+        text_columns = set(self.text_columns)
+        return {colname: "str" if colname in text_columns else "Int64" for colname in self.columns}
+
+    def serialize_score_info(self, score_info: dict[str, dict]) -> dict[str, int | str]:
+        """LLM 응답을 칼럼명 기준의 dict로 변환
+
+        Input:
+            data = {
+                'content': {'score': [1, 2, 3, 4, 5, 6], 'description': ''},
+                'structure': {'score': [7, 8, 9, 10], 'description': ''},
+                'grammar': {'score': [11, 12, 13], 'description': ''}
+            }
+        """
+        score_info = {key.lower(): value for key, value in score_info.items()}
+        result = {}
+        total = 0
+        for prefix in self.prefixes:
+            if prefix not in score_info:
+                continue
+            scores = [int(score) for score in score_info[prefix]["score"]]
+            sub_total = sum(scores)
+            for i, score in enumerate(scores, start=1):
+                result[f"{prefix}_{i}"] = score
+            result[f"{prefix}_total"] = sub_total
+            result[f"{prefix}_descript"] = score_info[prefix]["description"]
+            total += sub_total
+
+        result["Total"] = total
+        return result
+
+    def validate_score_info(self, score_info: dict[str, int | str]) -> list[str]:
+        """serialize_score_info 결과에서 빠졌거나 범위를 벗어난 세부 점수 목록"""
+        issues = []
+        for colname, scale_min, scale_max in zip(self.score_columns, self.scale_mins, self.scale_maxs):
+            score = score_info.get(colname)
+            if score is None:
+                issues.append(f"{colname} missing")
+            elif not scale_min <= score <= scale_max:
+                issues.append(f"{colname}={score} out of range")
+        for prefix, num_sub_score in zip(self.prefixes, self.num_sub_scores):
+            if f"{prefix}_{num_sub_score + 1}" in score_info:
+                issues.append(f"too many {prefix} scores")
+        return issues
+
+    def aggregate_samples(self, samples: list[dict[str, int | str]]) -> dict[str, int | float | str]:
+        """serialize_score_info 결과 여러 개를 하나로 합침
+
+        세부 점수는 샘플들의 중앙값(짝수 개면 둘 중 작은 값)을, {col}_std와 Total_std에는 표준편차를 넣음.
+        평가 설명은 Total이 합친 Total에 가장 가까운 샘플의 것을 사용
+        """
+        scores = np.array(
+            [[sample.get(colname, np.nan) for colname in self.score_columns] for sample in samples], dtype=np.float64
+        )
+        sample_totals = np.array([sample["Total"] for sample in samples], dtype=np.float64)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)  # 모든 샘플에 없는 칼럼은 nan
+            medians = np.nanquantile(scores, 0.5, axis=0, method="lower")
+            stds = np.nanstd(scores, axis=0)
+        has_score = ~np.isnan(medians)
+
+        result = {}
+        for idx, colname in enumerate(self.score_columns):
+            if has_score[idx]:
+                result[colname] = int(medians[idx])
+                result[f"{colname}_std"] = float(stds[idx])
+        total = 0
+        for prefix, start, end in zip(self.prefixes, self.score_starts, self.score_ends):
+            if has_score[start:end].any():
+                result[f"{prefix}_total"] = int(medians[start:end][has_score[start:end]].sum())
+                total += result[f"{prefix}_total"]
+        result["Total"] = total
+        result["Total_std"] = float(sample_totals.std())
+
+        representative = samples[int(np.argmin(np.abs(sample_totals - total)))]
+        for colname in self.descript_columns:
+            if colname in representative:
+                result[colname] = representative[colname]
+        return result
+
+
+_result_layout_dict: dict[str, tuple[str, ResultLayout]] = {}  # category_id -> (CategoryEntry.version, layout)
+
+
+def get_result_layout(category_id: str, registry: Optional[CategoryRegistry] = None) -> ResultLayout:
+    """카테고리의 ResultLayout. 모든 세션에서 공유하며, 평가기준 파일의 내용이 바뀔 때만 다시 만듦
+
+    Args:
+        registry: None이면 프로세스에서 공유하는 registry를 사용
+    """
+    entry = (registry if registry is not None else get_category_registry()).get(category_id)
+    cached = _result_layout_dict.get(category_id)
+    if cached is None or cached[0] != entry.version:
+        cached = _result_layout_dict[category_id] = (entry.version, ResultLayout(entry.prompt_dict))
+    return cached[1]
+
+
+class ResultTableBuilder:
+    """보고서별 결과를 칼럼 단위 배열에 바로 채우는 결과표
+
+    세부 점수는 (행 수, 세부 점수 칼럼 수) int64 배열과 값 유무 mask로 두고,
+    평가기준별 합계와 Total은 결과가 모두 채워진 뒤 한 번에 계산함
+    """
+
+    def __init__(self, layout: ResultLayout, num_rows: int, with_dispersion: bool = False) -> None:
+        self.layout = layout
+        self.num_rows = num_rows
+        self.with_dispersion = with_dispersion
+        self.dispersions = np.full((num_rows, len(layout.dispersion_columns)), np.nan)
+
+        self.columns = list(layout.columns)
+        if with_dispersion:  # Total 바로 뒤에 둠
+            total_idx = self.columns.index("Total") + 1
+            self.columns[total_idx:total_idx] = layout.dispersion_columns
+        self.scores = np.zeros((num_rows, len(layout.score_columns)), dtype=np.int64)
+        self.score_mask = np.zeros((num_rows, len(layout.score_columns)), dtype=bool)  # True: 값 있음
+        self.texts = {colname: np.full(num_rows, "", dtype=object) for colname in layout.text_columns}
+
+    def set_row(self, row_idx: int, values: dict) -> None:
+        """values의 값 중 layout에 있는 칼럼만 채움. 합계 칼럼은 무시하고 compute_totals에서 다시 계산"""
+        for colname, value in values.items():
+            if value is None:
+                continue
+            if (score_idx := self.layout.score_column_idx_dict.get(colname)) is not None:
+                self.scores[row_idx, score_idx] = value
+                self.score_mask[row_idx, score_idx] = True
+            elif colname in self.texts:
+                self.texts[colname][row_idx] = str(value)
+            elif (
+                self.with_dispersion
+                and (dispersion_idx := self.layout.dispersion_column_idx_dict.get(colname)) is not None
+            ):
+                self.dispersions[row_idx, dispersion_idx] = value
+
+    def compute_totals(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """평가기준별 합계와 Total을 계산
+
+        Returns:
+            criterion_totals, criterion_mask: (행 수, 평가기준 수)
+            totals, total_mask: (행 수,)
+        """
+        pad = np.zeros((self.num_rows, 1), dtype=np.int64)
+        score_cumsum = np.hstack([pad, np.cumsum(np.where(self.score_mask, self.scores, 0), axis=1)])
+        count_cumsum = np.hstack([pad, np.cumsum(self.score_mask, axis=1, dtype=np.int64)])
+        criterion_totals = score_cumsum[:, self.layout.score_ends] - score_cumsum[:, self.layout.score_starts]
+        criterion_mask = (count_cumsum[:, self.layout.score_ends] - count_cumsum[:, self.layout.score_starts]) > 0
+
+        totals = np.where(criterion_mask, criterion_totals, 0).sum(axis=1)
+        total_mask = criterion_mask.any(axis=1)
+        return criterion_totals, criterion_mask, totals, total_mask
+
+    def to_columns(self) -> dict[str, tuple[np.ndarray, np.ndarray | None]]:
+        """columns 순서의 {칼럼명: (값 배열, mask)}. 문자열 칼럼의 mask는 None"""
+        criterion_totals, criterion_mask, totals, total_mask = self.compute_totals()
+        score_columns = {
+            colname: (self.scores[:, idx], self.score_mask[:, idx])
+            for colname, idx in self.layout.score_column_idx_dict.items()
+        }
+        score_columns.update(
+            {
+                colname: (criterion_totals[:, idx], criterion_mask[:, idx])
+                for idx, colname in enumerate(self.layout.total_columns)
+            }
+        )
+        score_columns["Total"] = (totals, total_mask)
+        if self.with_dispersion:
+            dispersion_mask = ~np.isnan(self.dispersions)
+            score_columns.update(
+                {
+                    colname: (self.dispersions[:, idx], dispersion_mask[:, idx])
+                    for colname, idx in self.layout.dispersion_column_idx_dict.items()
+                }
+            )
+
+        columns = {}
+        for colname in self.columns:
+            columns[colname] = score_columns[colname] if colname in score_columns else (self.texts[colname], None)
+        return columns
+
+    def iter_rows(self) -> Iterator[list]:
+        """columns 순서의 행. 값이 없는 점수는 None"""
+        columns = [
+            (
+                [value if mask_value else None for value, mask_value in zip(values.tolist(), mask.tolist())]
+                if mask is not None
+                else values
+            )
+            for values, mask in self.to_columns().values()
+        ]
+        for row_idx in range(self.num_rows):
+            yield [column[row_idx] for column in columns]
+
+    def to_dataframe(self):
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                colname: (
+                    values
+                    if mask is None
+                    else (
+                        pd.arrays.IntegerArray(values, ~mask)
+                        if values.dtype.kind == "i"
+                        else pd.arrays.FloatingArray(values, ~mask)
+                    )
+                )
+                for colname, (values, mask) in self.to_columns().items()
+            }
+        )
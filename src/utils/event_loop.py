@@ -0,0 +1,92 @@
+import asyncio
+import atexit
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+
+import aiohttp
+import openai
+
+from src import logger
+from src.common.consts import HTTP_KEEPALIVE_TIMEOUT, HTTP_POOL_LIMIT, HTTP_POOL_LIMIT_PER_HOST
+
+
+class BackgroundEventLoop:
+    """프로세스에 하나인 event loop를 별도 thread에서 계속 실행하고, keep-alive aiohttp session을 공유
+
+    - 세션(Streamlit 스크립트 thread)마다 asyncio.run으로 loop와 connection을 새로 만들면 배치마다 TLS handshake를
+      다시 하므로, LLM 호출(openai.aiosession)과 fetch는 모두 이 loop의 connection pool을 사용함
+    - 코루틴은 submit한 thread의 contextvars(metrics 배치, llm_scheduler flow 등)를 이어받아 실행됨
+    - loop는 모든 세션이 함께 쓰므로 코루틴 안에서 오래 걸리는 동기 작업을 하지 않아야 함
+    """
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """처음 호출될 때 loop thread를 시작"""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="background-event-loop", daemon=True).start()
+                self._session = asyncio.run_coroutine_threadsafe(self._create_session(), loop).result()
+                self._loop = loop
+                atexit.register(self.close)
+                logger.info("Background event loop started")
+        return self._loop
+
+    @staticmethod
+    async def _create_session() -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT, limit_per_host=HTTP_POOL_LIMIT_PER_HOST, keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """공유 session. 이 loop에서 실행되는 코루틴 안에서만 사용해야 함"""
+        self._get_loop()
+        return self._session
+
+    async def _run_with_session(self, coro: Coroutine) -> Any:
+        openai.aiosession.set(self._session)  # task마다 context가 따로이므로 다른 loop의 호출에는 영향을 주지 않음
+        return await coro
+
+    def submit(self, coro: Coroutine) -> Future:
+        """코루틴을 loop에서 실행하도록 예약하고 바로 concurrent.futures.Future를 반환"""
+        return asyncio.run_coroutine_threadsafe(self._run_with_session(coro), self._get_loop())
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """asyncio.run 대신 사용. 결과가 나올 때까지 현재 thread를 막음"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout=timeout)
+        except BaseException:  # timeout이나 스크립트 중단 시 남은 작업을 취소
+            future.cancel()
+            raise
+
+    async def arun(self, coro: Coroutine) -> Any:
+        """다른 event loop에서 await할 수 있도록 실행. 이미 이 loop 안이면 그대로 await"""
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is not None and running_loop is self._loop:
+            return await self._run_with_session(coro)
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def close(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Fail to close the HTTP session: {e.__class__.__name__}: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+
+
+background_loop = BackgroundEventLoop()
@@ -0,0 +1,62 @@
+import tempfile
+from typing import IO, Iterable, Optional, Sequence
+
+import xlsxwriter
+
+from src.common.consts import (
+    XLSX_DEFAULT_COL_WIDTH,
+    XLSX_FIRST_COL_WIDTH,
+    XLSX_HEADER_ROW_HEIGHT,
+    XLSX_LONG_COL_WIDTH,
+    XLSX_ROW_HEIGHT,
+    XLSX_SPOOL_MAX_SIZE,
+)
+
+
+def is_long_width_column(colname: str) -> bool:
+    return "_descript" in colname or colname == "원문 내용"
+
+
+def write_result_xlsx(
+    columns: Sequence[str], rows: Iterable[Sequence], fh: Optional[IO[bytes]] = None, sheet_name: str = "Sheet1"
+) -> IO[bytes]:
+    """결과 행들을 XLSX로 써서 파일 객체를 반환
+
+    xlsxwriter의 constant_memory 모드로 행을 하나씩 쓰고 바로 임시 파일로 내보내므로, 행 수가 늘어도 메모리 사용량이
+    일정함. 칼럼 서식은 한 번만 지정하고 행 높이는 데이터 행에만 지정하며, 결과물은 SpooledTemporaryFile에 써서 큰 파일은 디스크에 둠
+
+    Args:
+        columns: 칼럼명 목록
+        rows: columns 순서의 값 목록들. None은 빈 셀로 둠
+        fh: 결과를 쓸 바이너리 파일 객체. None이면 SpooledTemporaryFile을 생성
+    Returns:
+        처음 위치로 되돌린 파일 객체
+    """
+    fh = fh or tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_MAX_SIZE)
+    with xlsxwriter.Workbook(fh, {"constant_memory": True, "strings_to_urls": False}) as workbook:
+        worksheet = workbook.add_worksheet(sheet_name)
+
+        # 칼럼 너비와 서식: 데이터 셀은 칼럼 서식을 따름
+        cell_format = workbook.add_format({"text_wrap": True, "valign": "top"})  # 상단 정렬
+        for idx, colname in enumerate(columns):
+            if idx == 0:
+                width = XLSX_FIRST_COL_WIDTH
+            elif is_long_width_column(colname):
+                width = XLSX_LONG_COL_WIDTH
+            else:
+                width = XLSX_DEFAULT_COL_WIDTH
+            worksheet.set_column(idx, idx, width, cell_format)
+
+        header_format = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        worksheet.set_row(0, XLSX_HEADER_ROW_HEIGHT)
+        worksheet.write_row(0, 0, columns, header_format)
+
+        # constant_memory 모드에서는 행 순서대로 써야 함. 높이는 데이터 행에만 지정(그 아래 빈 행은 기본 높이)
+        for row_idx, row in enumerate(rows, start=1):
+            worksheet.set_row(row_idx, XLSX_ROW_HEIGHT)
+            for col_idx, value in enumerate(row):
+                if value is not None and value != "":
+                    worksheet.write(row_idx, col_idx, value)
+
+    fh.seek(0)
+    return fh
@@ -1,23 +1,116 @@
 import io
+import threading
 from io import BytesIO
 from pathlib import Path
+from typing import Optional
 
+import httplib2
 from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload, MediaIoBaseUpload
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import DISCOVERY_URI, build_from_document
+from googleapiclient.http import DEFAULT_CHUNK_SIZE, HttpRequest, MediaIoBaseDownload, MediaIoBaseUpload
+
+from src import get_google_drive_service_secrets, logger
+from src.common.consts import (
+    GD_BATCH_MAX_SIZE,
+    GD_DISCOVERY_DOC_PATH,
+    GD_FILE_FIELDS,
+    GD_HTTP_TIMEOUT,
+    GD_ID_CACHE_PATH,
+    GD_LIST_PAGE_SIZE,
+    GD_METADATA_INDEX_MAX_AGE,
+    GD_METADATA_INDEX_PATH,
+    GD_METADATA_INDEX_REFRESH_INTERVAL,
+    GD_SCOPES,
+)
+from src.utils.ds import chunk_list
+from src.utils.io import get_current_timestamp, load_obj, save_obj
+
+
+class GoogleDriveClientProvider:
+    """프로세스 전체에서 공유하는 Google Drive client
+
+    - discovery document는 로컬(GD_DISCOVERY_DOC_PATH)에 캐시하고, service 객체는 프로세스당 한 번만 생성
+    - credentials는 하나를 공유하고 토큰 갱신도 한 번만 일어남
+    - httplib2.Http는 thread-safe하지 않으므로 요청마다 현재 thread의 AuthorizedHttp를 사용.
+      thread별 Http는 keep-alive 연결을 유지하므로, thread pool의 thread들이 각자 연결을 재사용함
+    """
+
+    def __init__(self, scopes: list[str] = GD_SCOPES, discovery_doc_path: Path = GD_DISCOVERY_DOC_PATH) -> None:
+        self.scopes = scopes
+        self.discovery_doc_path = Path(discovery_doc_path)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._credentials = None
+        self._service = None
+
+    @property
+    def credentials(self) -> service_account.Credentials:
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = service_account.Credentials.from_service_account_info(
+                    get_google_drive_service_secrets(), scopes=self.scopes
+                )
+        return self._credentials
+
+    def get_http(self) -> AuthorizedHttp:
+        """현재 thread 전용의 인증된 HTTP 객체"""
+        if getattr(self._local, "http", None) is None:
+            self._local.http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=GD_HTTP_TIMEOUT))
+        return self._local.http
+
+    def _build_request(self, http, *args, **kwargs) -> HttpRequest:
+        # service 객체를 여러 thread가 공유하더라도 각 요청은 이를 실행하는 thread의 Http를 사용
+        return HttpRequest(self.get_http(), *args, **kwargs)
+
+    def _load_discovery_doc(self) -> str:
+        if self.discovery_doc_path.is_file():
+            return self.discovery_doc_path.read_text(encoding="utf-8")
+
+        # google-api-python-client에 포함된 문서를 사용하고, 없으면 discovery endpoint에서 받아옴
+        doc = discovery_cache.get_static_doc("drive", "v3")
+        if doc is None:
+            response, content = httplib2.Http(timeout=GD_HTTP_TIMEOUT).request(
+                DISCOVERY_URI.format(api="drive", apiVersion="v3")
+            )
+            if response.status >= 300:
+                raise Exception(f"Cannot fetch the discovery document of google drive: {response.status}")
+            doc = content.decode("utf-8")
+        self.discovery_doc_path.parent.mkdir(parents=True, exist_ok=True)
+        self.discovery_doc_path.write_text(doc, encoding="utf-8")
+        return doc
+
+    @property
+    def service(self):
+        if self._service is None:
+            credentials = self.credentials
+            with self._lock:
+                if self._service is None:
+                    self._service = build_from_document(
+                        self._load_discovery_doc(), credentials=credentials, requestBuilder=self._build_request
+                    )
+        return self._service
+
 
-from src import GOOGLE_DRIVE_SERVICE_SECRETS, logger
-from src.common.consts import GD_BASE_FOLDER_ID, PROMPT_PER_CATEGORY_DIR
+gd_client_provider = GoogleDriveClientProvider()
 
 
 class GoogleDriveHelper:
-    def __init__(self, base_folder_id) -> None:
-        self.credentials = service_account.Credentials.from_service_account_info(
-            GOOGLE_DRIVE_SERVICE_SECRETS, scopes=["https://www.googleapis.com/auth/drive"]
-        )
-        self.service = build("drive", "v3", credentials=self.credentials)
+    """folder 단위의 Google Drive 작업 helper. client는 gd_client_provider의 것을 공유하므로 생성 비용이 거의 없음"""
+
+    def __init__(self, base_folder_id, client_provider: GoogleDriveClientProvider = gd_client_provider) -> None:
+        self.client_provider = client_provider
         self.base_folder_id = base_folder_id
 
+    @property
+    def credentials(self):
+        return self.client_provider.credentials
+
+    @property
+    def service(self):
+        return self.client_provider.service
+
     def create_folder(self, folder_name, parent_folder_id=None):
         parent_folder_id = parent_folder_id or self.base_folder_id
         file_metadata = {
@@ -37,14 +130,36 @@ class GoogleDriveHelper:
         else:
             media = MediaIoBaseUpload(BytesIO(content), mimetype="application/octet-stream", resumable=True)
 
-        file = self.service.files().create(body=file_metadata, media_body=media, fields="id, webViewLink").execute()
+        file = self.service.files().create(body=file_metadata, media_body=media, fields=GD_FILE_FIELDS).execute()
         return file
 
-    def get_file_list(self, folder_id=None):
+    def iter_files(self, folder_id=None, fields=GD_FILE_FIELDS, query=None, page_size=GD_LIST_PAGE_SIZE):
+        """folder 내 파일들을 nextPageToken을 따라가며 모두 반환하는 generator
+
+        Args:
+            folder_id (str, optional): 조회할 폴더 ID. None이면 base_folder_id 사용
+            fields (str): 파일별로 받아올 필드. 필요한 필드만 지정할수록 응답이 작아짐
+            query (str, optional): 추가 검색 조건(ex. "name = 'prompt'")
+        """
         folder_id = folder_id or self.base_folder_id
-        query = f"'{folder_id}' in parents and trashed = false"
-        results = self.service.files().list(q=query, fields="files(id, name, mimeType, webViewLink)").execute()
-        return results.get("files", [])
+        q = f"'{folder_id}' in parents and trashed = false"
+        if query:
+            q = f"{q} and {query}"
+
+        page_token = None
+        while True:
+            results = (
+                self.service.files()
+                .list(q=q, fields=f"nextPageToken, files({fields})", pageSize=page_size, pageToken=page_token)
+                .execute()
+            )
+            yield from results.get("files", [])
+            page_token = results.get("nextPageToken")
+            if page_token is None:
+                break
+
+    def get_file_list(self, folder_id=None, fields="id, name, mimeType, webViewLink"):
+        return list(self.iter_files(folder_id, fields=fields))
 
     def set_permission(self, file_id, email, role="reader"):
         permission = {"type": "user", "role": role, "emailAddress": email}
@@ -52,9 +167,8 @@ class GoogleDriveHelper:
 
     def get_file_id(self, filename, folder_id=None):
         folder_id = folder_id or self.base_folder_id
-        query = f"name = '{filename}' and '{folder_id}' in parents and trashed = false"
-        results = self.service.files().list(q=query, fields="files(id, name)").execute()
-        files = results.get("files", [])
+        escaped_filename = filename.replace("\\", "\\\\").replace("'", "\\'")
+        files = list(self.iter_files(folder_id, fields="id", query=f"name = '{escaped_filename}'"))
 
         if not files:
             raise ValueError(f"File '{filename}' not found in folder {folder_id}")
@@ -68,11 +182,23 @@ class GoogleDriveHelper:
         return f"https://drive.google.com/file/d/{file_id}/view?usp=sharing"
 
     def get_file_name_ids(self, folder_id=None):
-        folder_id = folder_id or self.base_folder_id
-        query = f"'{folder_id}' in parents and trashed = false"
-        results = self.service.files().list(q=query, fields="files(id, name)").execute()
-        files = results.get("files", [])
-        return [{"name": file["name"], "id": file["id"]} for file in files]
+        return [{"name": file["name"], "id": file["id"]} for file in self.iter_files(folder_id, fields="id, name")]
+
+    def execute_batch(self, requests: list) -> list:
+        """여러 요청을 batch HTTP 요청으로 묶어서 실행하고, 요청 순서대로 응답(실패 시 예외 객체)을 반환"""
+        responses = [None] * len(requests)
+
+        def callback(request_id, response, exception):
+            responses[int(request_id)] = exception if exception is not None else response
+
+        offset = 0
+        for requests_chunk in chunk_list(requests, GD_BATCH_MAX_SIZE):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for idx, request in enumerate(requests_chunk, start=offset):
+                batch.add(request, request_id=str(idx))
+            batch.execute(http=self.client_provider.get_http())
+            offset += len(requests_chunk)
+        return responses
 
     def download(self, file_id, target_path):
         """
@@ -111,39 +237,48 @@ class GoogleDriveHelper:
         except Exception as e:
             raise Exception(f"Error downloading file {file_id}: {str(e)}")
 
-    def move(self, file_id, new_folder_id):
+    def move(self, file_id, new_folder_id, previous_parents: Optional[list[str]] = None):
         """
         파일을 다른 폴더로 이동합니다.
 
         Args:
             file_id (str): 이동할 파일의 ID
             new_folder_id (str): 대상 폴더의 ID
+            previous_parents (list[str], optional): 현재 부모 폴더 ID들. 주어지면 이를 조회하는 요청을 생략
         """
         try:
-            # 현재 파일의 부모 폴더들을 가져옵니다
-            file = self.service.files().get(fileId=file_id, fields="parents").execute()
+            if previous_parents is None:
+                # 현재 파일의 부모 폴더들을 가져옵니다
+                file = self.service.files().get(fileId=file_id, fields="parents").execute()
+                previous_parents = file.get("parents", [])
 
             # 이전 부모 폴더들을 제거하고 새 폴더를 추가합니다
-            previous_parents = ",".join(file.get("parents", []))
-            file = (
-                self.service.files()
-                .update(fileId=file_id, addParents=new_folder_id, removeParents=previous_parents, fields="id, parents")
-                .execute()
-            )
+            file = self.move_request(file_id, new_folder_id, previous_parents).execute()
 
             return file
 
         except Exception as e:
             raise Exception(f"Error moving file {file_id} to folder {new_folder_id}: {str(e)}")
 
-    def upload_byte_obj(self, filename, byte_obj, folder_id=None):
+    def move_request(self, file_id, new_folder_id, previous_parents: list[str]):
+        return self.service.files().update(
+            fileId=file_id,
+            addParents=new_folder_id,
+            removeParents=",".join(previous_parents),
+            fields=GD_FILE_FIELDS,
+        )
+
+    def upload_byte_obj(self, filename, byte_obj, folder_id=None, chunksize=None, num_retries=0):
         """
         바이트 객체를 Google Drive에 업로드합니다.
+        chunksize가 주어지면 resumable session으로 청크 단위 업로드하며, 실패한 청크는 세션을 이어서 재시도합니다.
 
         Args:
             filename (str): 업로드될 파일의 이름
-            byte_obj (bytes): 업로드할 바이트 객체
+            byte_obj (bytes | IO[bytes]): 업로드할 바이트 객체 또는 바이너리 파일 객체
             folder_id (str, optional): 업로드할 폴더 ID. None이면 base_folder_id 사용
+            chunksize (int, optional): 청크 크기(bytes). 256KB의 배수여야 하며, None이면 한 번의 요청으로 업로드
+            num_retries (int): 청크별 재시도 횟수. googleapiclient가 5xx/429 응답과 연결 오류에 대해 지수 백오프로 재시도
 
         Returns:
             dict: 업로드된 파일의 정보
@@ -158,14 +293,24 @@ class GoogleDriveHelper:
             file_metadata = {"name": filename, "parents": [folder_id]}
 
             # 바이트 객체를 MediaIoBaseUpload로 변환
-            media = MediaIoBaseUpload(BytesIO(byte_obj), mimetype="application/octet-stream", resumable=True)
+            fh = BytesIO(byte_obj) if isinstance(byte_obj, bytes) else byte_obj
+            fh.seek(0)
+            media = MediaIoBaseUpload(
+                fh, mimetype="application/octet-stream", chunksize=chunksize or DEFAULT_CHUNK_SIZE, resumable=True
+            )
 
             # 파일 업로드 실행
-            file = (
-                self.service.files()
-                .create(body=file_metadata, media_body=media, fields="id, name, webViewLink")
-                .execute()
-            )
+            request = self.service.files().create(body=file_metadata, media_body=media, fields=GD_FILE_FIELDS)
+            if chunksize is None:
+                return request.execute(num_retries=num_retries)
+
+            # 청크별 재시도(5xx/429, 연결 오류)는 googleapiclient가 num_retries만큼 지수 백오프로 처리하며,
+            # 다시 보낼 때는 resumable session의 업로드 위치를 확인하여 이어서 업로드함
+            file = None
+            while file is None:
+                status, file = request.next_chunk(num_retries=num_retries)
+                if status is not None:
+                    logger.debug(f"Uploading {filename}: {int(status.progress() * 100)}%")
 
             return file
 
@@ -173,41 +318,200 @@ class GoogleDriveHelper:
             raise Exception(f"Error uploading file {filename}: {str(e)}")
 
 
-"""
-GD_BASE_FOLDER: admin에게 edit 권한
-├── prompt
-│   └── archive
-└── ssk_gpt_manager: manager에게 view 권한
-    ├── result
-    └── docs: manager에게 edit 권한 
-        └── manual (file)
-"""
-
-gd_helper_base = GoogleDriveHelper(GD_BASE_FOLDER_ID)
-GD_PROMPT_FOLDER_ID = gd_helper_base.get_file_id("prompt")
-GD_PROMPT_ARCHIVE_FOLDER_ID = gd_helper_base.get_file_id("archive", folder_id=GD_PROMPT_FOLDER_ID)
-GD_MANAGER_FOLDER_ID = gd_helper_base.get_file_id("ssk_gpt_manager")
-GD_RESULT_FOLDER_ID = gd_helper_base.get_file_id("result", folder_id=GD_MANAGER_FOLDER_ID)
-GD_DOCS_FOLDER_ID = gd_helper_base.get_file_id("docs", folder_id=GD_MANAGER_FOLDER_ID)
-GD_DOCS_FILE_URL = gd_helper_base.get_file_url("manual", folder_id=GD_DOCS_FOLDER_ID)
-
-logger.info(f"Start to download prompt files from Google Drive: {GD_PROMPT_FOLDER_ID}")
-for name_id in gd_helper_base.get_file_name_ids(GD_PROMPT_FOLDER_ID):
-    name, id = name_id["name"], name_id["id"]
-    if Path(name).suffix == ".toml":
-        gd_helper_base.download(id, PROMPT_PER_CATEGORY_DIR / name)
-        logger.info(f"Complete to download prompt file: {name}")
-
-# gd_helper_prompt = GoogleDriveHelper(GD_PROMPT_FOLDER_ID)
-
-
-def get_prompt_folder_id_in_gd():
-    return GD_PROMPT_FOLDER_ID
-    # date_str = gd_helper_prompt.get_server_start_datetime_str()
-    # try:
-    #     return gd_helper_prompt.get_file_id(filename=date_str)
-
-    # except ValueError:
-    #     prompt_folder_in_gd = gd_helper_prompt.create_folder(date_str)
-    #     logger.info(f"Create new prompt folder in Google Drive: {date_str}")
-    #     return prompt_folder_in_gd["id"]
+class GoogleDriveMetadataIndex:
+    """folder별 파일 메타데이터 인덱스. name -> id 조회 등을 Drive 요청 없이 처리하기 위함
+
+    - 처음 조회하는 folder는 전체 목록을 페이지 단위로 받아와 메모리와 로컬 파일(GD_METADATA_INDEX_PATH)에 저장
+    - 이후에는 changes API의 page token으로 그 사이에 바뀐 파일만 받아와 반영하며,
+      마지막 확인 후 refresh_interval(초)이 지나지 않았다면 Drive를 조회하지 않음
+    - max_age(초)가 지난 folder는 changes에 잡히지 않은 변경에 대비해 전체 목록을 다시 받아옴
+    """
+
+    CHANGE_FIELDS = f"nextPageToken, newStartPageToken, changes(fileId, removed, file({GD_FILE_FIELDS}, trashed))"
+
+    def __init__(
+        self,
+        gd_helper: GoogleDriveHelper,
+        cache_path: Path = GD_METADATA_INDEX_PATH,
+        refresh_interval: float = GD_METADATA_INDEX_REFRESH_INTERVAL,
+        max_age: float = GD_METADATA_INDEX_MAX_AGE,
+    ) -> None:
+        self.gd_helper = gd_helper
+        self.cache_path = Path(cache_path)
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._checked_at = 0.0
+
+        data = self._load()
+        self.start_page_token: Optional[str] = data.get("start_page_token")
+        self.folders: dict[str, dict] = data.get("folders", {})  # folder_id -> {"synced_at", "files": {id: meta}}
+
+    def _load(self) -> dict:
+        if not self.cache_path.is_file() or self.cache_path.stat().st_size == 0:
+            return {}
+        try:
+            return load_obj(self.cache_path)
+        except Exception as e:
+            logger.warning(f"Cannot load google drive metadata index({self.cache_path}): {e}")
+            return {}
+
+    def _save(self):
+        save_obj({"start_page_token": self.start_page_token, "folders": self.folders}, self.cache_path, verbose=False)
+
+    def _full_refresh(self, folder_id: str):
+        if self.start_page_token is None:
+            # 목록을 받기 전에 token을 받아두어야, 목록을 받는 중에 생긴 변경도 다음 갱신 때 반영됨
+            self.start_page_token = self.gd_helper.service.changes().getStartPageToken().execute()["startPageToken"]
+        files = {file["id"]: file for file in self.gd_helper.iter_files(folder_id)}
+        self.folders[folder_id] = {"synced_at": get_current_timestamp("s"), "files": files}
+        logger.debug(f"Index google drive folder {folder_id}: {len(files)} files")
+
+    def _apply_changes(self):
+        page_token = self.start_page_token
+        while page_token is not None:
+            results = (
+                self.gd_helper.service.changes()
+                .list(pageToken=page_token, fields=self.CHANGE_FIELDS, pageSize=GD_LIST_PAGE_SIZE, spaces="drive")
+                .execute()
+            )
+            for change in results.get("changes", []):
+                self._apply_change(change)
+            if "newStartPageToken" in results:
+                self.start_page_token = results["newStartPageToken"]
+            page_token = results.get("nextPageToken")
+
+    def _apply_change(self, change: dict):
+        file = change.get("file")
+        for folder_id, folder in self.folders.items():
+            if change.get("removed") or file is None or file.get("trashed") or folder_id not in file.get("parents", []):
+                folder["files"].pop(change["fileId"], None)
+            else:
+                folder["files"][file["id"]] = {k: v for k, v in file.items() if k != "trashed"}
+
+    def refresh(self, folder_id: str, force: bool = False):
+        with self._lock:
+            now = get_current_timestamp("s")
+            folder = self.folders.get(folder_id)
+            need_full_refresh = force or folder is None or now - folder["synced_at"] > self.max_age
+            if not need_full_refresh and now - self._checked_at < self.refresh_interval:
+                return
+
+            if self.start_page_token is not None:
+                self._apply_changes()
+            if need_full_refresh:
+                self._full_refresh(folder_id)
+            self._checked_at = now
+            self._save()
+
+    def list_files(self, folder_id: str) -> list[dict]:
+        self.refresh(folder_id)
+        return list(self.folders[folder_id]["files"].values())
+
+    def get_id(self, filename: str, folder_id: str) -> str:
+        files = [file for file in self.list_files(folder_id) if file["name"] == filename]
+        if not files:
+            raise ValueError(f"File '{filename}' not found in folder {folder_id}")
+        if len(files) > 1:
+            raise ValueError(f"Multiple files named '{filename}' found in folder {folder_id}")
+        return files[0]["id"]
+
+    def add(self, file: dict):
+        """업로드 등으로 생긴 파일을 바로 인덱스에 반영. file은 GD_FILE_FIELDS를 포함해야 함"""
+        with self._lock:
+            for parent_id in file.get("parents", []):
+                if parent_id in self.folders:
+                    self.folders[parent_id]["files"][file["id"]] = file
+            self._save()
+
+    def get_metadata(self, file_ids: list[str]) -> list[dict]:
+        """여러 파일의 메타데이터를 batch 요청 한 번으로 받아옴"""
+        requests = [self.gd_helper.service.files().get(fileId=file_id, fields=GD_FILE_FIELDS) for file_id in file_ids]
+        responses = self.gd_helper.execute_batch(requests)
+        for response in responses:
+            if isinstance(response, Exception):
+                raise response
+        return responses
+
+    def move_files(self, file_ids: list[str], new_folder_id: str) -> list[dict]:
+        """여러 파일을 batch 요청으로 이동. 인덱스에 있는 부모 폴더 정보를 사용하므로 부모 조회 요청이 필요 없음"""
+        with self._lock:
+            parents_dict = {
+                file_id: folder["files"][file_id]["parents"]
+                for folder in self.folders.values()
+                for file_id in file_ids
+                if file_id in folder["files"]
+            }
+        unknown_ids = [file_id for file_id in file_ids if file_id not in parents_dict]
+        if unknown_ids:
+            parents_dict.update({file["id"]: file.get("parents", []) for file in self.get_metadata(unknown_ids)})
+
+        requests = [self.gd_helper.move_request(file_id, new_folder_id, parents_dict[file_id]) for file_id in file_ids]
+        responses = self.gd_helper.execute_batch(requests)
+
+        with self._lock:
+            for file_id in file_ids:
+                self._apply_change({"fileId": file_id, "removed": True})
+        for response in responses:
+            if isinstance(response, Exception):
+                raise Exception(f"Error moving files to folder {new_folder_id}: {str(response)}")
+            self.add(response)
+        return responses
+
+
+class GoogleDrivePathResolver:
+    """GD_BASE_FOLDER 기준 경로(ex. "ssk_gpt_manager/result")의 file id를 처음 필요할 때 조회하고,
+    조회 결과는 메모리와 로컬 파일에 캐시하여 다음 실행부터는 Drive를 조회하지 않음"""
+
+    def __init__(self, base_folder_id: str, cache_path: Path = GD_ID_CACHE_PATH) -> None:
+        self.base_folder_id = base_folder_id
+        self.cache_path = Path(cache_path)
+        self._gd_helper = None
+        self._lock = threading.RLock()
+        self._cache = self._load_cache()
+
+    def _load_cache(self) -> dict[str, str]:
+        if not self.cache_path.is_file() or self.cache_path.stat().st_size == 0:
+            return {}
+        try:
+            return load_obj(self.cache_path).get(self.base_folder_id, {})
+        except Exception as e:
+            logger.warning(f"Cannot load google drive id cache({self.cache_path}): {e}")
+            return {}
+
+    def _save_cache(self):
+        cache_all = {}
+        if self.cache_path.is_file() and self.cache_path.stat().st_size > 0:
+            cache_all = load_obj(self.cache_path)
+        cache_all[self.base_folder_id] = self._cache
+        save_obj(cache_all, self.cache_path, verbose=False)
+
+    @property
+    def gd_helper(self) -> "GoogleDriveHelper":
+        if self._gd_helper is None:
+            self._gd_helper = GoogleDriveHelper(self.base_folder_id)
+        return self._gd_helper
+
+    def peek(self, path: str) -> Optional[str]:
+        """Drive 조회 없이 캐시된 id만 반환"""
+        return self._cache.get(path)
+
+    def get_id(self, path: str) -> str:
+        with self._lock:
+            if path in self._cache:
+                return self._cache[path]
+
+            parent_path, _, name = path.rpartition("/")
+            parent_id = self.get_id(parent_path) if parent_path else self.base_folder_id
+            self._cache[path] = self.gd_helper.get_file_id(name, folder_id=parent_id)
+            self._save_cache()
+            logger.info(f"Resolve google drive id: {path} -> {self._cache[path]}")
+            return self._cache[path]
+
+    def invalidate(self, path: Optional[str] = None):
+        with self._lock:
+            if path is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(path, None)
+            self._save_cache()
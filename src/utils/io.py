@@ -12,7 +12,6 @@ from pathlib import Path
 from typing import Collection, Optional, Union
 
 import aiofiles
-import aiohttp
 import orjson
 import requests
 
@@ -257,6 +256,23 @@ def remove_all_files_in_dir(dir_path):
         os.remove(f)
 
 
+def remove_old_files_in_dir(dir_path, max_age: float, pattern: str = "*") -> int:
+    """dir_path에서 pattern에 맞고 마지막 수정 후 max_age초가 지난 파일을 지우고 지운 개수를 반환"""
+    dir_path = Path(dir_path)
+    if not dir_path.is_dir():
+        return 0
+    expire_time = datetime.now().timestamp() - max_age
+    num_removed = 0
+    for f in dir_path.glob(pattern):
+        try:
+            if f.is_file() and f.stat().st_mtime < expire_time:
+                f.unlink()
+                num_removed += 1
+        except FileNotFoundError:  # 다른 세션이 먼저 지운 경우
+            continue
+    return num_removed
+
+
 def get_relative_path(path: Path, num_from_end: int):
     return Path(*Path(path).parts[-num_from_end:])
 
@@ -286,10 +302,15 @@ async def fetch(
     params: Optional[dict] = None,
     data: Optional[dict] = None,
 ) -> tuple[dict, int]:
-    async with aiohttp.ClientSession() as session:
-        async with session.request(method, url, headers=headers, params=params, json=data) as response:
+    """background_loop의 공유 session(keep-alive)으로 요청"""
+    from src.utils.event_loop import background_loop  # openai 등의 import를 실제로 필요할 때로 미룸
+
+    async def _fetch():
+        async with background_loop.session.request(method, url, headers=headers, params=params, json=data) as response:
             return await response.json(), response.status
 
+    return await background_loop.arun(_fetch())
+
 
 def is_valid_url(url):
     try:
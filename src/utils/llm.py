@@ -1,4 +1,18 @@
-import tiktoken
+from functools import lru_cache
+
+from src.common.consts import CASCADE_MODEL_INFOS, MODEL_TYPE_INFOS
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str):
+    """model의 tokenizer. tiktoken은 import와 인코딩 파일 로드가 느리므로 처음 필요할 때 로드"""
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        print("Warning: model not found. Using cl100k_base encoding.")
+        return tiktoken.get_encoding("cl100k_base")
 
 
 def num_tokens_from_messages(messages: list[dict[str, str]], model="gpt-3.5-turbo-0613"):
@@ -15,11 +29,7 @@ def num_tokens_from_messages(messages: list[dict[str, str]], model="gpt-3.5-turb
         }
     ]
     """
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        print("Warning: model not found. Using cl100k_base encoding.")
-        encoding = tiktoken.get_encoding("cl100k_base")
+    encoding = get_encoding(model)
     if model in {
         "gpt-3.5-turbo-0613",
         "gpt-3.5-turbo-16k-0613",
@@ -55,3 +65,24 @@ def num_tokens_from_messages(messages: list[dict[str, str]], model="gpt-3.5-turb
                 num_tokens += tokens_per_name
     num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
     return num_tokens
+
+
+def get_model_info(model_name: str) -> dict:
+    for model_info in MODEL_TYPE_INFOS + CASCADE_MODEL_INFOS:
+        if model_info["name"] == model_name:
+            return model_info
+    raise ValueError(f"Unknown model: {model_name}")
+
+
+def compute_cost(model_name: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """토큰 사용량에 대한 비용(USD)"""
+    model_info = get_model_info(model_name)
+    return (prompt_tokens * model_info["input_price"] + completion_tokens * model_info["output_price"]) / 1_000_000
+
+
+def compute_result_cost(result: dict) -> float:
+    """Generator.agenerate 결과의 모든 LLM 호출 비용(USD)"""
+    return sum(
+        compute_cost(usage["model_name"], usage["prompt_tokens"], usage["completion_tokens"])
+        for usage in result["llm_usages"]
+    )
@@ -0,0 +1,253 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import openai
+from openai.error import (
+    APIConnectionError,
+    APIError,
+    AuthenticationError,
+    PermissionError,
+    RateLimitError,
+    ServiceUnavailableError,
+    Timeout,
+    TryAgain,
+)
+
+from src import logger
+from src.common.consts import (
+    CASCADE_MODEL_INFOS,
+    LLM_CIRCUIT_COOLDOWN,
+    LLM_CIRCUIT_FAILURE_THRESHOLD,
+    LLM_CIRCUIT_MAX_COOLDOWN,
+    LLM_REQUEST_TIMEOUT,
+    MODEL_TYPE_INFOS,
+    OPENAI_RETRIES,
+)
+from src.utils.llm_traffic import get_llm_backend
+from src.utils.metrics import metrics
+from src.utils.usage_ledger import usage_ledger
+
+# 다른 endpoint로 옮겨서 다시 시도할 오류
+RETRYABLE_ERRORS = (RateLimitError, Timeout, TryAgain, APIConnectionError, ServiceUnavailableError, APIError)
+# 해당 endpoint의 설정 문제이므로 endpoint를 바로 차단하고 다른 endpoint로 시도할 오류
+ENDPOINT_ERRORS = (AuthenticationError, PermissionError)
+
+
+class CircuitState:
+    CLOSED = "closed"  # 정상
+    OPEN = "open"  # 차단: cooldown이 끝날 때까지 요청을 보내지 않음
+    HALF_OPEN = "half_open"  # cooldown 후 시험 요청 하나만 보내는 상태
+
+
+class Endpoint:
+    """같은 모델을 제공하는 하나의 API endpoint(OpenAI 계정, Azure deployment 등)와 그 상태
+
+    endpoint_info 예시(MODEL_TYPE_INFOS의 "endpoints"):
+        {"id": "openai"}  # 기본 openai 설정(openai.api_key) 사용
+        {"id": "openai-sub", "api_key_env": "OPENAI_API_KEY_SUB"}
+        {"id": "azure-kr", "api_type": "azure", "api_base": "https://...", "api_version": "2024-02-01",
+         "api_key_env": "AZURE_OPENAI_API_KEY", "deployment_id": "gpt-4"}
+    """
+
+    def __init__(self, model_name: str, endpoint_info: dict) -> None:
+        self.model_name = model_name
+        self.id = endpoint_info["id"]
+        self.endpoint_info = endpoint_info
+
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.open_count = 0  # 연속으로 차단된 횟수. cooldown을 늘리는 데 사용
+        self.open_until = 0.0
+        self.in_flight = 0
+        self.num_success = 0
+        self.num_failure = 0
+        self.latency_ewma: Optional[float] = None
+
+    def request_params(self) -> dict:
+        params = {}
+        for key in ["api_type", "api_base", "api_version", "deployment_id"]:
+            if key in self.endpoint_info:
+                params[key] = self.endpoint_info[key]
+        if "api_key_env" in self.endpoint_info:  # 환경 변수는 .env가 로드된 뒤인 호출 시점에 읽음
+            params["api_key"] = os.getenv(self.endpoint_info["api_key_env"])
+        if "deployment_id" not in params:
+            params["model"] = self.endpoint_info.get("model", self.model_name)
+        return params
+
+    def is_available(self, now: float) -> bool:
+        if self.state == CircuitState.OPEN and now >= self.open_until:
+            self.state = CircuitState.HALF_OPEN
+        if self.state == CircuitState.HALF_OPEN:
+            return self.in_flight == 0  # 시험 요청은 하나만
+        return self.state == CircuitState.CLOSED
+
+    def record_success(self, latency: float) -> None:
+        self.num_success += 1
+        self.consecutive_failures = 0
+        self.open_count = 0
+        self.state = CircuitState.CLOSED
+        self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+    def record_failure(self, now: float, retry_after: Optional[float] = None, force_open: bool = False) -> None:
+        self.num_failure += 1
+        self.consecutive_failures += 1
+        if self.state == CircuitState.OPEN:  # 차단 전에 보낸 요청들의 실패는 cooldown을 늘리지 않음
+            return
+        if (
+            force_open
+            or self.state == CircuitState.HALF_OPEN
+            or self.consecutive_failures >= LLM_CIRCUIT_FAILURE_THRESHOLD
+        ):
+            cooldown = min(LLM_CIRCUIT_COOLDOWN * 2**self.open_count, LLM_CIRCUIT_MAX_COOLDOWN)
+            if retry_after is not None:
+                cooldown = max(cooldown, retry_after)
+            self.state = CircuitState.OPEN
+            self.open_until = now + cooldown
+            self.open_count += 1
+            logger.warning(f"LLM endpoint {self.model_name}/{self.id} is open for {cooldown:.0f}s")
+
+    def get_health(self) -> dict:
+        return {
+            "model_name": self.model_name,
+            "endpoint": self.id,
+            "state": self.state,
+            "in_flight": self.in_flight,
+            "num_success": self.num_success,
+            "num_failure": self.num_failure,
+            "latency_ewma": self.latency_ewma,
+            "open_until": self.open_until if self.state == CircuitState.OPEN else None,
+        }
+
+
+def get_retry_after(e: Exception) -> Optional[float]:
+    headers = getattr(e, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMRouter:
+    """모델별 endpoint 목록에서 건강한 endpoint를 골라 ChatCompletion을 호출
+
+    - endpoint마다 circuit breaker를 두어, 429/timeout 등이 LLM_CIRCUIT_FAILURE_THRESHOLD번 연속되면
+      cooldown 동안 요청을 보내지 않음(반복되면 cooldown을 두 배씩 늘림). cooldown 후에는 시험 요청 하나로 복구 여부를 확인
+    - 실패한 요청은 다른 endpoint로 옮겨서 다시 시도하며, 쓸 수 있는 endpoint가 없으면 가장 빨리 풀리는 endpoint를 기다림
+    - 상태는 여러 세션(thread)과 event loop에서 공유하므로 lock으로 보호함. lock 안에서는 await하지 않음
+    """
+
+    def __init__(self, model_infos: list[dict], max_attempts: int = OPENAI_RETRIES, backend=None) -> None:
+        """
+        Args:
+            backend: openai.ChatCompletion.acreate 대신 호출할 함수(ex. ReplayBackend.acreate)
+        """
+        self.model_infos = model_infos
+        self.max_attempts = max_attempts
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """모든 endpoint의 상태(circuit, 통계)를 초기화"""
+        with self._lock:
+            self.endpoints_dict = {
+                model_info["name"]: [
+                    Endpoint(model_info["name"], endpoint_info)
+                    for endpoint_info in model_info.get("endpoints", [{"id": "openai"}])
+                ]
+                for model_info in self.model_infos
+            }
+
+    def _acquire(self, model_name: str, exclude: set[str]) -> tuple[Optional[Endpoint], float]:
+        """쓸 수 있는 endpoint 중 in-flight가 적고 빠른 것을 골라 in_flight를 늘림. 없으면 (None, 기다릴 시간)"""
+        now = time.monotonic()
+        with self._lock:
+            endpoints = self.endpoints_dict[model_name]
+            candidates = [endpoint for endpoint in endpoints if endpoint.is_available(now)]
+            # 방금 실패한 endpoint는 다른 후보가 있을 때만 제외
+            candidates = [endpoint for endpoint in candidates if endpoint.id not in exclude] or candidates
+            if not candidates:
+                wait = min(endpoint.open_until for endpoint in endpoints) - now
+                return None, max(wait, 0.1)
+            endpoint = min(candidates, key=lambda endpoint: (endpoint.in_flight, endpoint.latency_ewma or 0.0))
+            endpoint.in_flight += 1
+            return endpoint, 0.0
+
+    def _release(self, endpoint: Endpoint, error: Optional[Exception] = None, latency: Optional[float] = None) -> None:
+        """in_flight를 줄이고 결과를 반영. error와 latency가 모두 None이면 결과는 반영하지 않음"""
+        with self._lock:
+            endpoint.in_flight -= 1
+            if error is None and latency is not None:
+                endpoint.record_success(latency)
+            elif error is not None:
+                endpoint.record_failure(
+                    time.monotonic(), retry_after=get_retry_after(error), force_open=isinstance(error, ENDPOINT_ERRORS)
+                )
+
+    async def acreate(self, model: str, usage_meta: Optional[dict] = None, **kwargs):
+        """openai.ChatCompletion.acreate와 같은 인자로 호출
+
+        Args:
+            usage_meta: usage_ledger에 함께 기록할 정보(category_id, category_version 등)
+        """
+        usage_meta = usage_meta or {}
+        if model not in self.endpoints_dict:
+            raise ValueError(f"Unknown model: {model}")
+        max_attempts = self.max_attempts * len(self.endpoints_dict[model])
+        exclude = set()
+        for attempt in range(1, max_attempts + 1):
+            t = time.monotonic()
+            endpoint, wait = self._acquire(model, exclude)
+            while endpoint is None:
+                logger.warning(f"No available LLM endpoint for {model}. Wait {wait:.1f}s")
+                await asyncio.sleep(wait)
+                endpoint, wait = self._acquire(model, exclude)
+            metrics.record("llm_queue_wait", time.monotonic() - t, model=model)
+            call_info = {"endpoint": endpoint.id, "n": kwargs.get("n", 1), "retries": attempt - 1, **usage_meta}
+
+            t = time.monotonic()
+            error = None
+            try:
+                acreate = self.backend or openai.ChatCompletion.acreate
+                resp = await acreate(**endpoint.request_params(), request_timeout=LLM_REQUEST_TIMEOUT, **kwargs)
+            except (*RETRYABLE_ERRORS, *ENDPOINT_ERRORS) as e:
+                error = e
+            except BaseException as e:
+                # 요청 자체의 문제(InvalidRequestError 등)나 취소는 endpoint 상태에 반영하지 않음
+                self._release(endpoint)
+                latency = time.monotonic() - t
+                metrics.record("llm_request", latency, model=model, endpoint=endpoint.id, status=e.__class__.__name__)
+                if isinstance(e, Exception):
+                    usage_ledger.record(model, latency=latency, status=e.__class__.__name__, **call_info)
+                raise
+            latency = time.monotonic() - t
+            self._release(endpoint, error=error, latency=latency)
+            status = "ok" if error is None else error.__class__.__name__
+            metrics.record("llm_request", latency, model=model, endpoint=endpoint.id, status=status)
+            if error is None:
+                usage = resp.get("usage") if isinstance(resp, dict) else None  # stream이면 usage가 없음
+                usage_ledger.record(model, usage=usage, latency=latency, **call_info)
+                return resp
+
+            logger.warning(
+                f"LLM request to {model}/{endpoint.id} failed({attempt}/{max_attempts}): "
+                + f"{error.__class__.__name__}: {error}"
+            )
+            if attempt == max_attempts:
+                usage_ledger.record(model, latency=latency, status=status, **call_info)
+                raise error
+            exclude = {endpoint.id}
+            # 모든 endpoint가 실패하는 경우를 대비해 조금씩 늘려가며 쉼
+            backoff = min(2 ** (attempt // len(self.endpoints_dict[model])), 30)
+            await asyncio.sleep(backoff * random.uniform(0.5, 1))
+
+    def get_health(self) -> list[dict]:
+        with self._lock:
+            return [endpoint.get_health() for endpoints in self.endpoints_dict.values() for endpoint in endpoints]
+
+
+llm_router = LLMRouter(MODEL_TYPE_INFOS + CASCADE_MODEL_INFOS, backend=get_llm_backend())
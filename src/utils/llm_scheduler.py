@@ -0,0 +1,233 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from src.common.consts import (
+    LLM_SCHEDULER_MAX_FLOWS,
+    LLM_SCHEDULER_MAX_IN_FLIGHT,
+    LLM_SCHEDULER_POLL_INTERVAL,
+    LLM_SCHEDULER_TOKENS_PER_MINUTE,
+)
+from src.utils.metrics import metrics
+
+_flow_var = contextvars.ContextVar("llm_scheduler_flow", default=("default", 1.0))
+
+
+class Ticket:
+    """대기열에 들어간 LLM 요청 하나"""
+
+    def __init__(self, flow_id: str, cost: int, start_tag: float, weight: float, loop: asyncio.AbstractEventLoop):
+        self.flow_id = flow_id
+        self.cost = cost  # 예상 토큰 수. 허가할 때 token budget에서 미리 빼고, 끝나면 실제 사용량과의 차이를 돌려받음
+        self.start_tag = start_tag
+        self.finish_tag = start_tag + cost / weight
+        self.loop = loop
+        self.waker = loop.create_future()
+        self.granted = False
+        self.cancelled = False
+        self.enqueued_at = time.monotonic()
+
+
+class FlowStats:
+    def __init__(self, flow_id: str) -> None:
+        self.flow_id = flow_id
+        self.weight = 1.0
+        self.last_finish_tag = 0.0
+        self.waiting = 0
+        self.in_flight = 0
+        self.num_granted = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "flow_id": self.flow_id,
+            "weight": self.weight,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "num_granted": self.num_granted,
+            "avg_wait": self.wait_sum / self.num_granted if self.num_granted else None,
+            "max_wait": self.wait_max,
+        }
+
+
+class LLMScheduler:
+    """프로세스 전체의 LLM 요청이 거쳐가는 대기열. 세션(flow)마다 weighted fair queuing으로 순서를 정함
+
+    - 동시에 보내는 요청 수(max_in_flight)와 분당 토큰 수(tokens_per_minute, token bucket)를 모든 세션이 나눠 씀
+    - 요청마다 flow의 이전 finish tag(또는 현재 virtual time) + 예상 토큰 수 / weight를 finish tag로 붙이고,
+      budget이 허락할 때 finish tag가 가장 작은 요청부터 보냄. 파일이 많은 세션의 요청은 tag가 빠르게 커지므로
+      파일이 적은 세션의 요청이 그 뒤에 오래 밀리지 않음
+    - 요청은 여러 thread의 event loop(background_loop, benchmark의 asyncio.run 등)에서 기다릴 수 있으므로
+      상태는 lock으로 보호하고, 허가는 call_soon_threadsafe로 해당 loop에 알림. lock 안에서는 await하지 않음
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = LLM_SCHEDULER_MAX_IN_FLIGHT,
+        tokens_per_minute: Optional[int] = LLM_SCHEDULER_TOKENS_PER_MINUTE,
+        max_flows: int = LLM_SCHEDULER_MAX_FLOWS,
+    ) -> None:
+        """
+        Args:
+            tokens_per_minute: None이면 토큰 수는 제한하지 않음
+        """
+        self.max_in_flight = max_in_flight
+        self.tokens_per_minute = tokens_per_minute
+        self.max_flows = max_flows
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._queue: list[tuple[float, int, Ticket]] = []  # (finish_tag, 순번, ticket)
+            self._counter = itertools.count()
+            self._flows: OrderedDict[str, FlowStats] = OrderedDict()
+            self._virtual_time = 0.0
+            self._in_flight = 0
+            self._tokens = float(self.tokens_per_minute or 0)
+            self._refilled_at = time.monotonic()
+
+    @staticmethod
+    @contextmanager
+    def flow(flow_id: str, weight: float = 1.0) -> Iterator[None]:
+        """with 블록 안(이어지는 asyncio task 포함)의 LLM 요청을 flow_id의 요청으로 스케줄링
+
+        weight가 클수록 같은 시간 동안 더 많은 토큰을 배정받음
+        """
+        token = _flow_var.set((flow_id, weight))
+        try:
+            yield
+        finally:
+            _flow_var.reset(token)
+
+    def _refill(self, now: float) -> None:
+        if self.tokens_per_minute is not None:
+            self._tokens = min(
+                self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60, self.tokens_per_minute
+            )
+        self._refilled_at = now
+
+    def _dispatch(self, now: float) -> Optional[float]:
+        """budget이 허락하는 만큼 앞에서부터 허가. token이 모자라 멈췄으면 다시 확인할 때까지의 시간"""
+        self._refill(now)
+        while self._queue and self._in_flight < self.max_in_flight:
+            _, _, ticket = self._queue[0]
+            if ticket.cancelled:
+                heapq.heappop(self._queue)
+                continue
+            # 한 요청이 bucket 크기보다 크면 bucket이 가득 찼을 때 보냄
+            cost = min(ticket.cost, self.tokens_per_minute) if self.tokens_per_minute is not None else 0
+            if cost > self._tokens:
+                return (cost - self._tokens) * 60 / self.tokens_per_minute
+            heapq.heappop(self._queue)
+            self._tokens -= cost
+            self._in_flight += 1
+            self._virtual_time = max(self._virtual_time, ticket.start_tag)
+
+            flow = self._flows[ticket.flow_id]
+            wait = now - ticket.enqueued_at
+            flow.waiting -= 1
+            flow.in_flight += 1
+            flow.num_granted += 1
+            flow.wait_sum += wait
+            flow.wait_max = max(flow.wait_max, wait)
+            ticket.granted = True
+            ticket.loop.call_soon_threadsafe(_wake, ticket.waker)
+        return None
+
+    def _get_flow(self, flow_id: str) -> FlowStats:
+        flow = self._flows.get(flow_id)
+        if flow is None:
+            flow = self._flows[flow_id] = FlowStats(flow_id)
+            # 기다리거나 실행 중인 요청이 없는 오래된 flow부터 정리
+            for old_flow in list(self._flows.values()):
+                if len(self._flows) <= self.max_flows:
+                    break
+                if not old_flow.waiting and not old_flow.in_flight:
+                    del self._flows[old_flow.flow_id]
+        self._flows.move_to_end(flow_id)
+        return flow
+
+    async def acquire(self, cost: int) -> Ticket:
+        """현재 flow의 차례가 되고 budget이 생길 때까지 기다림. 요청이 끝나면 release에 반환값을 넘겨야 함
+
+        Args:
+            cost: 요청의 예상 토큰 수(입력 + 최대 출력)
+        """
+        flow_id, weight = _flow_var.get()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            flow = self._get_flow(flow_id)
+            flow.weight = weight
+            ticket = Ticket(flow_id, cost, max(self._virtual_time, flow.last_finish_tag), weight, loop)
+            flow.last_finish_tag = ticket.finish_tag
+            flow.waiting += 1
+            heapq.heappush(self._queue, (ticket.finish_tag, next(self._counter), ticket))
+            retry_after = self._dispatch(time.monotonic())
+
+        try:
+            while not ticket.granted:
+                # 허가되면 바로 깨어나고, 아니면 token이 다시 찼는지 주기적으로 확인
+                timeout = min(retry_after, LLM_SCHEDULER_POLL_INTERVAL) if retry_after else LLM_SCHEDULER_POLL_INTERVAL
+                try:
+                    await asyncio.wait_for(asyncio.shield(ticket.waker), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                with self._lock:
+                    retry_after = self._dispatch(time.monotonic())
+        except BaseException:
+            with self._lock:
+                if ticket.granted:
+                    self._release(ticket)
+                else:
+                    ticket.cancelled = True
+                    self._flows[flow_id].waiting -= 1
+                self._dispatch(time.monotonic())
+            raise
+        metrics.record("llm_scheduler_wait", time.monotonic() - ticket.enqueued_at)
+        return ticket
+
+    def _release(self, ticket: Ticket, used_tokens: Optional[int] = None) -> None:
+        self._in_flight -= 1
+        self._flows[ticket.flow_id].in_flight -= 1
+        if used_tokens is not None and self.tokens_per_minute is not None:  # 예상보다 적게 썼으면 돌려받음
+            self._tokens = min(
+                self._tokens + min(ticket.cost, self.tokens_per_minute) - used_tokens, self.tokens_per_minute
+            )
+
+    def release(self, ticket: Ticket, used_tokens: Optional[int] = None) -> None:
+        """
+        Args:
+            used_tokens: 실제 사용한 토큰 수. None이면 예상 토큰 수를 그대로 사용한 것으로 봄
+        """
+        with self._lock:
+            self._release(ticket, used_tokens)
+            self._dispatch(time.monotonic())
+
+    def get_stats(self) -> dict:
+        """전체 budget 사용 현황과 최근 flow별 대기 현황(최근에 요청한 flow부터)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "waiting": sum(not ticket.cancelled for _, _, ticket in self._queue),
+                "tokens_available": self._tokens if self.tokens_per_minute is not None else None,
+                "tokens_per_minute": self.tokens_per_minute,
+                "flows": [flow.to_dict() for flow in reversed(self._flows.values())],
+            }
+
+
+def _wake(waker: asyncio.Future) -> None:
+    if not waker.done():
+        waker.set_result(None)
+
+
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Optional
+
+from openai.error import RateLimitError, Timeout
+
+from src import logger
+from src.common.consts import LLM_TRAFFIC_MODE, LLM_TRAFFIC_PATH
+
+# 응답에 영향을 주는 요청 인자. endpoint 정보(api_key 등)는 기록하지 않음
+REQUEST_KEYS = ["model", "messages", "response_format", "temperature", "max_tokens", "n"]
+
+
+def make_request_key(request: dict) -> str:
+    payload = json.dumps({key: request.get(key) for key in REQUEST_KEYS}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def to_plain(obj):
+    """OpenAIObject를 json으로 쓸 수 있는 dict로 변환"""
+    return json.loads(json.dumps(obj, default=dict))
+
+
+class TrafficRecorder:
+    """achat_completion의 요청/응답 쌍과 응답 시간을 JSONL로 기록(record 모드)"""
+
+    def __init__(self, path: Path = LLM_TRAFFIC_PATH) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def record(self, request: dict, response, latency: float) -> None:
+        request = {key: request.get(key) for key in REQUEST_KEYS}
+        entry = {
+            "ts": round(time.time(), 3),
+            "key": make_request_key(request),
+            "request": request,
+            "response": to_plain(response),
+            "latency": round(latency, 4),
+        }
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Fail to record LLM traffic: {e}")
+
+
+class ReplayBackend:
+    """기록된 응답을 돌려주는 openai.ChatCompletion.acreate 대체(replay 모드)
+
+    같은 요청(REQUEST_KEYS)의 기록이 여러 개면 순서대로 돌려줌. 기록이 없으면 strict가 아닌 경우
+    같은 모델과 n의 기록 중 하나를 요청에 따라 정해진 것으로 돌려줌(내용은 요청과 맞지 않을 수 있음)
+
+    Args:
+        latency: "recorded"(해당 기록의 응답 시간) | "sampled"(같은 모델의 응답 시간 분포에서 추출) | "none"
+        speed: 응답 시간을 나눌 배수. 2이면 두 배 빠르게 재생
+        rate_limit_rate, timeout_rate: 요청마다 429, timeout을 낼 확률
+        seed: 같은 seed면 요청의 실행 순서와 관계없이 같은 요청은 같은 결과(지연, 오류)를 받음
+    """
+
+    def __init__(
+        self,
+        path: Path = LLM_TRAFFIC_PATH,
+        latency: str = "recorded",
+        speed: float = 1.0,
+        rate_limit_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_delay: float = 0.0,
+        retry_after: Optional[float] = None,
+        strict: bool = False,
+        seed: int = 0,
+    ) -> None:
+        if latency not in ("recorded", "sampled", "none"):
+            raise ValueError(f"Unknown latency mode: {latency}")
+        self.latency = latency
+        self.speed = speed
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_delay = timeout_delay
+        self.retry_after = retry_after
+        self.strict = strict
+        self.seed = seed
+
+        self.entries_dict: dict[str, list[dict]] = defaultdict(list)  # request key -> 기록들
+        self.fallback_dict: dict[tuple, list[dict]] = defaultdict(list)  # (model, n) -> 기록들
+        self.latencies_dict: dict[str, list[float]] = defaultdict(list)  # model -> 응답 시간들
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                request = entry["request"]
+                self.entries_dict[entry["key"]].append(entry)
+                self.fallback_dict[(request["model"], request.get("n") or 1)].append(entry)
+                self.latencies_dict[request["model"]].append(entry["latency"])
+        self.stats = Counter()
+        self._call_counts = Counter()
+        self._lock = threading.Lock()
+        logger.info(f"Loaded {sum(len(v) for v in self.entries_dict.values())} LLM traffic entries from {path}")
+
+    def _count(self, name: str) -> None:
+        # 공유 background loop와 호출한 쪽의 loop에서 동시에 호출되므로 lock 안에서 셈
+        with self._lock:
+            self.stats[name] += 1
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def _find(self, key: str, request: dict, rng: random.Random, count: int) -> dict:
+        if entries := self.entries_dict.get(key):
+            self._count("hit")
+            return entries[count % len(entries)]
+        fallback_entries = self.fallback_dict.get((request["model"], request.get("n") or 1))
+        if self.strict or not fallback_entries:
+            self._count("miss")
+            raise KeyError(f"No recorded LLM response for the request: {key[:12]}")
+        self._count("fallback")
+        return rng.choice(fallback_entries)
+
+    async def acreate(self, **kwargs):
+        request = {key: kwargs.get(key) for key in REQUEST_KEYS}
+        request["model"] = kwargs.get("model") or kwargs.get("deployment_id")
+        key = make_request_key(request)
+        with self._lock:
+            count = self._call_counts[key]
+            self._call_counts[key] += 1
+        rng = random.Random(f"{self.seed}:{key}:{count}")
+
+        roll = rng.random()
+        if roll < self.rate_limit_rate:
+            self._count("rate_limit")
+            headers = {} if self.retry_after is None else {"retry-after": str(self.retry_after)}
+            raise RateLimitError("Injected rate limit", http_status=429, headers=headers)
+        if roll < self.rate_limit_rate + self.timeout_rate:
+            self._count("timeout")
+            await asyncio.sleep(self.timeout_delay)
+            raise Timeout("Injected timeout")
+
+        entry = self._find(key, request, rng, count)
+        if self.latency == "recorded":
+            delay = entry["latency"]
+        elif self.latency == "sampled":
+            delay = rng.choice(self.latencies_dict[request["model"]])
+        else:
+            delay = 0.0
+        await asyncio.sleep(delay / self.speed)
+        return entry["response"]
+
+
+traffic_recorder = TrafficRecorder() if LLM_TRAFFIC_MODE == "record" else None
+
+
+def get_llm_backend():
+    """LLM_TRAFFIC_MODE가 replay이면 기록된 응답을 돌려주는 acreate. 아니면 None(openai.ChatCompletion.acreate 사용)"""
+    if LLM_TRAFFIC_MODE == "replay":
+        return ReplayBackend().acreate
+    return None
@@ -0,0 +1,165 @@
+import contextvars
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+from src import logger
+from src.common.consts import METRICS_MAX_BATCHES, METRICS_PATH, METRICS_QUANTILES, METRICS_WINDOW_SIZE
+
+PROMETHEUS_METRIC_NAME = "sookmyung_span_duration_seconds"
+
+_batch_id_var = contextvars.ContextVar("metrics_batch_id", default=None)
+
+
+def compute_quantiles(durations) -> dict[str, float]:
+    values = np.quantile(np.asarray(durations, dtype=np.float64), METRICS_QUANTILES)
+    return {f"p{round(q * 100)}": float(v) for q, v in zip(METRICS_QUANTILES, values)}
+
+
+def get_current_batch_id() -> Optional[str]:
+    return _batch_id_var.get()
+
+
+class MetricsRecorder:
+    """hot path 단계(span)별 소요 시간을 기록
+
+    - span마다 JSONL 파일에 한 줄씩 기록하고, 배치가 끝나면 span별 p50/p95/p99 요약을 한 줄 더 기록
+    - (span, labels)별 최근 METRICS_WINDOW_SIZE개의 기록으로 Prometheus text format을 만듦
+    - 현재 배치는 contextvars로 전달되므로 asyncio task에는 이어지지만, thread pool에서는
+      contextvars.copy_context().run으로 실행해야 같은 배치로 기록됨
+    """
+
+    def __init__(self, path: Path = METRICS_PATH, window_size: int = METRICS_WINDOW_SIZE) -> None:
+        self.path = Path(path)
+        self.window_size = window_size
+        self._lock = threading.Lock()
+        self._file = None
+        self._windows: dict[tuple, deque] = {}  # (span, labels) -> 최근 소요 시간
+        self._totals: dict[tuple, list] = {}  # (span, labels) -> [count, sum]
+        self._batches: OrderedDict[str, dict[str, list[float]]] = OrderedDict()  # batch_id -> span -> 소요 시간
+
+    def _write(self, entry: dict) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def record(self, name: str, duration: float, batch_id: Optional[str] = None, **labels) -> None:
+        batch_id = batch_id or _batch_id_var.get()
+        labels = {k: str(v) for k, v in labels.items()}
+        key = (name, tuple(sorted(labels.items())))
+        entry = {"ts": round(time.time(), 3), "span": name, "duration": round(duration, 6), "batch_id": batch_id}
+        with self._lock:
+            self._windows.setdefault(key, deque(maxlen=self.window_size)).append(duration)
+            total = self._totals.setdefault(key, [0, 0.0])
+            total[0] += 1
+            total[1] += duration
+            if batch_id in self._batches:
+                self._batches[batch_id][name].append(duration)
+            try:
+                self._write({**entry, **labels})
+            except OSError as e:
+                logger.warning(f"Fail to write metrics: {e}")
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[dict]:
+        """with 블록의 소요 시간을 기록. 블록 안에서 반환된 dict에 label을 추가할 수 있음(ex. 처리 경로)"""
+        t = time.perf_counter()
+        labels["status"] = "ok"
+        try:
+            yield labels
+        except BaseException:
+            labels["status"] = "error"
+            raise
+        finally:
+            self.record(name, time.perf_counter() - t, **labels)
+
+    def start_batch(self, batch_id: str) -> contextvars.Token:
+        """이후 같은 context에서 기록되는 span을 batch_id로 묶음. end_batch에 반환값을 넘겨야 함"""
+        with self._lock:
+            self._batches[batch_id] = defaultdict(list)
+            while len(self._batches) > METRICS_MAX_BATCHES:  # st.stop() 등으로 끝나지 않은 배치
+                self._batches.popitem(last=False)
+        return _batch_id_var.set(batch_id)
+
+    def end_batch(self, token: contextvars.Token) -> dict[str, dict]:
+        """배치의 span별 count, sum, p50/p95/p99를 기록하고 반환"""
+        batch_id = _batch_id_var.get()
+        _batch_id_var.reset(token)
+        with self._lock:
+            durations_dict = self._batches.pop(batch_id, {})
+        summary = {
+            name: {"count": len(durations), "sum": float(np.sum(durations)), **compute_quantiles(durations)}
+            for name, durations in durations_dict.items()
+        }
+        with self._lock:
+            try:
+                self._write(
+                    {"ts": round(time.time(), 3), "type": "batch_summary", "batch_id": batch_id, "spans": summary}
+                )
+            except OSError as e:
+                logger.warning(f"Fail to write metrics: {e}")
+        logger.info(
+            f"Batch {batch_id} spans: "
+            + ", ".join(f"{name} n={s['count']} p50={s['p50']:.3f}s p95={s['p95']:.3f}s" for name, s in summary.items())
+        )
+        return summary
+
+    def to_prometheus(self) -> str:
+        """최근 기록의 분위수와 누적 count/sum을 Prometheus summary 형식으로 반환"""
+        lines = [
+            f"# HELP {PROMETHEUS_METRIC_NAME} Duration of each processing stage",
+            f"# TYPE {PROMETHEUS_METRIC_NAME} summary",
+        ]
+        with self._lock:
+            items = [(key, list(window), tuple(self._totals[key])) for key, window in self._windows.items()]
+        for (name, labels), durations, (count, total) in sorted(items):
+            label_str = ",".join([f'span="{name}"'] + [f'{k}="{v}"' for k, v in labels])
+            values = np.quantile(durations, METRICS_QUANTILES)
+            for q, value in zip(METRICS_QUANTILES, values):
+                lines.append(f'{PROMETHEUS_METRIC_NAME}{{{label_str},quantile="{q}"}} {value:.6f}')
+            lines.append(f"{PROMETHEUS_METRIC_NAME}_sum{{{label_str}}} {total:.6f}")
+            lines.append(f"{PROMETHEUS_METRIC_NAME}_count{{{label_str}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRecorder()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # 요청마다 stderr에 남기지 않음
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int) -> ThreadingHTTPServer:
+    """프로세스당 한 번만 /metrics endpoint를 백그라운드로 시작"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info(f"Metrics server started: http://0.0.0.0:{port}/metrics")
+    return _server
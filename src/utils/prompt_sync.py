@@ -0,0 +1,106 @@
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from src import logger
+from src.common.consts import PROMPT_PER_CATEGORY_DIR, PROMPT_SYNC_MANIFEST_PATH, PROMPT_SYNC_MAX_WORKERS
+from src.utils.io import load_obj, save_obj
+from src.utils.storage import get_docs_file_url, get_prompt_folder_id, get_storage
+
+
+class PromptSyncer:
+    """저장소 prompt 폴더의 .toml 파일들을 로컬 PROMPT_PER_CATEGORY_DIR로 동기화
+
+    저장소의 modifiedTime/md5Checksum을 manifest로 저장해두고, 달라진 파일만 동시에 다운로드함.
+    파일은 임시 파일에 받은 뒤 교체하고, manifest는 교체한 뒤에만 갱신함.
+    다운로드한 파일은 mtime이 바뀌므로 CategoryRegistry.refresh()에서 다시 읽힘. version은 동기화로 로컬 파일이 바뀔 때마다 증가함
+    """
+
+    def __init__(
+        self,
+        local_dir: Path = PROMPT_PER_CATEGORY_DIR,
+        manifest_path: Path = PROMPT_SYNC_MANIFEST_PATH,
+        max_workers: int = PROMPT_SYNC_MAX_WORKERS,
+    ) -> None:
+        self.local_dir = Path(local_dir)
+        self.manifest_path = Path(manifest_path)
+        self.max_workers = max_workers
+        self.version = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _load_manifest(self) -> dict[str, dict]:
+        if not self.manifest_path.is_file() or self.manifest_path.stat().st_size == 0:
+            return {}
+        return load_obj(self.manifest_path)
+
+    def _download(self, file_info: dict) -> dict:
+        # CategoryRegistry.refresh()가 쓰는 도중의 파일을 읽지 않도록 같은 폴더의 임시 파일에 받은 뒤 교체
+        fd, tmp_path = tempfile.mkstemp(dir=self.local_dir, prefix=f".{file_info['name']}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            get_storage().download(file_info["id"], tmp_path)
+            os.replace(tmp_path, self.local_dir / file_info["name"])
+        finally:
+            Path(tmp_path).unlink(missing_ok=True)
+        logger.info(f"Complete to download prompt file: {file_info['name']}")
+        return file_info
+
+    def sync(self) -> list[str]:
+        """변경된 prompt 파일을 다운로드하고, 다운로드한 파일명 목록을 반환"""
+        folder_id = get_prompt_folder_id()
+        logger.info(f"Start to sync prompt files from storage: {folder_id}")
+        manifest = self._load_manifest()
+        file_infos = get_storage().list_files(folder_id)
+
+        to_download = []
+        for file_info in file_infos:
+            if Path(file_info["name"]).suffix != ".toml":
+                continue
+            prev_info = manifest.get(file_info["name"])
+            if (
+                prev_info is None
+                or prev_info["id"] != file_info["id"]
+                or prev_info.get("md5Checksum") != file_info.get("md5Checksum")
+                or prev_info.get("modifiedTime") != file_info.get("modifiedTime")
+                or not (self.local_dir / file_info["name"]).is_file()
+            ):
+                to_download.append(file_info)
+
+        downloaded = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._download, file_info) for file_info in to_download]
+            for future in as_completed(futures):
+                try:
+                    file_info = future.result()
+                except Exception as e:
+                    logger.error(f"Fail to download prompt file: {e}")
+                    continue
+                manifest[file_info["name"]] = file_info
+                downloaded.append(file_info["name"])
+
+        save_obj(manifest, self.manifest_path, verbose=False)
+        if downloaded:
+            self.version += 1
+        logger.info(f"Complete to sync prompt files: {len(downloaded)} downloaded, {len(file_infos)} in storage")
+        return downloaded
+
+    def _run(self):
+        try:
+            self.sync()
+            get_docs_file_url()  # 첫 화면에서 원격 조회 없이 링크를 보여줄 수 있도록 미리 캐시
+        except Exception as e:
+            logger.exception(f"Fail to sync prompt files from storage: {e.__class__.__name__}: {e}")
+
+    def start_background(self) -> threading.Thread:
+        """프로세스당 한 번만 백그라운드 동기화를 시작"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="prompt-syncer", daemon=True)
+                self._thread.start()
+        return self._thread
+
+
+prompt_syncer = PromptSyncer()
@@ -0,0 +1,93 @@
+import importlib
+import importlib.metadata
+import subprocess
+import sys
+import threading
+import time
+
+from src import logger
+
+_fixup_lock = threading.Lock()
+_fixup_done = False
+
+
+def install_requirements():
+    """google_drive에서 pycrypt라이브러리 내 sytax error로 인해 발생하는 문제 해결을 위해 pycrypt 삭제
+    직접적으로 설치되지 않으나 streamlit 자체에서 설치되는듯.
+    현재 관리되지 않는 pycrypt 대신 pycryptodome~=3.20.0를 설치하여 사용
+
+    스크립트가 다시 실행될 때마다 호출되므로 프로세스당 한 번만 확인하며, pycrypt가 설치되어 있을 때만 pip를 실행함
+    (한 번 삭제한 뒤에는 재배포 전까지 pip를 다시 실행하지 않음)
+    """
+    global _fixup_done
+    with _fixup_lock:
+        if _fixup_done:
+            return
+        _fixup_done = True
+        try:
+            importlib.metadata.distribution("pycrypt")
+        except importlib.metadata.PackageNotFoundError:
+            logger.info("pycrypt not installed, skipping uninstall.")
+            return
+        try:
+            subprocess.run([sys.executable, "-m", "pip", "uninstall", "-y", "pycrypt"], check=True)
+            logger.info("pycrypt uninstalled.")
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Fail to uninstall pycrypt: {e}")
+
+
+def _warmup_tokenizer():
+    from src.common.consts import MODEL_TYPE_INFOS
+    from src.utils.llm import get_encoding
+
+    get_encoding(MODEL_TYPE_INFOS[0]["name"])
+
+
+def _warmup_parser():
+    from src.processor.reader import load_partition
+
+    load_partition()
+
+
+def _warmup_warehouse():
+    importlib.import_module("src.utils.warehouse")
+
+
+class Warmup:
+    """첫 화면을 그린 뒤 무거운 모듈(토크나이저, 문서 파서 등)을 백그라운드에서 미리 로드
+
+    각 단계는 실제로 필요할 때 lazy import되므로, warmup이 끝나기 전에 요청이 들어와도 동작에는 문제가 없음
+    """
+
+    steps = {
+        "tokenizer": _warmup_tokenizer,
+        "parser": _warmup_parser,
+        "warehouse": _warmup_warehouse,
+    }
+
+    def __init__(self) -> None:
+        self.elapsed_times: dict[str, float] = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _run(self):
+        for name, step in self.steps.items():
+            t = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                logger.warning(f"Fail to warm up {name}: {e.__class__.__name__}: {e}")
+                continue
+            self.elapsed_times[name] = time.perf_counter() - t
+        logger.info(f"Complete to warm up: {', '.join(f'{k} {v:.2f}s' for k, v in self.elapsed_times.items())}")
+
+    def start_background(self) -> threading.Thread:
+        """프로세스당 한 번만 백그라운드 warmup을 시작"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+                self._thread.start()
+        return self._thread
+
+
+warmup = Warmup()
@@ -0,0 +1,248 @@
+import hashlib
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Optional
+
+from src import logger
+from src.common.consts import (
+    GD_BASE_FOLDER_ID,
+    GD_UPLOAD_CHUNK_SIZE,
+    GD_UPLOAD_RETRIES,
+    LOCAL_STORAGE_DIR,
+    STORAGE_BACKEND_DEFAULT,
+    STORAGE_DOCS_FILE_PATH,
+    STORAGE_FOLDER_PATHS,
+    STORAGE_PROMPT_PATH,
+)
+
+
+class StorageBackend(ABC):
+    """prompt와 결과 파일을 저장하는 저장소 인터페이스
+
+    - id: backend별 파일/폴더 식별자
+    - path: 저장소 root 기준으로 "/"로 구분한 경로(ex. "ssk_gpt_manager/result")
+    - 파일 정보(dict)는 id, name, parents, modifiedTime, md5Checksum, webViewLink를 포함
+    """
+
+    @abstractmethod
+    def resolve(self, path: str) -> str:
+        """path의 id를 반환. 없으면 ValueError"""
+
+    @abstractmethod
+    def peek(self, path: str) -> Optional[str]:
+        """원격 조회 없이 알 수 있는 경우에만 path의 id를 반환"""
+
+    @abstractmethod
+    def list_files(self, folder_id: str) -> list[dict]:
+        """folder 바로 아래의 파일 정보 목록"""
+
+    def get_id(self, filename: str, folder_id: str) -> str:
+        files = [file for file in self.list_files(folder_id) if file["name"] == filename]
+        if not files:
+            raise ValueError(f"File '{filename}' not found in folder {folder_id}")
+        if len(files) > 1:
+            raise ValueError(f"Multiple files named '{filename}' found in folder {folder_id}")
+        return files[0]["id"]
+
+    @abstractmethod
+    def upload(self, filename: str, content: str | bytes | IO[bytes], folder_id: str, chunked=False) -> dict:
+        """content를 folder에 filename으로 저장하고 파일 정보를 반환. chunked이면 큰 파일을 나누어 전송"""
+
+    @abstractmethod
+    def download(self, file_id: str, target_path: str | Path) -> Path:
+        """파일을 로컬 target_path에 저장하고 그 경로를 반환"""
+
+    @abstractmethod
+    def move(self, file_ids: list[str], new_folder_id: str) -> list[dict]:
+        """파일들을 new_folder로 옮기고, 옮겨진 파일 정보 목록을 반환"""
+
+    @abstractmethod
+    def get_url(self, file_id: str) -> str:
+        """사용자에게 보여줄 파일 링크"""
+
+
+class GoogleDriveStorage(StorageBackend):
+    def __init__(self, base_folder_id: str = GD_BASE_FOLDER_ID) -> None:
+        from src.utils.google_drive import GoogleDriveMetadataIndex, GoogleDrivePathResolver
+
+        self.path_resolver = GoogleDrivePathResolver(base_folder_id)
+        self.gd_helper = self.path_resolver.gd_helper
+        self.metadata_index = GoogleDriveMetadataIndex(self.gd_helper)
+
+    def resolve(self, path: str) -> str:
+        return self.path_resolver.get_id(path)
+
+    def peek(self, path: str) -> Optional[str]:
+        return self.path_resolver.peek(path)
+
+    def list_files(self, folder_id: str) -> list[dict]:
+        return self.metadata_index.list_files(folder_id)
+
+    def get_id(self, filename: str, folder_id: str) -> str:
+        return self.metadata_index.get_id(filename, folder_id)
+
+    def upload(self, filename: str, content: str | bytes | IO[bytes], folder_id: str, chunked=False) -> dict:
+        if isinstance(content, str) and not chunked:
+            file = self.gd_helper.upload(filename, content, folder_id=folder_id)
+        else:
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+            file = self.gd_helper.upload_byte_obj(
+                filename,
+                content,
+                folder_id=folder_id,
+                chunksize=GD_UPLOAD_CHUNK_SIZE if chunked else None,
+                num_retries=GD_UPLOAD_RETRIES,
+            )
+        self.metadata_index.add(file)
+        return file
+
+    def download(self, file_id: str, target_path: str | Path) -> Path:
+        return self.gd_helper.download(file_id, target_path)
+
+    def move(self, file_ids: list[str], new_folder_id: str) -> list[dict]:
+        return self.metadata_index.move_files(file_ids, new_folder_id)
+
+    def get_url(self, file_id: str) -> str:
+        return f"https://drive.google.com/file/d/{file_id}/view?usp=sharing"
+
+
+class LocalStorage(StorageBackend):
+    """로컬 디렉토리를 저장소로 사용. 네트워크와 인증 없이 개발, 테스트, 부하 테스트를 하기 위함
+
+    id는 root_dir 기준 상대 경로(posix)이며, root 폴더의 id는 ""
+    Drive와 달리 같은 폴더에 같은 이름의 파일을 둘 수 없으므로, 같은 이름으로 업로드하면 덮어씀(move는 이름을 바꾸어 보존)
+    """
+
+    def __init__(self, root_dir: Path = LOCAL_STORAGE_DIR, folder_paths: list[str] = STORAGE_FOLDER_PATHS) -> None:
+        self.root_dir = Path(root_dir)
+        self._lock = threading.Lock()
+        for folder_path in folder_paths:
+            (self.root_dir / folder_path).mkdir(parents=True, exist_ok=True)
+
+    def _path(self, file_id: str) -> Path:
+        return self.root_dir / file_id
+
+    def _id(self, path: Path) -> str:
+        file_id = path.relative_to(self.root_dir).as_posix()
+        return "" if file_id == "." else file_id
+
+    def _file_info(self, path: Path) -> dict:
+        stat = path.stat()
+        file_info = {
+            "id": self._id(path),
+            "name": path.name,
+            "parents": [self._id(path.parent)],
+            "mimeType": "application/vnd.google-apps.folder" if path.is_dir() else "application/octet-stream",
+            "modifiedTime": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "webViewLink": path.resolve().as_uri(),
+        }
+        if path.is_file():
+            with open(path, "rb") as f:
+                file_info["md5Checksum"] = hashlib.file_digest(f, "md5").hexdigest()
+        return file_info
+
+    def resolve(self, path: str) -> str:
+        if not self._path(path).exists():
+            parent_path, _, name = path.rpartition("/")
+            raise ValueError(f"File '{name}' not found in folder {parent_path}")
+        return path
+
+    def peek(self, path: str) -> Optional[str]:
+        return path if self._path(path).exists() else None
+
+    def list_files(self, folder_id: str) -> list[dict]:
+        # 업로드 중인 임시 파일(.{filename}.*.tmp)은 제외
+        return [
+            self._file_info(path) for path in sorted(self._path(folder_id).iterdir()) if not path.name.startswith(".")
+        ]
+
+    def upload(self, filename: str, content: str | bytes | IO[bytes], folder_id: str, chunked=False) -> dict:
+        target_path = self._path(folder_id) / filename
+        if target_path.exists():
+            logger.warning(f"Overwrite the existing file in local storage: {target_path}")
+
+        # 쓰는 도중의 파일이 조회되지 않도록 이름이 겹치지 않는 임시 파일에 쓴 뒤 교체. 같은 이름의 동시 업로드는 차례로 처리
+        with self._lock:
+            f = tempfile.NamedTemporaryFile(dir=target_path.parent, prefix=f".{filename}.", suffix=".tmp", delete=False)
+            try:
+                with f:
+                    if isinstance(content, str):
+                        f.write(content.encode("utf-8"))
+                    elif isinstance(content, bytes):
+                        f.write(content)
+                    else:
+                        content.seek(0)
+                        shutil.copyfileobj(content, f)
+                os.replace(f.name, target_path)
+            finally:
+                Path(f.name).unlink(missing_ok=True)
+            return self._file_info(target_path)
+
+    def download(self, file_id: str, target_path: str | Path) -> Path:
+        target_path = Path(target_path)
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(self._path(file_id), target_path)
+        return target_path
+
+    def move(self, file_ids: list[str], new_folder_id: str) -> list[dict]:
+        """Google Drive처럼 같은 이름의 파일이 있어도 덮어쓰지 않음. 이때는 이름 뒤에 번호를 붙임(ex. a_1.toml)"""
+        moved = []
+        for file_id in file_ids:
+            source_path = self._path(file_id)
+            with self._lock:
+                target_path = self._path(new_folder_id) / source_path.name
+                for idx in itertools.count(1):
+                    if not target_path.exists():
+                        break
+                    target_path = target_path.with_name(f"{source_path.stem}_{idx}{source_path.suffix}")
+                os.rename(source_path, target_path)
+            moved.append(self._file_info(target_path))
+        return moved
+
+    def get_url(self, file_id: str) -> str:
+        return self._path(file_id).resolve().as_uri()
+
+
+def create_storage(backend: Optional[str] = None) -> StorageBackend:
+    backend = backend or os.getenv("STORAGE_BACKEND", STORAGE_BACKEND_DEFAULT)
+    match backend:
+        case "gdrive":
+            return GoogleDriveStorage()
+        case "local":
+            return LocalStorage()
+        case _:
+            raise ValueError(f"Unknown storage backend: {backend}")
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    """프로세스 전체에서 공유하는 저장소. STORAGE_BACKEND 환경 변수로 backend를 선택(gdrive | local)"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = create_storage()
+            logger.info(f"Storage backend: {_storage.__class__.__name__}")
+    return _storage
+
+
+def get_prompt_folder_id() -> str:
+    return get_storage().resolve(STORAGE_PROMPT_PATH)
+
+
+def get_docs_file_url(resolve=True) -> Optional[str]:
+    """manual 문서 url. resolve=False이면 원격 조회가 필요한 경우 조회하지 않고 None을 반환"""
+    if not resolve and _storage is None:  # 저장소 client 생성(Drive client import 포함)도 기다리지 않음
+        return None
+    storage = get_storage()
+    file_id = storage.resolve(STORAGE_DOCS_FILE_PATH) if resolve else storage.peek(STORAGE_DOCS_FILE_PATH)
+    return None if file_id is None else storage.get_url(file_id)
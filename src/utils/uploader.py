@@ -0,0 +1,50 @@
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import IO
+
+from src import logger
+from src.common.consts import GD_UPLOAD_MAX_WORKERS, STORAGE_RESULT_PATH
+from src.utils.metrics import metrics
+from src.utils.storage import get_storage
+
+
+class BackgroundUploader:
+    """결과 파일을 별도 thread pool에서 저장소(Google Drive 등)로 업로드
+
+    채점과는 다른 pool을 사용하므로 업로드가 밀려 있어도 다음 배치의 채점이 지연되지 않음.
+    업로드는 resumable session으로 청크 단위로 진행되며, 실패한 청크는 세션을 이어서 재시도함
+    """
+
+    def __init__(self, max_workers: int = GD_UPLOAD_MAX_WORKERS) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gd-uploader")
+
+    def _upload(self, filename: str, byte_obj: bytes | IO[bytes] | Path, folder_path: str) -> dict:
+        storage = get_storage()
+        try:
+            with metrics.span("upload"):
+                if isinstance(byte_obj, Path):  # 다른 thread가 읽고 있는 파일 객체를 같이 쓰지 않도록 따로 엶
+                    with byte_obj.open("rb") as f:
+                        file = storage.upload(filename, f, folder_id=storage.resolve(folder_path), chunked=True)
+                else:
+                    file = storage.upload(filename, byte_obj, folder_id=storage.resolve(folder_path), chunked=True)
+        except Exception as e:
+            logger.error(f"Fail to upload {filename} to storage: {e.__class__.__name__}: {e}")
+            raise
+        logger.info(f"Complete to upload {filename} to storage: {file['webViewLink']}")
+        return file
+
+    def submit(
+        self, filename: str, byte_obj: bytes | IO[bytes] | Path, folder_path: str = STORAGE_RESULT_PATH
+    ) -> Future:
+        """업로드를 예약하고 바로 Future를 반환. Future의 결과는 업로드된 파일 정보
+
+        Args:
+            byte_obj: 파일 경로이면 업로드할 때 파일을 열어서 읽음
+        """
+        logger.info(f"Schedule to upload {filename} to storage")
+        # 업로드도 같은 배치의 span으로 기록되도록 현재 context에서 실행
+        return self._executor.submit(contextvars.copy_context().run, self._upload, filename, byte_obj, folder_path)
+
+
+background_uploader = BackgroundUploader()
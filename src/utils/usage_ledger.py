@@ -0,0 +1,172 @@
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from src import logger
+from src.common.consts import USAGE_LEDGER_PATH
+from src.utils.llm import compute_cost
+from src.utils.metrics import get_current_batch_id
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,  -- UTC ISO 8601
+    batch_id TEXT,
+    category_id TEXT,
+    category_version TEXT,
+    model TEXT NOT NULL,
+    endpoint TEXT,
+    n INTEGER NOT NULL DEFAULT 1,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    cached_tokens INTEGER NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 0,  -- USD. 기록 시점의 가격으로 계산
+    latency REAL,  -- 마지막 시도의 응답 시간(초)
+    retries INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL  -- ok 또는 마지막 오류의 클래스명
+);
+CREATE INDEX IF NOT EXISTS idx_llm_usage_created_at ON llm_usage (created_at);
+CREATE INDEX IF NOT EXISTS idx_llm_usage_category ON llm_usage (category_id, created_at);
+"""
+PERIOD_FORMATS = {"day": "%Y-%m-%d", "month": "%Y-%m"}
+GROUP_COLUMNS = {"category_id", "category_version", "model", "endpoint", "batch_id"}
+
+
+class UsageLedger:
+    """LLM 호출마다 토큰 사용량, 비용, 응답 시간, 재시도 횟수를 SQLite 테이블에 추가만 하는 장부
+
+    여러 세션(thread)과 event loop에서 기록하므로 연결 하나를 lock으로 보호하며, 조회는 집계 쿼리로만 함
+    """
+
+    def __init__(self, path: Path = USAGE_LEDGER_PATH) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def record(
+        self,
+        model: str,
+        usage: Optional[dict] = None,
+        endpoint: Optional[str] = None,
+        n: int = 1,
+        latency: Optional[float] = None,
+        retries: int = 0,
+        status: str = "ok",
+        category_id: Optional[str] = None,
+        category_version: Optional[str] = None,
+        batch_id: Optional[str] = None,
+    ) -> None:
+        """LLM 호출 하나를 기록. 기록에 실패해도 채점은 계속되도록 예외를 밖으로 내보내지 않음
+
+        Args:
+            usage: 응답의 usage(prompt_tokens, completion_tokens, prompt_tokens_details.cached_tokens). 실패한 호출은 None
+            batch_id: None이면 metrics의 현재 배치
+        """
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+        row = (
+            datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            batch_id or get_current_batch_id(),
+            category_id,
+            category_version,
+            model,
+            endpoint,
+            n,
+            prompt_tokens,
+            completion_tokens,
+            cached_tokens,
+            compute_cost(model, prompt_tokens, completion_tokens),
+            latency,
+            retries,
+            status,
+        )
+        try:
+            with self._lock:
+                self._connect().execute(
+                    "INSERT INTO llm_usage (created_at, batch_id, category_id, category_version, model, endpoint, n, "
+                    + "prompt_tokens, completion_tokens, cached_tokens, cost, latency, retries, status) "
+                    + "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Fail to record LLM usage: {e}")
+
+    def _query(self, sql: str, params: tuple = ()) -> list[dict]:
+        with self._lock:
+            return [dict(row) for row in self._connect().execute(sql, params).fetchall()]
+
+    @staticmethod
+    def _where(start: Optional[datetime], end: Optional[datetime], category_id: Optional[str]) -> tuple[str, tuple]:
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("created_at >= ?")
+            params.append(start.astimezone(timezone.utc).isoformat())
+        if end is not None:
+            conditions.append("created_at < ?")
+            params.append(end.astimezone(timezone.utc).isoformat())
+        if category_id is not None:
+            conditions.append("category_id = ?")
+            params.append(category_id)
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), tuple(params)
+
+    def summarize(
+        self,
+        period: str = "month",
+        group_by: tuple[str, ...] = ("category_id",),
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        category_id: Optional[str] = None,
+    ) -> list[dict]:
+        """기간(UTC 기준 day | month)과 group_by 칼럼별 호출 수, 토큰, 비용, 응답 시간, 재시도 합계. 최근 기간부터 정렬"""
+        if period not in PERIOD_FORMATS or not set(group_by) <= GROUP_COLUMNS:
+            raise ValueError(f"Invalid period or group_by: {period}, {group_by}")
+        where, params = self._where(start, end, category_id)
+        group_str = "".join(f", {column}" for column in group_by)
+        return self._query(
+            f"SELECT strftime('{PERIOD_FORMATS[period]}', created_at) AS period{group_str}, "
+            + "COUNT(*) AS calls, SUM(status != 'ok') AS failures, SUM(retries) AS retries, "
+            + "SUM(prompt_tokens) AS prompt_tokens, SUM(completion_tokens) AS completion_tokens, "
+            + "SUM(cached_tokens) AS cached_tokens, SUM(cost) AS cost, AVG(latency) AS avg_latency "
+            + f"FROM llm_usage {where} GROUP BY period{group_str} ORDER BY period DESC, cost DESC",
+            params,
+        )
+
+    def summarize_models(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> list[dict]:
+        """모델별 호출당 평균 토큰, 비용, 응답 시간과 재시도/실패 비율. 모델 선택을 조정할 때 참고"""
+        where, params = self._where(start, end, None)
+        return self._query(
+            "SELECT model, COUNT(*) AS calls, AVG(prompt_tokens) AS avg_prompt_tokens, "
+            + "AVG(completion_tokens) AS avg_completion_tokens, AVG(cost) AS avg_cost, SUM(cost) AS cost, "
+            + "AVG(latency) AS avg_latency, AVG(retries) AS avg_retries, AVG(status != 'ok') AS failure_rate "
+            + f"FROM llm_usage {where} GROUP BY model ORDER BY cost DESC",
+            params,
+        )
+
+    def summarize_batches(self, limit: int = 20, category_id: Optional[str] = None) -> list[dict]:
+        """최근 배치별 호출 수, 비용, 소요 시간. 배치 크기를 조정할 때 참고"""
+        where, params = self._where(None, None, category_id)
+        where = f"{where} AND batch_id IS NOT NULL" if where else "WHERE batch_id IS NOT NULL"
+        return self._query(
+            "SELECT batch_id, category_id, MIN(created_at) AS started_at, COUNT(*) AS calls, "
+            + "SUM(prompt_tokens + completion_tokens) AS tokens, SUM(cost) AS cost, SUM(retries) AS retries, "
+            + "(julianday(MAX(created_at)) - julianday(MIN(created_at))) * 86400 AS span_seconds "
+            + f"FROM llm_usage {where} GROUP BY batch_id ORDER BY started_at DESC LIMIT ?",
+            params + (limit,),
+        )
+
+
+usage_ledger = UsageLedger()
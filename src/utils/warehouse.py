@@ -0,0 +1,195 @@
+import os
+import threading
+import uuid
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src import logger
+from src.common.consts import (
+    WAREHOUSE_CONTENT_COMPRESSION,
+    WAREHOUSE_CONTENT_COMPRESSION_LEVEL,
+    WAREHOUSE_CONTENT_DIR,
+    WAREHOUSE_SCORE_COMPRESSION,
+    WAREHOUSE_SCORE_DIR,
+)
+from src.processor.result import ResultTableBuilder
+
+CONTENT_COLUMN = "원문 내용"
+TOKEN_USAGE_KEYS = ["prompt_tokens", "completion_tokens", "total_tokens"]
+SCORE_PARTITIONING = ds.partitioning(pa.schema([("category_id", pa.string()), ("date", pa.string())]), flavor="hive")
+CONTENT_PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+
+
+class ResultWarehouse:
+    """채점이 끝난 배치를 Parquet 데이터셋으로 쌓아두고 조회
+
+    - scores: category_id, date(YYYY-MM-DD)로 hive 파티셔닝. 배치마다 파일 하나
+      (점수, 평가 설명, 모델명, 토큰 사용량, content_hash, category_version 등. 원문은 제외)
+    - contents: date로 파티셔닝한 (content_hash, 원문). 이미 저장한 content_hash는 다시 쓰지 않음
+
+    카테고리마다 점수 칼럼이 다르므로, 조회 시 파일들의 schema를 합쳐서 없는 칼럼은 null로 읽음
+    """
+
+    def __init__(self, score_dir: Path = WAREHOUSE_SCORE_DIR, content_dir: Path = WAREHOUSE_CONTENT_DIR) -> None:
+        self.score_dir = Path(score_dir)
+        self.content_dir = Path(content_dir)
+        self._lock = threading.Lock()
+        self._content_hashes = None  # 저장된 원문의 content_hash. 첫 append 때 읽음
+        self._schema_cache = {}  # dir -> (파일 목록, 합친 schema)
+
+    @staticmethod
+    def _write_table(table: pa.Table, path: Path, **kwargs) -> None:
+        """path에 이미 파일이 있으면 덮어쓰지 않고 FileExistsError"""
+        # 쓰는 도중의 파일이 조회되지 않도록 임시 파일에 쓴 뒤 link(같은 이름이 있으면 실패)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            pq.write_table(table, tmp_path, **kwargs)
+            os.link(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _load_content_hashes(self) -> set[str]:
+        if self._content_hashes is None:
+            if self.content_dir.is_dir():
+                table = self._dataset(self.content_dir, CONTENT_PARTITIONING).to_table(columns=["content_hash"])
+                self._content_hashes = set(table.column("content_hash").to_pylist())
+            else:
+                self._content_hashes = set()
+        return self._content_hashes
+
+    def append(
+        self,
+        batch_id: str,
+        category_id: str,
+        category_version: str,
+        result_table: ResultTableBuilder,
+        content_hashes: list[str],
+        token_usages: list[Optional[dict]],
+        created_at: Optional[datetime] = None,
+    ) -> Path:
+        """한 배치의 결과를 저장하고 scores 파일 경로를 반환
+
+        Args:
+            category_version: 채점에 사용한 CategoryEntry.version(usage_ledger, ContentHashIndex와 같은 값)
+            result_table: 결과표. 행 순서는 content_hashes, token_usages와 같음
+            token_usages: 행별 LLM 토큰 사용량. 기존 결과를 재사용해 LLM을 호출하지 않은 행은 None
+        """
+        created_at = created_at or datetime.now(timezone.utc)
+        date_str = created_at.astimezone().date().isoformat()
+        columns = result_table.to_columns()
+
+        arrays = {
+            "batch_id": pa.array([batch_id] * result_table.num_rows, pa.string()),
+            "content_hash": pa.array(content_hashes, pa.string()),
+            "category_version": pa.array([category_version] * result_table.num_rows, pa.string()),
+            "created_at": pa.array([created_at] * result_table.num_rows, pa.timestamp("ms", tz="UTC")),
+        }
+        for colname, (values, mask) in columns.items():
+            if colname == CONTENT_COLUMN:
+                continue
+            arrays[colname] = pa.array(values, pa.string()) if mask is None else pa.array(values, mask=~mask)
+        for key in TOKEN_USAGE_KEYS:
+            arrays[key] = pa.array([None if usage is None else usage[key] for usage in token_usages], pa.int64())
+        score_path = self.score_dir / f"category_id={category_id}" / f"date={date_str}" / f"{batch_id}.parquet"
+
+        with self._lock:
+            self._write_table(pa.table(arrays), score_path, compression=WAREHOUSE_SCORE_COMPRESSION)
+
+            # 원문은 content_hash 기준으로 한 번만 저장
+            stored_hashes = self._load_content_hashes()
+            new_contents = {}
+            for content_hash, content in zip(content_hashes, columns[CONTENT_COLUMN][0]):
+                if content_hash not in stored_hashes:
+                    new_contents.setdefault(content_hash, content)
+            if new_contents:
+                content_table = pa.table(
+                    {
+                        "content_hash": pa.array(new_contents.keys(), pa.string()),
+                        "content": pa.array(new_contents.values(), pa.large_string()),
+                    }
+                )
+                self._write_table(
+                    content_table,
+                    self.content_dir / f"date={date_str}" / f"{batch_id}.parquet",
+                    compression=WAREHOUSE_CONTENT_COMPRESSION,
+                    compression_level=WAREHOUSE_CONTENT_COMPRESSION_LEVEL,
+                )
+                stored_hashes.update(new_contents)
+
+        logger.info(f"Complete to append {result_table.num_rows} results to warehouse: {score_path}")
+        return score_path
+
+    def _dataset(self, base_dir: Path, partitioning: ds.Partitioning) -> ds.Dataset:
+        """파일들의 schema를 합친 데이터셋. 파일 목록이 같으면 합친 schema를 재사용"""
+        paths = sorted(str(path) for path in base_dir.rglob("*.parquet"))
+        cached = self._schema_cache.get(base_dir)
+        if cached is None or cached[0] != paths:
+            schemas = [pq.read_schema(path) for path in paths]
+            schema = pa.unify_schemas(schemas + [partitioning.schema]) if schemas else partitioning.schema
+            cached = self._schema_cache[base_dir] = (paths, schema)
+        return ds.dataset(
+            paths, schema=cached[1], format="parquet", partitioning=partitioning, partition_base_dir=str(base_dir)
+        )
+
+    def get_schema(self) -> pa.Schema:
+        """scores의 칼럼 schema(모든 파일의 schema를 합친 것)"""
+        if not self.score_dir.is_dir():
+            return SCORE_PARTITIONING.schema
+        return self._dataset(self.score_dir, SCORE_PARTITIONING).schema
+
+    def get_data_version(self, category_id: Optional[str] = None) -> tuple[int, float]:
+        """(파일 수, 마지막 수정 시각). 배치가 추가되면 바뀌므로 조회 결과 캐시의 키로 사용"""
+        base_dir = self.score_dir if category_id is None else self.score_dir / f"category_id={category_id}"
+        mtimes = [path.stat().st_mtime for path in base_dir.rglob("*.parquet")] if base_dir.is_dir() else []
+        return len(mtimes), max(mtimes, default=0.0)
+
+    def query(
+        self,
+        columns: Optional[list[str]] = None,
+        category_id: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        filter: Optional[pc.Expression] = None,
+    ) -> pa.Table:
+        """scores를 조회. columns에 지정한 칼럼만 읽고, category_id와 날짜 조건은 파티션 단위로 걸러냄
+
+        Args:
+            columns: 읽을 칼럼 목록. None이면 전체
+            start_date, end_date: 포함 범위
+            filter: 추가 조건(ex. pc.field("Total") >= 50)
+        """
+        if not self.score_dir.is_dir():
+            return pa.table({})
+        conditions = [] if filter is None else [filter]
+        if category_id is not None:
+            conditions.append(pc.field("category_id") == category_id)
+        if start_date is not None:
+            conditions.append(pc.field("date") >= start_date.isoformat())
+        if end_date is not None:
+            conditions.append(pc.field("date") <= end_date.isoformat())
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        dataset = self._dataset(self.score_dir, SCORE_PARTITIONING)
+        return dataset.to_table(columns=columns, filter=expression)
+
+    def get_contents(self, content_hashes: Iterable[str]) -> dict[str, str]:
+        """content_hash별 원문"""
+        if not self.content_dir.is_dir():
+            return {}
+        dataset = self._dataset(self.content_dir, CONTENT_PARTITIONING)
+        table = dataset.to_table(
+            columns=["content_hash", "content"], filter=pc.field("content_hash").isin(list(content_hashes))
+        )
+        return dict(zip(table.column("content_hash").to_pylist(), table.column("content").to_pylist()))
+
+
+result_warehouse = ResultWarehouse()